@@ -0,0 +1,102 @@
+"""
+搜索基准：LIKE '%q%' 全表扫描 vs FTS5 全文索引
+生成指定数量的歌曲（默认 10 万首），对一组典型输入（中文片段、英文前缀、拼音、首字母）
+分别用原 SearchView 的 icontains 查询和 FTS5 MATCH + bm25 查询，统计延迟分位数。
+
+运行方式:
+  python benchmark_search.py
+  python benchmark_search.py --songs 200000 --rounds 50
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mayday_project.settings')
+django.setup()
+
+from mayday_app.search_index import (
+    BM25_WEIGHTS, CREATE_FTS_SQL, FTS_COLUMNS, FTS_TABLE, build_match_query, song_document,
+)
+
+CHARS = '我们的爱情天空倔强温柔知足突然好想你人生海海星空离开地球表面恋爱循环自由拥抱憨人轧车伤心的人别听慢歌如烟后来的我们'
+WORDS = ['Live', 'Remix', 'Demo', 'Acoustic', 'Love', 'Song', 'Night', 'Dream', 'OAOA', 'Party']
+ARTISTS = [('五月天', 'wuyuetian'), ('苏打绿', 'sudalv'), ('陈绮贞', 'chenqizhen'), ('Mayday', 'mayday')]
+QUERIES = ['倔强', '温柔', '天空', 'Live', 'dre', 'juejiang', 'wenrou', 'tk', '五月天', '突然好想你']
+
+
+def _prepare(path, songs):
+    rng = random.Random(42)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE album (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.execute('CREATE TABLE song (id INTEGER PRIMARY KEY, title TEXT, artist TEXT, artist_pinyin TEXT, album_id INTEGER)')
+    conn.execute(CREATE_FTS_SQL)
+    albums = [''.join(rng.sample(CHARS, rng.randint(2, 4))) for _ in range(max(songs // 12, 1))]
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO album (id, name) VALUES (?, ?)', enumerate(albums, 1))
+    rows = []
+    for song_id in range(1, songs + 1):
+        title = ''.join(rng.sample(CHARS, rng.randint(2, 6)))
+        if rng.random() < 0.3:
+            title += ' ' + rng.choice(WORDS)
+        artist, artist_pinyin = rng.choice(ARTISTS)
+        album_id = rng.randint(1, len(albums))
+        rows.append((song_id, title, artist, artist_pinyin, album_id))
+    conn.executemany('INSERT INTO song VALUES (?, ?, ?, ?, ?)', rows)
+    conn.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+        ((song_id, *song_document(title, artist, albums[album_id - 1], artist_pinyin))
+         for song_id, title, artist, artist_pinyin, album_id in rows),
+    )
+    conn.execute('COMMIT')
+    return conn
+
+
+def _like(conn, query):
+    pattern = f'%{query}%'
+    return conn.execute(
+        'SELECT song.id FROM song LEFT JOIN album ON album.id = song.album_id '
+        'WHERE song.title LIKE ? OR song.artist LIKE ? OR album.name LIKE ? LIMIT 50',
+        (pattern, pattern, pattern),
+    ).fetchall()
+
+
+def _fts(conn, query):
+    return conn.execute(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? "
+        f"ORDER BY bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)}) LIMIT 50",
+        (build_match_query(query),),
+    ).fetchall()
+
+
+def _measure(conn, search, rounds):
+    latencies, hits = [], {}
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            hits[query] = len(search(conn, query))
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)]
+    return pick(0.5), pick(0.95), pick(0.99), hits
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='歌曲搜索延迟基准')
+    parser.add_argument('--songs', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), 'search.sqlite3')
+    start = time.perf_counter()
+    conn = _prepare(path, args.songs)
+    print(f"{args.songs} 首歌曲，建库与索引耗时 {time.perf_counter() - start:.1f}s")
+    for label, search in (('LIKE', _like), ('FTS5', _fts)):
+        p50, p95, p99, hits = _measure(conn, search, args.rounds)
+        print(f"{label:<6} p50 {p50:8.3f}ms  p95 {p95:8.3f}ms  p99 {p99:8.3f}ms")
+        print('       命中数: ' + '  '.join(f'{q}={n}' for q, n in hits.items()))
+    conn.close()
@@ -0,0 +1,113 @@
+"""
+SQLite 配置基准：扫描写入期间的读取延迟
+写线程模拟音乐扫描（逐首更新歌曲记录，每条语句自动提交），
+读线程同时执行专辑页查询，统计读取延迟分位数与 "database is locked" 次数。
+分别使用 SQLite 默认配置（rollback journal）与 settings.SQLITE_PRAGMAS 配置运行。
+
+运行方式:
+  python benchmark_sqlite.py
+  python benchmark_sqlite.py --songs 50000 --seconds 10
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mayday_project.settings')
+django.setup()
+
+from mayday_app.sqlite_tuning import pragma_profile, pragma_statements
+
+# Django sqlite 后端的默认锁等待（秒）
+DJANGO_DEFAULT_TIMEOUT = 5
+
+
+def _connect(path, statements):
+    conn = sqlite3.connect(path, timeout=DJANGO_DEFAULT_TIMEOUT, isolation_level=None, check_same_thread=False)
+    for statement in statements:
+        conn.execute(statement)
+    return conn
+
+
+def _prepare(path, songs, statements):
+    conn = _connect(path, statements)
+    conn.execute(
+        'CREATE TABLE song (id INTEGER PRIMARY KEY, title TEXT, artist TEXT, album_id INTEGER, '
+        'track_number INTEGER, duration REAL, original_path TEXT)'
+    )
+    conn.execute('CREATE INDEX song_album ON song (album_id, track_number)')
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO song (title, artist, album_id, track_number, duration, original_path) VALUES (?, ?, ?, ?, ?, ?)',
+        ((f'歌曲 {i}', '五月天', i % 500, i % 20, 240.0, f'D:\\Music\\{i}.flac') for i in range(songs)),
+    )
+    conn.execute('COMMIT')
+    conn.close()
+
+
+def _writer(path, statements, songs, stop):
+    conn = _connect(path, statements)
+    i = 0
+    while not stop.is_set():
+        try:
+            conn.execute('UPDATE song SET duration = duration + 0.001, title = title WHERE id = ?', (i % songs + 1,))
+        except sqlite3.OperationalError:
+            pass
+        i += 1
+    conn.close()
+    return i
+
+
+def _reader(path, statements, stop, latencies, errors):
+    conn = _connect(path, statements)
+    album = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute(
+                'SELECT id, title, artist, duration FROM song WHERE album_id = ? ORDER BY track_number LIMIT 50',
+                (album % 500,),
+            ).fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError:
+            errors.append(1)
+        album += 1
+    conn.close()
+
+
+def run(label, statements, songs, seconds):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    _prepare(path, songs, statements)
+    stop = threading.Event()
+    latencies, errors, writes = [], [], []
+    threads = [
+        threading.Thread(target=lambda: writes.append(_writer(path, statements, songs, stop))),
+        threading.Thread(target=_reader, args=(path, statements, stop, latencies, errors)),
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] if latencies else float('nan')
+    print(f"{label:<10} 读取 {len(latencies):>7} 次  p50 {pick(0.5):7.3f}ms  p95 {pick(0.95):7.3f}ms  "
+          f"p99 {pick(0.99):8.3f}ms  max {max(latencies, default=0):8.1f}ms  "
+          f"locked {len(errors):>4}  写入 {writes[0] if writes else 0:>7} 次")
+    return statistics.median(latencies) if latencies else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLite 扫描期间读取延迟基准')
+    parser.add_argument('--songs', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    print(f"{args.songs} 首歌曲，写线程持续更新 {args.seconds} 秒")
+    run('默认配置', [], args.songs, args.seconds)
+    run('PRAGMA配置', pragma_statements(pragma_profile('default')), args.songs, args.seconds)
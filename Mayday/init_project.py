@@ -27,6 +27,7 @@ if __name__ == '__main__':
     print("\n运行数据库迁移...")
     execute_from_command_line(['manage.py', 'makemigrations'])
     execute_from_command_line(['manage.py', 'migrate'])
+    execute_from_command_line(['manage.py', 'migrate', '--database=telemetry'])
     
     print("\n" + "=" * 50)
     print("初始化完成！")
@@ -1,79 +1,29 @@
 """
 从 C:\Lyrics 目录加载歌词到数据库
 支持多种歌词文件格式：.txt, .lrc 等
+编码只在导入时识别一次，文件大小 / 修改时间 / 内容摘要不变的文件再次运行时跳过
 """
 import os
 import django
 from pathlib import Path
-import re
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mayday_project.settings')
 django.setup()
 
-from mayday_app.models import Song
+from mayday_app.lyrics_files import decode_lyrics, import_lyrics
 
 
-def normalize_text(text):
-    """规范化文本，用于匹配"""
-    # 去除空格、标点符号，转换为小写
-    text = re.sub(r'[^\w]', '', text.lower())
-    return text
-
-
-def match_lyric_file_to_song(lyric_filename, songs):
-    """
-    匹配歌词文件到歌曲
-    
-    Args:
-        lyric_filename: 歌词文件名（不含扩展名）
-        songs: 歌曲查询集
-    
-    Returns:
-        匹配的歌曲对象，如果没有匹配则返回None
-    """
-    # 规范化歌词文件名
-    normalized_lyric = normalize_text(lyric_filename)
-    
-    best_match = None
-    best_score = 0
-    
-    for song in songs:
-        # 规范化歌曲标题
-        normalized_title = normalize_text(song.title)
-        
-        # 计算匹配分数
-        score = 0
-        
-        # 精确匹配
-        if normalized_lyric == normalized_title:
-            score = 100
-        # 歌词文件名包含歌曲标题
-        elif normalized_title in normalized_lyric:
-            score = 80 + len(normalized_title) / len(normalized_lyric) * 20
-        # 歌曲标题包含歌词文件名
-        elif normalized_lyric in normalized_title:
-            score = 60 + len(normalized_lyric) / len(normalized_title) * 20
-        # 部分匹配（至少50%字符相同）
-        else:
-            common_chars = set(normalized_lyric) & set(normalized_title)
-            if common_chars:
-                similarity = len(common_chars) / max(len(set(normalized_lyric)), len(set(normalized_title)))
-                if similarity > 0.5:
-                    score = similarity * 50
-        
-        if score > best_score:
-            best_score = score
-            best_match = song
-    
-    # 只返回匹配度较高的结果（阈值60）
-    if best_score >= 60:
-        return best_match
-    return None
+STATUS_LABELS = {
+    'imported': '✓ 已导入',
+    'unchanged': '= 文件未变化，跳过',
+    'skipped': '⚠️  跳过: 歌曲已有歌词（使用 --overwrite 可覆盖）',
+    'failed': '✗ 无法读取歌词内容',
+}
 
 
 def read_lyric_file(file_path):
     """
-    读取歌词文件内容
+    读取歌词文件内容（自动识别编码，见 lyrics_files.detect_encoding）
     
     Args:
         file_path: 歌词文件路径
@@ -82,45 +32,21 @@ def read_lyric_file(file_path):
         歌词内容字符串
     """
     try:
-        # 尝试多种编码
-        encodings = ['utf-8', 'gbk', 'gb2312', 'big5', 'latin-1']
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                    # 清理内容
-                    content = content.strip()
-                    return content
-            except UnicodeDecodeError:
-                continue
-        
-        # 如果所有编码都失败，使用二进制模式读取
-        with open(file_path, 'rb') as f:
-            content = f.read()
-            # 尝试解码
-            for encoding in encodings:
-                try:
-                    return content.decode(encoding).strip()
-                except UnicodeDecodeError:
-                    continue
-        
-        # 最后尝试使用错误处理
-        return content.decode('utf-8', errors='ignore').strip()
-        
-    except Exception as e:
+        return decode_lyrics(Path(file_path).read_bytes())
+    except OSError as e:
         print(f"  错误: 无法读取文件 {file_path}: {e}")
         return None
 
 
 def load_lyrics_from_directory(lyrics_dir='C:\\Lyrics', overwrite=False, dry_run=False):
     """
-    从指定目录加载歌词
+    从指定目录导入歌词：按歌名匹配文件，识别一次编码后以 UTF-8 存入数据库，
+    同时记录编码和文件指纹，再次运行时只导入有变化的文件
     
     Args:
         lyrics_dir: 歌词目录路径
-        overwrite: 如果为True，覆盖已存在的歌词
-        dry_run: 如果为True，只显示将要加载的歌词，不实际更新
+        overwrite: 如果为True，覆盖手动录入的歌词
+        dry_run: 如果为True，只显示将要导入的歌词，不实际更新
     """
     print("=" * 60)
     print("加载歌词脚本")
@@ -143,79 +69,21 @@ def load_lyrics_from_directory(lyrics_dir='C:\\Lyrics', overwrite=False, dry_run
     
     print(f"歌词目录: {lyrics_dir}\n")
     
-    # 支持的歌词文件格式
-    lyric_extensions = {'.txt', '.lrc', '.lyric', '.lyrics'}
-    
-    # 获取所有歌词文件
-    lyric_files = []
-    for ext in lyric_extensions:
-        lyric_files.extend(lyrics_path.rglob(f'*{ext}'))
-        lyric_files.extend(lyrics_path.rglob(f'*{ext.upper()}'))
+    def report(song, status, path):
+        if status == 'not_found':
+            return
+        print(f"{song.title} - {song.artist} ← {path.name}")
+        print(f"  {STATUS_LABELS[status]}")
     
-    print(f"找到 {len(lyric_files)} 个歌词文件\n")
-    
-    if not lyric_files:
-        print("没有找到歌词文件！")
-        return
-    
-    # 获取所有歌曲
-    all_songs = Song.objects.all()
-    print(f"数据库中的歌曲数: {len(all_songs)}\n")
-    
-    matched_count = 0
-    updated_count = 0
-    skipped_count = 0
-    not_found_count = 0
-    
-    for lyric_file in lyric_files:
-        # 获取文件名（不含扩展名）
-        filename_stem = lyric_file.stem
-        
-        print(f"处理: {lyric_file.name}")
-        
-        # 匹配歌曲
-        matched_song = match_lyric_file_to_song(filename_stem, all_songs)
-        
-        if not matched_song:
-            print(f"  ✗ 未找到匹配的歌曲")
-            not_found_count += 1
-            continue
-        
-        print(f"  ✓ 匹配到: {matched_song.title} - {matched_song.artist}")
-        
-        # 检查是否已有歌词
-        if matched_song.lyrics and not overwrite:
-            print(f"  ⚠️  跳过: 歌曲已有歌词（使用 --overwrite 可覆盖）")
-            skipped_count += 1
-            continue
-        
-        # 读取歌词内容
-        lyrics_content = read_lyric_file(lyric_file)
-        
-        if not lyrics_content:
-            print(f"  ✗ 无法读取歌词内容")
-            continue
-        
-        matched_count += 1
-        
-        if not dry_run:
-            # 更新歌词
-            matched_song.lyrics = lyrics_content
-            matched_song.save()
-            print(f"  ✓ 已更新歌词 ({len(lyrics_content)} 字符)")
-            updated_count += 1
-        else:
-            print(f"  ✓ 预览: 将更新歌词 ({len(lyrics_content)} 字符)")
-            print(f"     歌词预览: {lyrics_content[:50]}...")
+    counts = import_lyrics(lyrics_dir, overwrite=overwrite, dry_run=dry_run, report=report)
     
     print("\n" + "=" * 60)
     print("统计:")
-    print(f"  处理文件数: {len(lyric_files)}")
-    print(f"  成功匹配: {matched_count}")
-    if not dry_run:
-        print(f"  已更新: {updated_count}")
-        print(f"  已跳过: {skipped_count}")
-    print(f"  未找到匹配: {not_found_count}")
+    print(f"  {'将导入' if dry_run else '已导入'}: {counts['imported']}")
+    print(f"  文件未变化: {counts['unchanged']}")
+    print(f"  已跳过: {counts['skipped']}")
+    print(f"  读取失败: {counts['failed']}")
+    print(f"  未找到歌词文件的歌曲: {counts['not_found']}")
     print("=" * 60)
     
     if dry_run:
@@ -2,7 +2,7 @@
 Django管理后台配置
 """
 from django.contrib import admin
-from .models import Album, Song, Tour, TourVenue, Quote, Image, Playlist, PlaylistSong, MembershipProfile, Favorite, MembershipOrder
+from .models import Album, Artist, Song, SongSeekIndex, SongLyricsSource, Tour, TourVenue, Quote, Image, Playlist, PlaylistSong, MembershipProfile, Favorite, MembershipOrder, StreamUsage, PlayEvent, SongPlayStat
 
 
 @admin.register(Album)
@@ -25,12 +25,20 @@ class AlbumAdmin(admin.ModelAdmin):
     song_count.short_description = '歌曲数量'
 
 
+@admin.register(Artist)
+class ArtistAdmin(admin.ModelAdmin):
+    list_display = ['name', 'initial', 'pinyin', 'song_count', 'aliases']
+    list_filter = ['initial']
+    search_fields = ['name', 'pinyin', 'identity_key']
+
+
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
     list_display = ['title', 'artist', 'album', 'track_number', 'duration']
     list_filter = ['album', 'artist']
     search_fields = ['title', 'artist']
     ordering = ['album', 'track_number']
+    raw_id_fields = ['artist_ref']
     
     def get_queryset(self, request):
         """优化查询，预加载专辑"""
@@ -38,6 +46,20 @@ class SongAdmin(admin.ModelAdmin):
         return qs.select_related('album')
 
 
+@admin.register(SongSeekIndex)
+class SongSeekIndexAdmin(admin.ModelAdmin):
+    list_display = ['song', 'interval', 'file_size', 'updated_at']
+    raw_id_fields = ['song']
+    exclude = ['offsets']
+
+
+@admin.register(SongLyricsSource)
+class SongLyricsSourceAdmin(admin.ModelAdmin):
+    list_display = ['song', 'source_path', 'encoding', 'file_size', 'imported_at']
+    list_filter = ['encoding']
+    raw_id_fields = ['song']
+
+
 @admin.register(Tour)
 class TourAdmin(admin.ModelAdmin):
     list_display = ['name', 'start_date', 'end_date']
@@ -129,3 +151,29 @@ class MembershipOrderAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'external_id']
     raw_id_fields = ['user']
 
+
+@admin.register(StreamUsage)
+class StreamUsageAdmin(admin.ModelAdmin):
+    list_display = ['day', 'user', 'client_ip', 'bytes_served', 'stream_count']
+    list_filter = ['day']
+    search_fields = ['client_ip']
+    raw_id_fields = ['user']
+    # 遥测库不能与曲库做 JOIN
+    list_select_related = ()
+
+
+@admin.register(PlayEvent)
+class PlayEventAdmin(admin.ModelAdmin):
+    list_display = ['song', 'user', 'source', 'played_at']
+    list_filter = ['source']
+    raw_id_fields = ['song', 'user']
+    list_select_related = ()
+    date_hierarchy = 'played_at'
+
+
+@admin.register(SongPlayStat)
+class SongPlayStatAdmin(admin.ModelAdmin):
+    list_display = ['song', 'day', 'play_count']
+    list_filter = ['day']
+    raw_id_fields = ['song']
+    list_select_related = ()
@@ -9,4 +9,23 @@ class MaydayAppConfig(AppConfig):
     def ready(self):
         # 注册 User → MembershipProfile 信号
         from . import membership  # noqa: F401
+        # 注册 Song / Album → 全文索引同步、歌词索引同步、曲库变更记录、歌手目录信号
+        from . import search_index  # noqa: F401
+        from . import lyrics_index  # noqa: F401
+        # 注册言论 / 巡回演出 / 场地 / 图片 → 内容索引同步信号
+        from . import content_index  # noqa: F401
+        from . import catalog_sync  # noqa: F401
+        from . import artist_directory  # noqa: F401
+        
+        # 新建 SQLite 连接时应用 PRAGMA 配置（WAL、busy_timeout 等）
+        from django.db.backends.signals import connection_created
+        from .sqlite_tuning import apply_sqlite_pragmas
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='mayday_sqlite_pragmas')
+        
+        # 进程退出时写出内存中尚未入库的流量计量和播放事件（没有待写出的记录时不访问数据库）
+        import atexit
+        from .play_events import play_events
+        from .stream_limits import bandwidth_meter
+        atexit.register(bandwidth_meter.flush)
+        atexit.register(play_events.flush)
 
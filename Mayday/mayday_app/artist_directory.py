@@ -0,0 +1,174 @@
+"""
+歌手目录 - 按首字母分组的物化结果
+ArtistsByInitialView 只读 ArtistDirectory 单行（带 If-None-Match 时只读版本号），不再逐个歌手查询。
+歌曲新增、删除或改换歌手时增减相关歌手的歌曲数；只有歌手在目录中出现 / 消失、
+或歌手改名 / 改首字母时才改写目录并递增版本号，扫描已有歌手的歌曲不会触发写入。
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Artist, ArtistDirectory, Song
+
+_MISSING = object()
+
+
+def render_directory(entries: Dict[str, List[str]]) -> Dict[str, object]:
+    """{歌手 id: [首字母, 名称]} → 接口数据（A-Z，# 放在最后；组内按名称排序）"""
+    groups: Dict[str, List[str]] = {}
+    for initial, name in entries.values():
+        groups.setdefault(initial, []).append(name)
+    initials = sorted(k for k in groups if k != '#')
+    if '#' in groups:
+        initials.append('#')
+    return {
+        'artists_by_initial': {initial: sorted(groups[initial]) for initial in initials},
+        'initials': initials,
+        'total_artists': len(entries),
+    }
+
+
+def _directory_row() -> ArtistDirectory:
+    directory = ArtistDirectory.objects.select_for_update().filter(pk=1).first()
+    return directory or ArtistDirectory(pk=1)
+
+
+def rebuild_artist_directory() -> ArtistDirectory:
+    """重新统计全部歌手的歌曲数并重建目录"""
+    counts = dict(
+        Song.objects.filter(artist_ref__isnull=False).order_by()
+        .values_list('artist_ref_id').annotate(n=Count('id'))
+    )
+    with transaction.atomic():
+        entries = {}
+        for artist in Artist.objects.only('id', 'name', 'initial', 'song_count'):
+            count = counts.get(artist.pk, 0)
+            if artist.song_count != count:
+                Artist.objects.filter(pk=artist.pk).update(song_count=count)
+            if count:
+                entries[str(artist.pk)] = [artist.initial or '#', artist.name]
+        directory = _directory_row()
+        directory.entries = entries
+        directory.payload = render_directory(entries)
+        directory.version += 1
+        directory.save()
+    return directory
+
+
+def update_directory(artist_ids: Iterable[int]) -> None:
+    """按歌手当前状态更新目录中的条目；无变化时不写入"""
+    artist_ids = list(artist_ids)
+    artists = {
+        str(row[0]): row for row in
+        Artist.objects.filter(pk__in=artist_ids).values_list('id', 'initial', 'name', 'song_count')
+    }
+    with transaction.atomic():
+        directory = _directory_row()
+        if not directory.version:
+            # 目录尚未生成：全量构建
+            rebuild_artist_directory()
+            return
+        entries = dict(directory.entries)
+        for artist_id in map(str, artist_ids):
+            row = artists.get(artist_id)
+            if row and row[3] > 0:
+                entries[artist_id] = [row[1] or '#', row[2]]
+            else:
+                entries.pop(artist_id, None)
+        if entries == directory.entries:
+            return
+        directory.entries = entries
+        directory.payload = render_directory(entries)
+        directory.version += 1
+        directory.save()
+
+
+def _recount(artist_id: int) -> int:
+    count = Song.objects.filter(artist_ref_id=artist_id).count()
+    Artist.objects.filter(pk=artist_id).update(song_count=count)
+    return count
+
+
+def adjust_song_counts(deltas: Dict[int, int]) -> None:
+    """按增量更新歌曲数；歌曲数在 0 与非 0 之间变化的歌手更新到目录"""
+    changed = []
+    for artist_id, delta in deltas.items():
+        if not artist_id or not delta:
+            continue
+        Artist.objects.filter(pk=artist_id).update(song_count=F('song_count') + delta)
+        after = Artist.objects.filter(pk=artist_id).values_list('song_count', flat=True).first()
+        if after is None:
+            continue
+        before = after - delta
+        if after <= 0:
+            # 批量操作绕过信号会使计数漂移，降到 0 时按实际歌曲数校正
+            after = _recount(artist_id)
+        if (after > 0) != (before > 0):
+            changed.append(artist_id)
+    if changed:
+        update_directory(changed)
+
+
+def recount_artist(artist_id: int) -> None:
+    """按实际歌曲数重新计数单个歌手"""
+    if not artist_id:
+        return
+    before = Artist.objects.filter(pk=artist_id).values_list('song_count', flat=True).first()
+    if before is None:
+        return
+    if (_recount(artist_id) > 0) != (before > 0):
+        update_directory([artist_id])
+
+
+def current_directory(known_version: str = '') -> tuple[int, Dict[str, object]]:
+    """返回 (版本, 接口数据)；known_version 与当前版本一致时只读版本号，接口数据为 None"""
+    if known_version:
+        version = ArtistDirectory.objects.filter(pk=1).values_list('version', flat=True).first()
+        if version is not None and str(version) == known_version:
+            return version, None
+    row = ArtistDirectory.objects.filter(pk=1).values_list('version', 'payload').first()
+    if row is None:
+        directory = rebuild_artist_directory()
+        return directory.version, directory.payload
+    return row
+
+
+@receiver(post_save, sender=Song)
+def song_saved(sender, instance: Song, created: bool = False, raw: bool = False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_artist_ref_id', _MISSING)
+    current = instance.artist_ref_id
+    instance._loaded_artist_ref_id = current
+    if created:
+        adjust_song_counts({current: 1})
+    elif previous is _MISSING:
+        # 不是从数据库加载的实例，无法得知原歌手，只重新计数当前歌手
+        recount_artist(current)
+    elif previous != current:
+        adjust_song_counts({previous: -1, current: 1})
+
+
+@receiver(post_delete, sender=Song)
+def song_deleted(sender, instance: Song, **kwargs):
+    adjust_song_counts({instance.artist_ref_id: -1})
+
+
+@receiver(post_save, sender=Artist)
+def artist_saved(sender, instance: Artist, created: bool = False, raw: bool = False, update_fields=None, **kwargs):
+    # 只有改名 / 改首字母会影响目录；新建歌手还没有歌曲
+    if raw or created or instance.song_count <= 0:
+        return
+    if update_fields is not None and not {'name', 'initial'} & set(update_fields):
+        return
+    update_directory([instance.pk])
+
+
+@receiver(post_delete, sender=Artist)
+def artist_deleted(sender, instance: Artist, **kwargs):
+    update_directory([instance.pk])
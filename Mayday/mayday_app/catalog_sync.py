@@ -0,0 +1,152 @@
+"""
+曲库版本号与进程内索引同步
+Song / Album 写入时追加 CatalogChange 记录，其自增 id 即曲库版本号。
+进程内索引（搜索建议、模糊搜索）继承 CatalogSyncedIndex：每隔几秒检查一次版本号，
+只重新加载变化的歌曲 / 专辑；变更过多、记录已被清理、收到全量标记或到了定期重建时间时，
+在后台线程全量重建后整体替换，重建期间继续使用旧索引。
+首次构建同样在后台进行，完成前 current() 返回 None，调用方回退到不依赖该索引的结果。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Dict, List, Set, Tuple
+
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Album, CatalogChange, Song
+
+# 变更记录保留时长：超过后删除（落后更多的进程会全量重建）
+CHANGE_RETENTION = timedelta(days=1)
+
+
+class CatalogSyncedIndex(ABC):
+    """按曲库版本号同步的进程内索引；子类实现 build() 和 apply()"""
+
+    name = 'catalog-index'
+
+    def __init__(self, check_seconds: float, rebuild_seconds: float, incremental_limit: int):
+        self.check_seconds = check_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.incremental_limit = incremental_limit
+        self._index = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._built_at = 0.0
+        self._sync_lock = threading.Lock()
+        self._rebuilding = False
+
+    @abstractmethod
+    def build(self):
+        """从数据库全量构建新索引"""
+        pass
+
+    @abstractmethod
+    def apply(self, index, song_ids: Set[int], album_ids: Set[int]) -> None:
+        """把变化的歌曲 / 专辑（可能已删除）重新加载到索引"""
+        pass
+
+    def needs_rebuild(self, index) -> bool:
+        """子类可要求提前全量重建（如删除标记过多）"""
+        return False
+
+    def current(self):
+        """当前索引；首次构建尚未完成时返回 None"""
+        self._sync()
+        return self._index
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'ready': self._index is not None,
+            'entries': len(self._index) if self._index is not None else 0,
+            'version': self._version,
+            'rebuilding': self._rebuilding,
+        }
+
+    def _sync(self) -> None:
+        if self._index is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+        with self._sync_lock:
+            if self._index is None:
+                # 首次请求触发后台构建，不阻塞请求；构建失败时下次请求重试
+                if not self._rebuilding:
+                    self._start_rebuild()
+                return
+            now = time.monotonic()
+            if now - self._checked_at < self.check_seconds or self._rebuilding:
+                return
+            self._checked_at = now
+            changes = list(
+                CatalogChange.objects.filter(id__gt=self._version)
+                .values_list('id', 'kind', 'object_id', 'deleted')[:self.incremental_limit + 1]
+            )
+            stale = now - self._built_at >= self.rebuild_seconds or self.needs_rebuild(self._index)
+            # 编号不连续说明有记录已被清理，增量无法保证完整
+            if (stale or len(changes) > self.incremental_limit or (changes and changes[0][0] != self._version + 1)
+                    or any(kind == 'all' for _, kind, _, _ in changes)):
+                self._start_rebuild()
+            elif changes:
+                self._apply(changes)
+
+    def _start_rebuild(self) -> None:
+        self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, name=f'{self.name}-rebuild', daemon=True).start()
+
+    def _rebuild(self) -> None:
+        # 先取版本号再读数据：读取期间的变更会在下次同步时重复应用（幂等）
+        version = CatalogChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        index = self.build()
+        self._index, self._version = index, version
+        self._built_at = self._checked_at = time.monotonic()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self._rebuild()
+        except Exception as e:
+            print(f"{self.name} 重建失败: {e}")
+        finally:
+            self._rebuilding = False
+            connections.close_all()
+
+    def _apply(self, changes: List[Tuple[int, str, int, bool]]) -> None:
+        song_ids = {object_id for _, kind, object_id, _ in changes if kind == 'song'}
+        album_ids = {object_id for _, kind, object_id, _ in changes if kind == 'album'}
+        self.apply(self._index, song_ids, album_ids)
+        self._version = changes[-1][0]
+
+
+def record_catalog_change(kind: str, object_id: int = 0, deleted: bool = False, using: str = 'default') -> None:
+    change = CatalogChange.objects.using(using).create(kind=kind, object_id=object_id, deleted=deleted)
+    if change.pk % 1000 == 0:
+        CatalogChange.objects.using(using).filter(created_at__lt=timezone.now() - CHANGE_RETENTION).delete()
+
+
+def catalog_version(using: str = 'default') -> int:
+    return CatalogChange.objects.using(using).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+@receiver(post_save, sender=Song)
+def song_saved(sender, instance: Song, using: str = 'default', raw: bool = False, **kwargs):
+    if not raw:
+        record_catalog_change('song', instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Song)
+def song_deleted(sender, instance: Song, using: str = 'default', **kwargs):
+    record_catalog_change('song', instance.pk, deleted=True, using=using)
+
+
+@receiver(post_save, sender=Album)
+def album_saved(sender, instance: Album, using: str = 'default', raw: bool = False, **kwargs):
+    if not raw:
+        record_catalog_change('album', instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Album)
+def album_deleted(sender, instance: Album, using: str = 'default', **kwargs):
+    record_catalog_change('album', instance.pk, deleted=True, using=using)
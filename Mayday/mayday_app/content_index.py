@@ -0,0 +1,201 @@
+"""
+内容全文索引 - 言论、巡回演出、演出场地、图片共用一个 SQLite FTS5 表
+rowid = 对象 id × KIND_SLOTS + 类型编号，kind 列存类型名，可在 MATCH 中按类型过滤；
+各类型命中数由同一个 MATCH 上的 GROUP BY kind 得到，不再对每个模型分别 COUNT。
+每次写入递增 ContentVersion（与歌曲的 CatalogChange 同理），内容搜索的结果快照按此版本号缓存和翻页。
+中文切分与歌曲索引相同（见 search_index.segment）。模型保存、删除时由信号同步。
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import DatabaseError, connections
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lyrics_index import highlight
+from .models import ContentVersion, Image, Quote, Tour, TourVenue
+from .search_index import build_match_query, segment
+
+CONTENT_FTS_TABLE = 'mayday_app_content_fts'
+CONTENT_FTS_COLUMNS = ('kind', 'title', 'body')
+# bm25 列权重：类型列只用于过滤
+BM25_WEIGHTS = (0.0, 4.0, 1.0)
+
+# 类型名 → (编号, 模型)；编号写入 rowid 的低位
+CONTENT_KINDS = {
+    'quote': (1, Quote),
+    'tour': (2, Tour),
+    'venue': (3, TourVenue),
+    'image': (4, Image),
+}
+KIND_SLOTS = 8
+
+_KIND_BY_CODE = {code: kind for kind, (code, _) in CONTENT_KINDS.items()}
+_KIND_BY_MODEL = {model: kind for kind, (_, model) in CONTENT_KINDS.items()}
+# 已确认建好索引表的数据库（表由迁移 0019 创建；尚未建表时每次重新检查）
+_table_ready: Dict[str, bool] = {}
+
+
+def content_document(kind: str, obj) -> Tuple[str, str]:
+    """(标题, 正文) 原文；显示结果时也用于生成高亮片段"""
+    if kind == 'quote':
+        return ' '.join(p for p in (obj.author, obj.source) if p), obj.text
+    if kind == 'tour':
+        return obj.name, obj.description
+    if kind == 'venue':
+        return obj.name, obj.city
+    return obj.title, obj.caption
+
+
+def excerpt(text: str, query: str, width: int = 80) -> str:
+    """截取第一个命中词附近的 width 个字符并高亮"""
+    text = ' '.join((text or '').split())
+    lowered = text.lower()
+    positions = [i for i in (lowered.find(t.lower()) for t in (query or '').split()) if i >= 0]
+    start = max(min(positions, default=0) - width // 4, 0)
+    piece = text[start:start + width]
+    return ('…' if start else '') + highlight(piece, query) + ('…' if start + width < len(text) else '')
+
+
+def document_excerpt(title: str, body: str, query: str, width: int = 80) -> str:
+    """从包含查询词的字段截取片段：正文优先，只有标题命中时（如场地名）用标题"""
+    terms = [t.lower() for t in (query or '').split()]
+    for text in (body, title):
+        lowered = (text or '').lower()
+        if any(t in lowered for t in terms):
+            return excerpt(text, query, width)
+    return excerpt(body or title, query, width)
+
+
+def content_rowid(kind: str, object_id: int) -> int:
+    return object_id * KIND_SLOTS + CONTENT_KINDS[kind][0]
+
+
+def split_rowid(rowid: int) -> Tuple[str, int]:
+    object_id, code = divmod(rowid, KIND_SLOTS)
+    return _KIND_BY_CODE[code], object_id
+
+
+def content_table_ready(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    if not _table_ready.get(connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [CONTENT_FTS_TABLE])
+            _table_ready[connection.alias] = cursor.fetchone() is not None
+    return _table_ready[connection.alias]
+
+
+def bump_content_version(using: str = 'default') -> None:
+    if not ContentVersion.objects.using(using).filter(pk=1).update(version=F('version') + 1):
+        ContentVersion.objects.using(using).get_or_create(pk=1, defaults={'version': 1})
+
+
+def content_version(using: str = 'default') -> int:
+    return ContentVersion.objects.using(using).filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def index_content_rows(cursor, kind: str, objects: Iterable) -> int:
+    """写入 / 覆盖某一类型对象的索引行"""
+    count = 0
+    for obj in objects:
+        rowid = content_rowid(kind, obj.pk)
+        title, body = content_document(kind, obj)
+        cursor.execute(f'DELETE FROM {CONTENT_FTS_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f"INSERT INTO {CONTENT_FTS_TABLE} (rowid, {', '.join(CONTENT_FTS_COLUMNS)}) VALUES (%s, %s, %s, %s)",
+            [rowid, kind, segment(title), segment(body)],
+        )
+        count += 1
+    return count
+
+
+def reindex_content(kind: str, objects: Iterable, using: str = 'default') -> int:
+    connection = connections[using]
+    if not content_table_ready(connection):
+        return 0
+    with connection.cursor() as cursor:
+        return index_content_rows(cursor, kind, objects)
+
+
+def remove_content(kind: str, object_ids: Iterable[int], using: str = 'default') -> None:
+    connection = connections[using]
+    if not content_table_ready(connection):
+        return
+    with connection.cursor() as cursor:
+        for object_id in object_ids:
+            cursor.execute(f'DELETE FROM {CONTENT_FTS_TABLE} WHERE rowid = %s', [content_rowid(kind, object_id)])
+
+
+def rebuild_content_index(using: str = 'default') -> int:
+    """清空后全量重建（直接改库之后执行）"""
+    connection = connections[using]
+    if not content_table_ready(connection):
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {CONTENT_FTS_TABLE}')
+        for kind, (_, model) in CONTENT_KINDS.items():
+            count += index_content_rows(cursor, kind, model.objects.using(using).iterator(chunk_size=500))
+    bump_content_version(using)
+    return count
+
+
+def content_match_query(query: str, kind: str = '') -> str:
+    """只在标题、正文中匹配；指定类型时再加 kind 列过滤"""
+    match = build_match_query(query)
+    if not match:
+        return ''
+    match = f'{{title body}} : ({match})'
+    return f'kind : {kind} AND {match}' if kind else match
+
+
+def search_content(query: str, kind: str = '', limit: int = 500,
+                   using: str = 'default') -> Optional[Tuple[List[Tuple[str, int, float]], Dict[str, int]]]:
+    """返回 ([(类型, 对象 id, bm25)], {类型: 命中数})；结果按 (bm25, rowid) 排序，最多 limit 条，
+    调用方整体存为快照后按位置翻页。类型计数不受 kind 过滤影响。索引不可用时返回 None"""
+    connection = connections[using]
+    match = content_match_query(query)
+    try:
+        if not content_table_ready(connection):
+            return None
+        if not match:
+            return [], {}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT kind, count(*) FROM {CONTENT_FTS_TABLE} WHERE {CONTENT_FTS_TABLE} MATCH %s GROUP BY kind',
+                [match],
+            )
+            facets = dict(cursor.fetchall())
+            sql = (
+                f"SELECT rowid, score FROM (SELECT rowid, bm25({CONTENT_FTS_TABLE}, "
+                f"{', '.join(str(w) for w in BM25_WEIGHTS)}) AS score FROM {CONTENT_FTS_TABLE} "
+                f"WHERE {CONTENT_FTS_TABLE} MATCH %s)"
+            )
+            cursor.execute(sql + ' ORDER BY score, rowid LIMIT %s', [content_match_query(query, kind), limit])
+            hits = [(*split_rowid(rowid), score) for rowid, score in cursor.fetchall()]
+        return hits, facets
+    except DatabaseError as e:
+        print(f"内容检索失败: {e}")
+        return None
+
+
+@receiver(post_save, sender=Quote)
+@receiver(post_save, sender=Tour)
+@receiver(post_save, sender=TourVenue)
+@receiver(post_save, sender=Image)
+def index_saved_content(sender, instance, using: str = 'default', raw: bool = False, **kwargs):
+    if not raw:
+        reindex_content(_KIND_BY_MODEL[sender], [instance], using=using)
+        bump_content_version(using)
+
+
+@receiver(post_delete, sender=Quote)
+@receiver(post_delete, sender=Tour)
+@receiver(post_delete, sender=TourVenue)
+@receiver(post_delete, sender=Image)
+def unindex_deleted_content(sender, instance, using: str = 'default', **kwargs):
+    remove_content(_KIND_BY_MODEL[sender], [instance.pk], using=using)
+    bump_content_version(using)
@@ -0,0 +1,53 @@
+"""
+数据库路由 - 高频写入的遥测数据使用独立的 SQLite 文件
+播放记录、流量计量等模型（settings.TELEMETRY_MODELS）读写都路由到 telemetry 库，
+与曲库 / 用户数据的写入互不争用锁。未配置 telemetry 库时全部留在 default。
+遥测模型指向曲库的外键不建数据库约束（跨库），也不参与级联删除。
+"""
+from __future__ import annotations
+
+from django.conf import settings
+
+TELEMETRY_DB = 'telemetry'
+
+
+def telemetry_enabled() -> bool:
+    return TELEMETRY_DB in settings.DATABASES
+
+
+def is_telemetry_model(model) -> bool:
+    labels = {label.lower() for label in getattr(settings, 'TELEMETRY_MODELS', ())}
+    return model._meta.label_lower in labels
+
+
+class TelemetryRouter:
+    """遥测模型 → telemetry 库；其它模型 → default 库"""
+
+    def db_for_read(self, model, **hints):
+        if not telemetry_enabled():
+            return None
+        # 显式返回 default：从遥测记录访问 song / user 时不能沿用实例所在的库
+        return TELEMETRY_DB if is_telemetry_model(model) else 'default'
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 遥测记录可以引用曲库中的歌曲和用户（外键无数据库约束）
+        if is_telemetry_model(type(obj1)) or is_telemetry_model(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not telemetry_enabled():
+            return None
+        if model_name is None:
+            # RunPython / RunSQL 等只在 default 库执行
+            return db == 'default'
+        from django.apps import apps
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            return db == 'default'
+        return db == (TELEMETRY_DB if is_telemetry_model(model) else 'default')
+
@@ -0,0 +1,197 @@
+"""
+模糊搜索 - 字符 n-gram 倒排索引
+标题、歌手切成 n-gram：汉字按拼音音节折叠（简繁体、同音错字得到相同的音节），取音节单字与相邻两字组合，
+另加汉字本身（字形一致的得分更高）；英文 / 数字去掉重音后取单词首尾补位的字符二元组。
+倒排表是按文档序号递增的 array('I')；修改 = 标记删除旧文档 + 追加新文档，删除过多时全量重建。
+查询从最短的倒排表开始合并，候选数有上限，高频 n-gram 只给已有候选加分（集合求交）；
+得分为查询 n-gram 的命中比例，相同时按 Dice 系数（较短的标题优先），取前 k 个。
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from pypinyin import lazy_pinyin
+
+from .catalog_sync import CatalogSyncedIndex
+from .models import Song
+
+# 命中比例低于 MIN_SCORE 的结果丢弃；候选数达到 MAX_CANDIDATES 后不再引入新候选
+MIN_SCORE = 0.5
+MAX_CANDIDATES = 2000
+# 出现在超过该比例文档中的 n-gram 视为高频
+COMMON_GRAM_RATIO = 0.02
+# 删除标记超过该比例时全量重建
+MAX_DEAD_RATIO = 0.3
+
+_HAN_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿]+)')
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def _fold(text: str) -> str:
+    """小写、全角转半角、去掉重音符号（Café → cafe）"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=32768)
+def _syllable(ch: str) -> str:
+    # 逐字取默认读音：查询与标题用同一规则，多音字也能对上
+    return lazy_pinyin(ch)[0]
+
+
+def text_grams(text: str) -> Set[str]:
+    grams = set()
+    for i, chunk in enumerate(_HAN_RE.split(_fold(text))):
+        if i % 2:
+            syllables = [_syllable(ch) for ch in chunk]
+            grams.update('h' + ch for ch in chunk)
+            grams.update('p' + s for s in syllables)
+            grams.update(f'b{a} {b}' for a, b in zip(syllables, syllables[1:]))
+            continue
+        for word in _WORD_RE.findall(chunk):
+            padded = f'^{word}$'
+            grams.update('w' + padded[j:j + 2] for j in range(len(padded) - 1))
+    return grams
+
+
+class FuzzyIndex:
+    """文档 = 一首歌曲；title / artist 的 n-gram 分别建倒排表（键前缀 t / a）"""
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        self._doc_song = array('q')
+        self._doc_sizes = array('H')  # 每个文档两项：标题、歌手的 n-gram 数
+        self._alive = bytearray()
+        self._song_doc: Dict[int, int] = {}
+        self._dead = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._song_doc)
+
+    @property
+    def dead_ratio(self) -> float:
+        return self._dead / len(self._doc_song) if self._doc_song else 0.0
+
+    def put(self, song_id: int, title: str, artist: str) -> None:
+        title_grams, artist_grams = text_grams(title), text_grams(artist)
+        with self._lock:
+            self._remove(song_id)
+            doc = len(self._doc_song)
+            for field, grams in (('t', title_grams), ('a', artist_grams)):
+                for gram in grams:
+                    posting = self._postings.get(field + gram)
+                    if posting is None:
+                        posting = self._postings[field + gram] = array('I')
+                    posting.append(doc)
+            self._doc_song.append(song_id)
+            self._doc_sizes.append(min(len(title_grams), 0xffff))
+            self._doc_sizes.append(min(len(artist_grams), 0xffff))
+            self._alive.append(1)
+            self._song_doc[song_id] = doc
+
+    def remove(self, song_id: int) -> None:
+        with self._lock:
+            self._remove(song_id)
+
+    def _remove(self, song_id: int) -> None:
+        doc = self._song_doc.pop(song_id, None)
+        if doc is not None:
+            self._alive[doc] = 0
+            self._dead += 1
+
+    def search(self, query: str, limit: int = 50, min_score: float = MIN_SCORE) -> List[Tuple[int, float]]:
+        """返回 [(歌曲 id, 得分)]，标题、歌手分别计分取较高者"""
+        grams = text_grams(query)
+        if not grams:
+            return []
+        with self._lock:
+            postings = [
+                (field, posting) for gram in grams for field in 'ta'
+                if (posting := self._postings.get(field + gram))
+            ]
+            postings.sort(key=lambda item: len(item[1]))
+            common = max(len(self._doc_song) * COMMON_GRAM_RATIO, 1000)
+            hits = {'t': {}, 'a': {}}
+            candidates: Set[int] = set()
+            for field, posting in postings:
+                counts = hits[field]
+                if not candidates or (len(posting) <= common and len(candidates) < MAX_CANDIDATES):
+                    other = hits['a' if field == 't' else 't']
+                    for doc in posting:
+                        if doc not in counts:
+                            if doc not in other:
+                                if len(candidates) >= MAX_CANDIDATES:
+                                    break
+                                candidates.add(doc)
+                            counts[doc] = 0
+                        counts[doc] += 1
+                    continue
+                # 高频 n-gram 不引入新候选，只给倒排表中已有的候选计数
+                for doc in candidates.intersection(posting):
+                    counts[doc] = counts.get(doc, 0) + 1
+            total = len(grams)
+            title_hits, artist_hits, sizes = hits['t'], hits['a'], self._doc_sizes
+            scored = []
+            for doc in candidates:
+                if not self._alive[doc]:
+                    continue
+                matched = title_hits.get(doc, 0)
+                best = (matched / total, 2 * matched / (total + sizes[2 * doc]))
+                matched = artist_hits.get(doc, 0)
+                best = max(best, (matched / total, 2 * matched / (total + sizes[2 * doc + 1])))
+                if best[0] >= min_score:
+                    scored.append((best, -doc))
+            top = heapq.nlargest(limit, scored)
+            return [(self._doc_song[-doc], round(score[0], 3)) for score, doc in top]
+
+
+def build_fuzzy_index(rows: Iterable[Tuple[int, str, str]] = None) -> FuzzyIndex:
+    """从 (id, title, artist) 构建；默认读取全部歌曲"""
+    if rows is None:
+        rows = Song.objects.order_by('id').values_list('id', 'title', 'artist').iterator(chunk_size=2000)
+    index = FuzzyIndex()
+    for song_id, title, artist in rows:
+        index.put(song_id, title, artist)
+    return index
+
+
+class FuzzySearcher(CatalogSyncedIndex):
+    """持有当前模糊索引，按曲库版本号增量同步"""
+
+    name = 'fuzzy'
+
+    def build(self) -> FuzzyIndex:
+        return build_fuzzy_index()
+
+    def apply(self, index: FuzzyIndex, song_ids, album_ids) -> None:
+        # 专辑信息不参与模糊匹配
+        songs = {row[0]: row for row in Song.objects.filter(id__in=song_ids).values_list('id', 'title', 'artist')}
+        for song_id in song_ids:
+            if song_id in songs:
+                index.put(*songs[song_id])
+            else:
+                index.remove(song_id)
+
+    def needs_rebuild(self, index: FuzzyIndex) -> bool:
+        return index.dead_ratio > MAX_DEAD_RATIO
+
+    def search(self, query: str, limit: int = 50) -> Optional[List[Tuple[int, float]]]:
+        """索引首次构建完成前返回 None"""
+        index = self.current()
+        return index.search(query, limit) if index is not None else None
+
+
+# 同步节奏与搜索建议相同
+fuzzy_searcher = FuzzySearcher(
+    check_seconds=getattr(settings, 'SUGGEST_CHECK_SECONDS', 2),
+    rebuild_seconds=getattr(settings, 'SUGGEST_REBUILD_SECONDS', 3600),
+    incremental_limit=getattr(settings, 'SUGGEST_INCREMENTAL_LIMIT', 2000),
+)
@@ -0,0 +1,113 @@
+"""
+音频文件头缓存 - 进程内按字节数限额的 LRU
+外置硬盘休眠时，首个音频块的冷读取决定了起播延迟。
+播放时缓存每首歌开头 N KB，落在文件头内的 Range 请求直接由内存返回。
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from django.conf import settings
+
+
+class AudioHeadCache:
+    """文件头 LRU：以 (路径) 为键，按 size/mtime 校验，命中时移到队尾"""
+
+    def __init__(self, max_bytes: int, head_bytes: int):
+        self.max_bytes = max_bytes
+        self.head_bytes = head_bytes
+        self._entries: OrderedDict[str, Tuple[int, int, bytes]] = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.head_bytes > 0
+
+    def get(self, file_path: Union[str, Path], size: int, mtime_ns: int) -> Optional[bytes]:
+        """返回缓存的文件头；文件已变化时视为未命中并丢弃旧条目"""
+        key = str(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+
+    def put(self, file_path: Union[str, Path], size: int, mtime_ns: int, head: bytes) -> None:
+        if not self.enabled or len(head) > self.max_bytes:
+            return
+        key = str(file_path)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (size, mtime_ns, head)
+            self._current_bytes += len(head)
+            while self._current_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+
+    def load(self, file_path: Union[str, Path], size: int, mtime_ns: int) -> bytes:
+        """从磁盘读取文件头并放入缓存"""
+        with open(file_path, 'rb') as f:
+            head = f.read(self.head_bytes)
+        self.put(file_path, size, mtime_ns, head)
+        return head
+
+    def lookup(self, file_path: Union[str, Path], size: int, mtime_ns: int) -> bytes:
+        """播放入口：命中直接返回，未命中则读盘填充"""
+        head = self.get(file_path, size, mtime_ns)
+        if head is None:
+            head = self.load(file_path, size, mtime_ns)
+        return head
+
+    def preload(self, file_path: Union[str, Path], size: int, mtime_ns: int) -> None:
+        """预读时填充缓存，不计入命中统计"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(str(file_path))
+            if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+                return
+        self.load(file_path, size, mtime_ns)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'head_bytes': self.head_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= len(entry[2])
+
+
+# 全局文件头缓存实例
+audio_head_cache = AudioHeadCache(
+    max_bytes=int(getattr(settings, 'AUDIO_HEAD_CACHE_BYTES', 64 * 1024 * 1024)),
+    head_bytes=int(getattr(settings, 'AUDIO_HEAD_CACHE_HEAD_KB', 512)) * 1024,
+)
@@ -0,0 +1,90 @@
+"""
+HLS 分段输出 - MP3 / AAC(ADTS) 不转码直接切片
+利用扫描时生成的定位索引（seek_index）在帧边界上划分片段，
+片段即原文件的一段字节区间（packed audio），前面加一个携带时间戳的 ID3 标签。
+不落临时文件，片段本身支持 Range 请求并可长期缓存。
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from .seek_index import unpack_seek_table
+
+HLS_FORMATS = {'.mp3', '.aac'}
+
+# HLS packed audio 规定的时间戳 PRIV 帧所有者
+_TIMESTAMP_OWNER = b'com.apple.streaming.transportStreamTimestamp\x00'
+
+
+def hls_segment_seconds() -> int:
+    return max(int(getattr(settings, 'HLS_SEGMENT_SECONDS', 10)), 1)
+
+
+class SegmentPlan:
+    """按定位索引把文件划分为约 segment_seconds 秒的片段"""
+
+    def __init__(self, offsets_blob: bytes, interval: float, file_size: int,
+                 segment_seconds: int, duration: Optional[float] = None):
+        self.offsets, self.times = unpack_seek_table(offsets_blob)
+        self.interval = interval
+        self.file_size = file_size
+        # 每个片段包含的索引项数（至少 1 项）
+        self.step = max(int(round(segment_seconds / interval)), 1)
+        self.duration = duration if duration else len(self.offsets) * interval
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.offsets) / self.step)
+
+    def bounds(self, segment: int) -> Tuple[int, int]:
+        """片段的字节区间 [start, end)"""
+        first = segment * self.step
+        start = self.offsets[first]
+        nxt = first + self.step
+        end = self.offsets[nxt] if nxt < len(self.offsets) else self.file_size
+        return start, end
+
+    def start_time(self, segment: int) -> float:
+        """片段首帧的真实起始时间"""
+        return self.times[segment * self.step] / 1000000
+
+    def durations(self) -> List[float]:
+        """各片段时长：按相邻片段首帧的真实时间相减，与片段 ID3 时间戳一致；最后一段到歌曲结束"""
+        count = len(self)
+        starts = [self.start_time(n) for n in range(count)]
+        result = [nxt - start for start, nxt in zip(starts, starts[1:])]
+        if count:
+            result.append(max(self.duration - starts[-1], 0.001))
+        return result
+
+
+def build_playlist(plan: SegmentPlan, segment_url: str) -> str:
+    """生成 VOD 媒体播放列表；segment_url 含 {n} 占位符"""
+    durations = plan.durations()
+    target = math.ceil(max(durations)) if durations else hls_segment_seconds()
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f'#EXT-X-TARGETDURATION:{target}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+    ]
+    for n, seconds in enumerate(durations):
+        lines.append(f'#EXTINF:{seconds:.3f},')
+        lines.append(segment_url.format(n=n))
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+
+def _synchsafe(value: int) -> bytes:
+    return bytes(((value >> shift) & 0x7F) for shift in (21, 14, 7, 0))
+
+
+def timestamp_id3(seconds: float) -> bytes:
+    """片段开头的 ID3v2.4 标签：PRIV 帧携带 90kHz 的 33 位时间戳"""
+    pts = int(round(seconds * 90000)) & 0x1FFFFFFFF
+    payload = _TIMESTAMP_OWNER + pts.to_bytes(8, 'big')
+    frame = b'PRIV' + _synchsafe(len(payload)) + b'\x00\x00' + payload
+    return b'ID3\x04\x00\x00' + _synchsafe(len(frame)) + frame
@@ -0,0 +1,84 @@
+"""
+LRC 歌词时间轴 - 服务端解析一次，前端不再逐首解析 LRC 文本
+结果是两个等长数组：times（毫秒，非递减）与 lines，前端按播放时间二分查找当前行。
+一行多个时间标签（副歌复用）展开为多条，[offset:] 标签已计入时间，增强 LRC 的 <mm:ss.xx> 逐字标签去掉；
+没有时间标签的纯文本歌词按每行 2 秒排布（与原前端解析一致）。
+解析结果按 (歌曲 id, 歌词 SHA-1) 放在 Django 缓存中，歌词不变就不再解析，SHA-1 同时用作 ETag。
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+
+# 纯文本歌词每行的间隔（毫秒）
+PLAIN_LINE_MS = 2000
+CACHE_TIMEOUT = 24 * 3600
+
+# [mm:ss]、[mm:ss.xx]、[mm:ss.xxx]、[mm:ss:xx]
+_TIME_RE = re.compile(r'\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]')
+# [ar:五月天]、[offset:+500] 等标记行
+_META_RE = re.compile(r'^\[([A-Za-z#]+):([^\]]*)\]$')
+# 增强 LRC 的逐字时间 <00:12.34>
+_WORD_TIME_RE = re.compile(r'<\d+:\d{1,2}(?:[.:]\d{1,3})?>')
+
+
+def lyrics_digest(lyrics: str) -> str:
+    return hashlib.sha1((lyrics or '').encode('utf-8')).hexdigest()
+
+
+def parse_lrc(lyrics: str) -> Dict[str, object]:
+    """返回 {'synced': 是否带时间标签, 'times': [毫秒], 'lines': [文本]}，按时间稳定排序"""
+    entries: List[Tuple[int, str]] = []
+    offset = 0
+    synced = False
+    for raw in (lyrics or '').splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        meta = _META_RE.match(line)
+        if meta:
+            if meta.group(1).lower() == 'offset':
+                try:
+                    offset = int(meta.group(2).strip())
+                except ValueError:
+                    pass
+            continue
+        times = [
+            int(minutes) * 60000 + int(seconds) * 1000 + int((fraction or '0').ljust(3, '0'))
+            for minutes, seconds, fraction in _TIME_RE.findall(line)
+        ]
+        text = _WORD_TIME_RE.sub('', _TIME_RE.sub('', line)).strip()
+        if not text:
+            continue
+        if times:
+            synced = True
+            entries.extend((t, text) for t in times)
+        elif synced:
+            # LRC 中夹着的无时间行，沿用上一行的时间
+            entries.append((entries[-1][0], text))
+        else:
+            entries.append((-1, text))
+    if not synced:
+        entries = [(i * PLAIN_LINE_MS, text) for i, (_, text) in enumerate(entries)]
+    else:
+        # 时间标签出现之前的无时间行放在开头；正的 offset 表示歌词提前显示
+        entries = [(max((t if t >= 0 else 0) - offset, 0), text) for t, text in entries]
+        entries.sort(key=lambda e: e[0])
+    return {
+        'synced': synced,
+        'times': [t for t, _ in entries],
+        'lines': [text for _, text in entries],
+    }
+
+
+def lyrics_timeline(song_id: int, lyrics: str, digest: str = '') -> Dict[str, object]:
+    """同一首歌歌词不变时直接取缓存；digest 为 lyrics_digest(lyrics)，已算过时传入"""
+    key = f'lrc-timeline:{song_id}:{digest or lyrics_digest(lyrics)}'
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = parse_lrc(lyrics)
+        cache.set(key, timeline, CACHE_TIMEOUT)
+    return timeline
@@ -0,0 +1,304 @@
+"""
+歌词文件索引 - SongViewSet.lyrics_file 不再每次遍历歌词目录
+启动后首次请求时扫描一次目录，把规范化后的文件名（不含扩展名）建成有序数组：
+- 完全相同：二分查找文件名数组；
+- 文件名包含歌名：文件名所有后缀组成的有序数组中，以歌名为前缀的区间；
+- 歌名包含文件名：歌名的各个子串逐一查表。
+每隔几秒检查一次各级目录的 mtime（增删、改名文件都会改变所在目录的 mtime），有变化才重建。
+每首歌匹配到的文件及其内容放在按条目数限额的 LRU 中，目录变化时整体失效。
+import_lyrics() 把匹配到的文件一次性转成 UTF-8 写入 Song.lyrics，并在 SongLyricsSource 中记下
+识别出的编码和文件指纹（大小 + mtime + SHA-1），之后只有指纹变化的文件才会重新导入。
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Song, SongLyricsSource
+
+LYRIC_EXTENSIONS = {'.txt', '.lrc', '.lyric', '.lyrics'}
+# 没有 BOM 且不是合法 UTF-8 时依次尝试的编码（gb18030 兼容 gbk / gb2312），按中文合理性打分取最高
+CJK_ENCODINGS = ('gb18030', 'big5')
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# 沿用上次识别出的编码所需的最低合理性得分
+HINT_MIN_SCORE = 0.5
+
+_NOT_FOUND = (None, None)
+
+
+def normalize_stem(text: str) -> str:
+    """去除空格、标点符号，转换为小写"""
+    return re.sub(r'[^\w]', '', (text or '').lower())
+
+
+@lru_cache(maxsize=65536)
+def _common_han(ch: str) -> bool:
+    """GB2312 一级字或 Big5 常用字；用错编码解出来的多是生僻字"""
+    try:
+        if 0xB0 <= ch.encode('gb2312')[0] <= 0xD7:
+            return True
+    except UnicodeEncodeError:
+        pass
+    try:
+        return 0xA4 <= ch.encode('big5')[0] <= 0xC6
+    except UnicodeEncodeError:
+        return False
+
+
+def cjk_plausibility(text: str) -> float:
+    """中文文本的合理性得分：汉字中常用字的比例，控制字符、私用区、未分配码位每个扣 3 分；不含汉字时只扣分"""
+    han = common = bad = 0
+    for ch in text:
+        if '\u4e00' <= ch <= '\u9fff' or '\u3400' <= ch <= '\u4dbf':
+            han += 1
+            common += _common_han(ch)
+            continue
+        category = unicodedata.category(ch)
+        if category in ('Co', 'Cn', 'Cs') or (category == 'Cc' and ch not in '\t\n\r'):
+            bad += 1
+    return (common - 3 * bad) / han if han else -bad
+
+
+def detect_encoding(data: bytes, hint: str = '') -> Tuple[str, str]:
+    """返回 (编码, 文本)：BOM > 严格 UTF-8 > 上次的编码（hint）> 中文编码中得分最高者 > latin-1"""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            try:
+                return encoding, data.decode(encoding).lstrip('\ufeff')
+            except UnicodeDecodeError:
+                break
+    try:
+        return 'utf-8', data.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+    candidates = []
+    for encoding in ((hint,) if hint else ()) + CJK_ENCODINGS:
+        try:
+            text = data.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        score = cjk_plausibility(text)
+        if encoding == hint and score >= HINT_MIN_SCORE:
+            return encoding, text
+        candidates.append((score, encoding, text))
+    if candidates:
+        score, encoding, text = max(candidates, key=lambda c: c[0])
+        if score > 0:
+            return encoding, text
+    return 'latin-1', data.decode('latin-1')
+
+
+def decode_lyrics(data: bytes) -> str:
+    return detect_encoding(data)[1].strip()
+
+
+class LyricsFileIndex:
+    """规范化文件名 → 歌词文件；match() 按 完全相同 > 文件名包含歌名 > 歌名包含文件名 的顺序返回"""
+
+    def __init__(self, directory: str, check_seconds: float, max_entries: int):
+        self.directory = Path(directory)
+        self.check_seconds = check_seconds
+        self.max_entries = max_entries
+        # (有序去重的文件名, 文件名 → 文件（按路径排序）, 有序的 (后缀, 文件名))；重建时整体替换
+        self._snapshot: Tuple[List[str], Dict[str, List[Path]], List[Tuple[str, str]]] = ([], {}, [])
+        self._dir_mtimes: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._contents: OrderedDict[int, Tuple[str, Optional[str], Optional[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    # ---- 目录索引 ----
+
+    def _scan(self) -> Tuple[Dict[str, int], Dict[str, List[Path]]]:
+        dir_mtimes, files = {}, {}
+        for root, _, names in os.walk(self.directory):
+            dir_mtimes[root] = os.stat(root).st_mtime_ns
+            for name in names:
+                path = Path(root) / name
+                if path.suffix.lower() not in LYRIC_EXTENSIONS:
+                    continue
+                stem = normalize_stem(path.stem)
+                if stem:
+                    files.setdefault(stem, []).append(path)
+        return dir_mtimes, files
+
+    def _changed(self) -> bool:
+        if not self._dir_mtimes:
+            return True
+        try:
+            return any(os.stat(d).st_mtime_ns != mtime for d, mtime in self._dir_mtimes.items())
+        except OSError:
+            return True
+
+    def refresh(self, force: bool = False) -> None:
+        """距上次检查超过 check_seconds 时检查目录 mtime，有变化则重建"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_seconds:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.check_seconds:
+                return
+            self._checked_at = now
+            if not force and not self._changed():
+                return
+            dir_mtimes, files = self._scan() if self.directory.is_dir() else ({}, {})
+            for paths in files.values():
+                paths.sort()
+            suffixes = sorted((stem[i:], stem) for stem in files for i in range(len(stem)))
+            self._snapshot = (sorted(files), files, suffixes)
+            self._dir_mtimes = dir_mtimes
+            self._contents.clear()
+            self.builds += 1
+
+    def match(self, title: str) -> Optional[Path]:
+        key = normalize_stem(title)
+        if not key:
+            return None
+        stems, files, suffixes = self._snapshot
+        i = bisect_left(stems, key)
+        if i < len(stems) and stems[i] == key:
+            return files[key][0]
+        # 文件名包含歌名：歌名是某个后缀的前缀；取最短的文件名（最接近歌名）
+        lo = bisect_left(suffixes, (key,))
+        hi = bisect_left(suffixes, (key + '\U0010ffff',), lo)
+        if hi > lo:
+            stem = min((stem for _, stem in suffixes[lo:hi]), key=lambda s: (len(s), s))
+            return files[stem][0]
+        # 歌名包含文件名：取最长的文件名
+        for length in range(len(key) - 1, 0, -1):
+            found = sorted(key[i:i + length] for i in range(len(key) - length + 1) if key[i:i + length] in files)
+            if found:
+                return files[found[0]][0]
+        return None
+
+    # ---- 按歌曲缓存内容 ----
+
+    def lookup(self, song_id: int, title: str) -> Tuple[Optional[str], Optional[str]]:
+        """返回 (歌词内容, 文件路径)；未找到时为 (None, None)"""
+        self.refresh()
+        key = normalize_stem(title)
+        with self._lock:
+            entry = self._contents.get(song_id)
+            if entry is not None and entry[0] == key:
+                self._contents.move_to_end(song_id)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+        content, path = self._load(title)
+        with self._lock:
+            self._contents[song_id] = (key, content, path)
+            while len(self._contents) > self.max_entries:
+                self._contents.popitem(last=False)
+        return content, path
+
+    def _load(self, title: str) -> Tuple[Optional[str], Optional[str]]:
+        path = self.match(title)
+        if path is None:
+            return _NOT_FOUND
+        try:
+            content = decode_lyrics(path.read_bytes())
+        except OSError as e:
+            print(f"读取歌词文件失败 {path}: {e}")
+            return _NOT_FOUND
+        return (content, str(path)) if content else _NOT_FOUND
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'files': sum(len(paths) for paths in self._snapshot[1].values()),
+                'directories': len(self._dir_mtimes),
+                'cached_songs': len(self._contents),
+                'builds': self.builds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# 全局歌词文件索引实例
+lyrics_file_index = LyricsFileIndex(
+    directory=getattr(settings, 'LYRICS_DIRECTORY', r'C:\Lyrics'),
+    check_seconds=float(getattr(settings, 'LYRICS_INDEX_CHECK_SECONDS', 5)),
+    max_entries=int(getattr(settings, 'LYRICS_CACHE_ENTRIES', 2000)),
+)
+
+
+def import_lyrics(directory: Optional[str] = None, overwrite: bool = False, dry_run: bool = False,
+                  report: Optional[Callable[[Song, str, Optional[Path]], None]] = None) -> Dict[str, int]:
+    """按歌名为每首歌匹配歌词文件并以 UTF-8 写入 Song.lyrics，返回各状态的数量。
+    状态：imported 已导入 / unchanged 指纹未变 / skipped 已有手动录入的歌词 / not_found 无匹配文件 / failed 读取失败。
+    overwrite 为 False 时不覆盖非导入的歌词；导入过的歌曲在文件变化时总会更新"""
+    index = lyrics_file_index if directory is None else LyricsFileIndex(directory, check_seconds=0, max_entries=0)
+    index.refresh(force=True)
+    sources = {source.song_id: source for source in SongLyricsSource.objects.all()}
+    counts = dict.fromkeys(('imported', 'unchanged', 'skipped', 'not_found', 'failed'), 0)
+    for song in Song.objects.order_by('id').iterator(chunk_size=500):
+        path = index.match(song.title)
+        status = _import_song(song, path, sources.get(song.pk), overwrite, dry_run)
+        counts[status] += 1
+        if report:
+            report(song, status, path)
+    return counts
+
+
+def _import_song(song: Song, path: Optional[Path], source: Optional[SongLyricsSource],
+                 overwrite: bool, dry_run: bool) -> str:
+    if path is None:
+        return 'not_found'
+    same_file = source is not None and source.source_path == str(path)
+    try:
+        stat = path.stat()
+        if same_file and (source.file_size, source.file_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return 'unchanged'
+        data = path.read_bytes()
+    except OSError as e:
+        print(f"读取歌词文件失败 {path}: {e}")
+        return 'failed'
+    digest = hashlib.sha1(data).hexdigest()
+    if same_file and digest == source.content_sha1:
+        # 只是 mtime 变了（复制、touch），更新指纹即可
+        if not dry_run:
+            SongLyricsSource.objects.filter(pk=source.pk).update(file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns)
+        return 'unchanged'
+    if source is None and song.lyrics and not overwrite:
+        return 'skipped'
+    encoding, text = detect_encoding(data, hint=source.encoding if source else '')
+    text = text.strip()
+    if not text:
+        return 'failed'
+    if dry_run:
+        return 'imported'
+    with transaction.atomic():
+        if song.lyrics != text:
+            song.lyrics = text
+            song.save(update_fields=['lyrics', 'updated_at'])
+        SongLyricsSource.objects.update_or_create(song=song, defaults={
+            'source_path': str(path),
+            'encoding': encoding,
+            'file_size': stat.st_size,
+            'file_mtime_ns': stat.st_mtime_ns,
+            'content_sha1': digest,
+        })
+    return 'imported'
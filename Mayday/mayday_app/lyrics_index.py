@@ -0,0 +1,182 @@
+"""
+歌词全文索引 - SQLite FTS5，按行建索引
+每一行歌词是索引中的一行，rowid = 歌曲 id × LINE_SLOTS + 行号，命中行即“记得的那句”，
+删除 / 重建某首歌时按 rowid 区间操作。LRC 时间标签、[ar:] 等标记行不参与索引。
+中文切分默认与歌曲索引相同（每个汉字一个词，查询按短语匹配，相邻字必须连续），
+可通过 LYRICS_SEGMENTER 设置换成 bigram_segment（两字一词）或其它切分函数，换后需全量重建。
+Song 保存时歌词有变化才重新索引，load_lyrics.py 与扫描器写入歌词都经过这里。
+"""
+from __future__ import annotations
+
+import html
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Song
+from .search_index import build_match_query, segment
+
+LYRICS_FTS_TABLE = 'mayday_app_lyrics_fts'
+# 每首歌占用的 rowid 区间，超过的行不索引
+LINE_SLOTS = 10000
+
+_TAG_RE = re.compile(r'\[[^\]]*\]')
+_HAN_RUN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+_MISSING = object()
+
+# 已确认建好索引表的数据库（表由迁移 0018 创建；尚未建表时每次重新检查）
+_table_ready: Dict[str, bool] = {}
+
+
+def bigram_segment(text: str) -> str:
+    """可选的切分方式：连续汉字切成重叠的两字词（单个汉字保留），其余文本不变"""
+    def bigrams(match):
+        run = match.group()
+        if len(run) == 1:
+            return f' {run} '
+        return ' ' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + ' '
+    return ' '.join(_HAN_RUN_RE.sub(bigrams, text or '').split())
+
+
+def _segmenter() -> Callable[[str], str]:
+    path = getattr(settings, 'LYRICS_SEGMENTER', '')
+    return import_string(path) if path else segment
+
+
+def lyric_lines(lyrics: str) -> List[Tuple[int, str]]:
+    """[(行号, 去掉时间标签后的文本)]，行号为原文 splitlines() 的下标，空行和纯标记行跳过"""
+    lines = []
+    for line_number, raw in enumerate((lyrics or '').splitlines()[:LINE_SLOTS]):
+        text = _TAG_RE.sub('', raw).strip()
+        if text:
+            lines.append((line_number, text))
+    return lines
+
+
+def lyric_line(lyrics: str, line_number: int) -> str:
+    raw_lines = (lyrics or '').splitlines()
+    if not 0 <= line_number < len(raw_lines):
+        return ''
+    return _TAG_RE.sub('', raw_lines[line_number]).strip()
+
+
+def highlight(text: str, query: str) -> str:
+    """HTML 转义后用 <mark> 标出查询中的各个词（不区分大小写）"""
+    terms = sorted({t for t in (query or '').split() if t}, key=len, reverse=True)
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile('|'.join(re.escape(t) for t in terms), re.IGNORECASE)
+    parts, last = [], 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group())}</mark>')
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return ''.join(parts)
+
+
+def lyrics_table_ready(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    if not _table_ready.get(connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [LYRICS_FTS_TABLE])
+            _table_ready[connection.alias] = cursor.fetchone() is not None
+    return _table_ready[connection.alias]
+
+
+def index_lyrics_rows(cursor, rows: Iterable[Sequence]) -> int:
+    """写入 / 覆盖索引；rows 为 (song_id, lyrics)，返回写入的行数"""
+    split = _segmenter()
+    count = 0
+    for song_id, lyrics in rows:
+        base = song_id * LINE_SLOTS
+        cursor.execute(f'DELETE FROM {LYRICS_FTS_TABLE} WHERE rowid >= %s AND rowid < %s', [base, base + LINE_SLOTS])
+        lines = [(base + line_number, split(text)) for line_number, text in lyric_lines(lyrics)]
+        if lines:
+            cursor.executemany(f'INSERT INTO {LYRICS_FTS_TABLE} (rowid, line) VALUES (%s, %s)', lines)
+            count += len(lines)
+    return count
+
+
+def reindex_lyrics(queryset, using: str = 'default') -> int:
+    connection = connections[using]
+    if not lyrics_table_ready(connection):
+        return 0
+    rows = queryset.using(using).values_list('id', 'lyrics').iterator(chunk_size=500)
+    with connection.cursor() as cursor:
+        return index_lyrics_rows(cursor, rows)
+
+
+def remove_lyrics(song_ids: Iterable[int], using: str = 'default') -> None:
+    connection = connections[using]
+    if not lyrics_table_ready(connection):
+        return
+    with connection.cursor() as cursor:
+        for song_id in song_ids:
+            base = song_id * LINE_SLOTS
+            cursor.execute(f'DELETE FROM {LYRICS_FTS_TABLE} WHERE rowid >= %s AND rowid < %s', [base, base + LINE_SLOTS])
+
+
+def rebuild_lyrics_index(using: str = 'default') -> int:
+    """清空后全量重建（直接改库之后执行）"""
+    connection = connections[using]
+    if not lyrics_table_ready(connection):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {LYRICS_FTS_TABLE}')
+        rows = Song.objects.using(using).exclude(lyrics='').values_list('id', 'lyrics').iterator(chunk_size=500)
+        return index_lyrics_rows(cursor, rows)
+
+
+def search_lyric_lines(query: str, limit: int = 20, using: str = 'default') -> Optional[List[Tuple[int, int, float]]]:
+    """按相关度返回 [(歌曲 id, 行号, bm25)]，每首歌只取最相关的一行；索引不可用时返回 None"""
+    connection = connections[using]
+    match = build_match_query(query, _segmenter())
+    try:
+        if not lyrics_table_ready(connection):
+            return None
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            # 同一首歌的多行命中只保留最好的一行，多取一些行再按歌曲去重
+            cursor.execute(
+                f"SELECT rowid, bm25({LYRICS_FTS_TABLE}) AS score FROM {LYRICS_FTS_TABLE} "
+                f"WHERE {LYRICS_FTS_TABLE} MATCH %s ORDER BY score, rowid LIMIT %s",
+                [match, limit * 10],
+            )
+            best: Dict[int, Tuple[int, int, float]] = {}
+            for rowid, score in cursor.fetchall():
+                song_id, line_number = divmod(rowid, LINE_SLOTS)
+                best.setdefault(song_id, (song_id, line_number, score))
+                if len(best) >= limit:
+                    break
+            return list(best.values())
+    except DatabaseError as e:
+        print(f"歌词检索失败: {e}")
+        return None
+
+
+@receiver(post_save, sender=Song)
+def index_saved_lyrics(sender, instance: Song, using: str = 'default', created: bool = False, raw: bool = False,
+                       update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'lyrics' not in update_fields):
+        return
+    # 歌词没变（如只改了标题、播放统计）时不重写索引
+    previous = getattr(instance, '_loaded_lyrics', _MISSING)
+    instance._loaded_lyrics = instance.__dict__.get('lyrics')
+    if previous is not _MISSING and previous == instance._loaded_lyrics:
+        return
+    if created and not instance.lyrics:
+        return
+    reindex_lyrics(Song.objects.filter(pk=instance.pk), using=using)
+
+
+@receiver(post_delete, sender=Song)
+def unindex_deleted_lyrics(sender, instance: Song, using: str = 'default', **kwargs):
+    remove_lyrics([instance.pk], using=using)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0008_membershiporder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongSeekIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.FloatField(verbose_name='索引间隔（秒）')),
+                ('offsets', models.BinaryField(verbose_name='偏移表')),
+                ('file_size', models.BigIntegerField(verbose_name='文件大小')),
+                ('file_mtime_ns', models.BigIntegerField(verbose_name='文件修改时间')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('song', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='seek_index', to='mayday_app.song', verbose_name='歌曲')),
+            ],
+            options={
+                'verbose_name': '歌曲定位索引',
+                'verbose_name_plural': '歌曲定位索引',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0009_songseekindex'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_ip', models.CharField(blank=True, default='', max_length=45, verbose_name='IP')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('bytes_served', models.BigIntegerField(default=0, verbose_name='流量（字节）')),
+                ('stream_count', models.IntegerField(default=0, verbose_name='请求数')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stream_usage', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '播放流量',
+                'verbose_name_plural': '播放流量',
+                'ordering': ['-day', '-bytes_served'],
+                'indexes': [models.Index(fields=['day', 'user', 'client_ip'], name='mayday_app__day_08c016_idx')],
+            },
+        ),
+    ]
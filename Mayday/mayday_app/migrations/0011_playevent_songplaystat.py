@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0010_streamusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('play', '直接播放'), ('hls', '分段播放')], default='play', max_length=8, verbose_name='来源')),
+                ('played_at', models.DateTimeField(verbose_name='播放时间')),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='play_events', to='mayday_app.song', verbose_name='歌曲')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='play_events', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '播放记录',
+                'verbose_name_plural': '播放记录',
+                'ordering': ['-played_at'],
+                'indexes': [models.Index(fields=['user', 'played_at'], name='mayday_app__user_id_32f637_idx'), models.Index(fields=['song', 'played_at'], name='mayday_app__song_id_11bc7b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SongPlayStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('play_count', models.IntegerField(default=0, verbose_name='播放次数')),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='play_stats', to='mayday_app.song', verbose_name='歌曲')),
+            ],
+            options={
+                'verbose_name': '每日播放次数',
+                'verbose_name_plural': '每日播放次数',
+                'ordering': ['-day', '-play_count'],
+                'unique_together': {('song', 'day')},
+            },
+        ),
+    ]
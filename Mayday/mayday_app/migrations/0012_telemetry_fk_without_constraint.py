@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0011_playevent_songplaystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='playevent',
+            name='song',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='play_events', to='mayday_app.song', verbose_name='歌曲'),
+        ),
+        migrations.AlterField(
+            model_name='playevent',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='play_events', to=settings.AUTH_USER_MODEL, verbose_name='用户'),
+        ),
+        migrations.AlterField(
+            model_name='songplaystat',
+            name='song',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='play_stats', to='mayday_app.song', verbose_name='歌曲'),
+        ),
+        migrations.AlterField(
+            model_name='streamusage',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stream_usage', to=settings.AUTH_USER_MODEL, verbose_name='用户'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+import re
+
+from django.db import migrations
+
+# 以下与建表时的 mayday_app.search_index 一致，迁移不引用应用模块，以免其后续改动影响新库迁移
+FTS_TABLE = 'mayday_app_song_fts'
+CREATE_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, artist, album, pinyin, tokenize='unicode61 remove_diacritics 2')"
+)
+_CJK_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿぀-ヿ가-힯])')
+
+
+def segment(text):
+    """每个中日韩字符前后加空格，使 FTS5 分词后一个字一个词"""
+    return ' '.join(_CJK_RE.sub(r' \1 ', text or '').split())
+
+
+def pinyin_forms(*texts):
+    """逐字拼音、连写全拼、首字母"""
+    try:
+        from pypinyin import lazy_pinyin, Style
+    except ImportError:
+        return ''
+    forms = []
+    for text in texts:
+        if not text or not _CJK_RE.search(text):
+            continue
+        syllables = lazy_pinyin(text, style=Style.NORMAL, errors='ignore')
+        forms.extend([' '.join(syllables), ''.join(syllables), ''.join(s[0] for s in syllables)])
+    return ' '.join(f for f in forms if f).lower()
+
+
+def create_song_search_index(apps, schema_editor):
+    """创建 FTS5 索引表并写入现有歌曲（仅 SQLite）"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Song = apps.get_model('mayday_app', 'Song')
+    rows = Song.objects.using(connection.alias).values_list(
+        'id', 'title', 'artist', 'album__name', 'artist_pinyin'
+    ).iterator(chunk_size=2000)
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_FTS_SQL)
+        for song_id, title, artist, album_name, artist_pinyin in rows:
+            pinyin = ' '.join(p for p in (pinyin_forms(title, album_name or ''), (artist_pinyin or '').lower()) if p)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, artist, album, pinyin) VALUES (%s, %s, %s, %s, %s)',
+                [song_id, segment(title), segment(artist), segment(album_name or ''), pinyin],
+            )
+
+
+def drop_song_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0012_telemetry_fk_without_constraint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_song_search_index, drop_song_search_index),
+    ]
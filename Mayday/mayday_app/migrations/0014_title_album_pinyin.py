@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0013_song_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='name_initials',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='专辑名拼音首字母'),
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='name_pinyin',
+            field=models.CharField(blank=True, db_index=True, max_length=255, verbose_name='专辑名拼音'),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='title_initials',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='标题拼音首字母'),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='title_pinyin',
+            field=models.CharField(blank=True, db_index=True, max_length=255, verbose_name='标题拼音'),
+        ),
+    ]
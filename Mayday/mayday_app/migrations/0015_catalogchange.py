@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0014_title_album_pinyin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('song', '歌曲'), ('album', '专辑'), ('all', '全部')], max_length=8, verbose_name='类型')),
+                ('object_id', models.BigIntegerField(default=0, verbose_name='对象ID')),
+                ('deleted', models.BooleanField(default=False, verbose_name='已删除')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': '曲库变更',
+                'verbose_name_plural': '曲库变更',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def artist_pinyin(name):
+    """与建表时的 scanner._generate_pinyin_fields 一致（迁移不引用应用模块）"""
+    try:
+        from pypinyin import lazy_pinyin, Style
+    except ImportError:
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.NORMAL)) if name else ''
+
+
+def artist_identity_key(name):
+    """同一歌手不同写法（如简繁体）的身份键"""
+    pinyin = artist_pinyin(name)
+    return pinyin.lower() if pinyin else (name or '').strip().lower()
+
+
+def artist_initial(name, pinyin):
+    """目录首字母（A-Z，其它归为 #）"""
+    initial = pinyin[0].upper() if pinyin else (name[0].upper() if name else '')
+    return initial if initial.isascii() and initial.isalpha() else '#'
+
+
+def populate_artists(apps, schema_editor):
+    """按身份键归并现有歌曲的歌手，歌曲最多的写法作为规范名称，其余记为 aliases"""
+    Song = apps.get_model('mayday_app', 'Song')
+    Artist = apps.get_model('mayday_app', 'Artist')
+    db = schema_editor.connection.alias
+    
+    groups = {}
+    rows = Song.objects.using(db).exclude(artist='').values('artist').annotate(n=Count('id')).order_by('-n', 'artist')
+    for row in rows:
+        groups.setdefault(artist_identity_key(row['artist']), []).append(row['artist'])
+    
+    for identity_key, names in groups.items():
+        pinyin = artist_pinyin(names[0])
+        artist = Artist.objects.using(db).create(
+            name=names[0], identity_key=identity_key, pinyin=pinyin.lower(),
+            initial=artist_initial(names[0], pinyin), aliases=names[1:],
+        )
+        Song.objects.using(db).filter(artist__in=names).update(artist_ref=artist)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0015_catalogchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Artist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='名称')),
+                ('identity_key', models.CharField(max_length=255, unique=True, verbose_name='身份键')),
+                ('pinyin', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='拼音')),
+                ('initial', models.CharField(blank=True, db_index=True, max_length=1, verbose_name='首字母')),
+                ('aliases', models.JSONField(blank=True, default=list, verbose_name='其它写法')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '歌手',
+                'verbose_name_plural': '歌手',
+                'ordering': ['pinyin', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='artist_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='songs', to='mayday_app.artist', verbose_name='歌手（归并）'),
+        ),
+        migrations.RunPython(populate_artists, migrations.RunPython.noop),
+    ]
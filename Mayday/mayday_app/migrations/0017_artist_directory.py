@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def render_directory(entries):
+    """{歌手 id: [首字母, 名称]} → 接口数据；与建表时的 artist_directory.render_directory 一致（迁移不引用应用模块）"""
+    groups = {}
+    for initial, name in entries.values():
+        groups.setdefault(initial, []).append(name)
+    initials = sorted(k for k in groups if k != '#')
+    if '#' in groups:
+        initials.append('#')
+    return {
+        'artists_by_initial': {initial: sorted(groups[initial]) for initial in initials},
+        'initials': initials,
+        'total_artists': len(entries),
+    }
+
+
+def build_artist_directory(apps, schema_editor):
+    """统计歌手歌曲数并生成目录"""
+    Song = apps.get_model('mayday_app', 'Song')
+    Artist = apps.get_model('mayday_app', 'Artist')
+    ArtistDirectory = apps.get_model('mayday_app', 'ArtistDirectory')
+    db = schema_editor.connection.alias
+    
+    counts = dict(
+        Song.objects.using(db).filter(artist_ref__isnull=False).order_by()
+        .values_list('artist_ref_id').annotate(n=Count('id'))
+    )
+    entries = {}
+    for artist in Artist.objects.using(db).all():
+        count = counts.get(artist.pk, 0)
+        Artist.objects.using(db).filter(pk=artist.pk).update(song_count=count)
+        if count:
+            entries[str(artist.pk)] = [artist.initial or '#', artist.name]
+    ArtistDirectory.objects.using(db).create(pk=1, version=1, entries=entries, payload=render_directory(entries))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0016_artist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtistDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='版本')),
+                ('entries', models.JSONField(default=dict, verbose_name='条目')),
+                ('payload', models.JSONField(default=dict, verbose_name='接口数据')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '歌手目录',
+                'verbose_name_plural': '歌手目录',
+            },
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='song_count',
+            field=models.IntegerField(default=0, verbose_name='歌曲数'),
+        ),
+        migrations.RunPython(build_artist_directory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+import re
+
+from django.db import migrations
+
+# 以下与建表时的 mayday_app.lyrics_index 一致，迁移不引用应用模块，以免其后续改动影响新库迁移。
+# 按默认切分方式（每个汉字一个词）写入；设置了 LYRICS_SEGMENTER 时迁移后需执行 rebuild_lyrics_index()
+LYRICS_FTS_TABLE = 'mayday_app_lyrics_fts'
+LINE_SLOTS = 10000
+CREATE_LYRICS_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {LYRICS_FTS_TABLE} USING fts5("
+    f"line, tokenize='unicode61 remove_diacritics 2')"
+)
+_TAG_RE = re.compile(r'\[[^\]]*\]')
+_CJK_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿぀-ヿ가-힯])')
+
+
+def segment(text):
+    return ' '.join(_CJK_RE.sub(r' \1 ', text or '').split())
+
+
+def create_lyrics_search_index(apps, schema_editor):
+    """创建歌词 FTS5 索引表并写入现有歌词（仅 SQLite）；rowid = 歌曲 id × LINE_SLOTS + 行号"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Song = apps.get_model('mayday_app', 'Song')
+    rows = Song.objects.using(connection.alias).exclude(lyrics='').values_list('id', 'lyrics').iterator(chunk_size=500)
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_LYRICS_FTS_SQL)
+        for song_id, lyrics in rows:
+            lines = []
+            for line_number, raw in enumerate(lyrics.splitlines()[:LINE_SLOTS]):
+                text = _TAG_RE.sub('', raw).strip()
+                if text:
+                    lines.append((song_id * LINE_SLOTS + line_number, segment(text)))
+            if lines:
+                cursor.executemany(f'INSERT INTO {LYRICS_FTS_TABLE} (rowid, line) VALUES (%s, %s)', lines)
+
+
+def drop_lyrics_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {LYRICS_FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0017_artist_directory'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_lyrics_search_index, drop_lyrics_search_index),
+    ]
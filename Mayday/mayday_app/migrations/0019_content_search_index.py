@@ -0,0 +1,58 @@
+import re
+
+from django.db import migrations
+
+# 以下与建表时的 mayday_app.content_index 一致，迁移不引用应用模块，以免其后续改动影响新库迁移
+CONTENT_FTS_TABLE = 'mayday_app_content_fts'
+CREATE_CONTENT_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {CONTENT_FTS_TABLE} USING fts5("
+    f"kind, title, body, tokenize='unicode61 remove_diacritics 2')"
+)
+# 类型名 → (rowid 低位编号, 模型名, 取 (标题, 正文) 的函数)；rowid = 对象 id × KIND_SLOTS + 编号
+KIND_SLOTS = 8
+CONTENT_KINDS = {
+    'quote': (1, 'Quote', lambda o: (' '.join(p for p in (o.author, o.source) if p), o.text)),
+    'tour': (2, 'Tour', lambda o: (o.name, o.description)),
+    'venue': (3, 'TourVenue', lambda o: (o.name, o.city)),
+    'image': (4, 'Image', lambda o: (o.title, o.caption)),
+}
+_CJK_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿぀-ヿ가-힯])')
+
+
+def segment(text):
+    return ' '.join(_CJK_RE.sub(r' \1 ', text or '').split())
+
+
+def create_content_search_index(apps, schema_editor):
+    """创建内容 FTS5 索引表并写入现有言论、巡回演出、场地、图片（仅 SQLite）"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_CONTENT_FTS_SQL)
+        for kind, (code, model_name, document) in CONTENT_KINDS.items():
+            model = apps.get_model('mayday_app', model_name)
+            for obj in model.objects.using(connection.alias).iterator(chunk_size=500):
+                title, body = document(obj)
+                cursor.execute(
+                    f'INSERT INTO {CONTENT_FTS_TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)',
+                    [obj.pk * KIND_SLOTS + code, kind, segment(title), segment(body)],
+                )
+
+
+def drop_content_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {CONTENT_FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0018_lyrics_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_content_search_index, drop_content_search_index),
+    ]
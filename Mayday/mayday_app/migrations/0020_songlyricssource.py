@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0019_content_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongLyricsSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_path', models.CharField(max_length=500, verbose_name='歌词文件')),
+                ('encoding', models.CharField(max_length=20, verbose_name='文件编码')),
+                ('file_size', models.BigIntegerField(verbose_name='文件大小')),
+                ('file_mtime_ns', models.BigIntegerField(verbose_name='文件修改时间')),
+                ('content_sha1', models.CharField(max_length=40, verbose_name='内容摘要')),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+                ('song', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lyrics_source', to='mayday_app.song', verbose_name='歌曲')),
+            ],
+            options={
+                'verbose_name': '歌词导入记录',
+                'verbose_name_plural': '歌词导入记录',
+            },
+        ),
+    ]
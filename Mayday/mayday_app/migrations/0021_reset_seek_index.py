@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_seek_indexes(apps, schema_editor):
+    """定位索引改为 (偏移, 起始时间) 8 字节交错格式，旧格式的索引清空，重新扫描时生成"""
+    SongSeekIndex = apps.get_model('mayday_app', 'SongSeekIndex')
+    SongSeekIndex.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0020_songlyricssource'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_seek_indexes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mayday_app', '0021_reset_seek_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='版本')),
+            ],
+            options={
+                'verbose_name': '内容版本',
+                'verbose_name_plural': '内容版本',
+            },
+        ),
+    ]
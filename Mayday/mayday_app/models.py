@@ -2,6 +2,7 @@
 数据模型 - 使用组合而非继承
 """
 from __future__ import annotations
+import re
 from django.db import models
 from django.core.validators import FileExtensionValidator
 from datetime import datetime
@@ -14,9 +15,24 @@ if TYPE_CHECKING:
     )
 
 
+def pinyin_keys(text: str) -> tuple[str, str]:
+    """标题 / 专辑名的检索键：小写连写全拼与首字母（如 一点号 → yidianhao, ydh），只保留字母数字"""
+    if not text:
+        return '', ''
+    try:
+        from pypinyin import lazy_pinyin, Style
+        parts = lazy_pinyin(text, style=Style.NORMAL)
+    except ImportError:
+        parts = [text]
+    words = [word for part in parts for word in re.findall(r'[0-9a-z]+', part.lower())]
+    return ''.join(words)[:255], ''.join(word[0] for word in words)[:100]
+
+
 class Album(models.Model):
     """专辑模型 - 实现AlbumInterface"""
     name = models.CharField(max_length=200, verbose_name='专辑名称')
+    name_pinyin = models.CharField(max_length=255, blank=True, db_index=True, verbose_name='专辑名拼音')
+    name_initials = models.CharField(max_length=100, blank=True, db_index=True, verbose_name='专辑名拼音首字母')
     release_date = models.DateField(verbose_name='发行日期')
     cover_image = models.ImageField(upload_to='albums/', null=True, blank=True, verbose_name='封面图片')
     description = models.TextField(blank=True, verbose_name='描述')
@@ -56,14 +72,60 @@ class Album(models.Model):
     
     def get_cover_image(self) -> Optional[str]:
         return self.cover_image.url if self.cover_image else None
+    
+    def save(self, *args, **kwargs):
+        """保存时同步专辑名拼音检索键"""
+        self.name_pinyin, self.name_initials = pinyin_keys(self.name)
+        super().save(*args, **kwargs)
+
+
+class Artist(models.Model):
+    """歌手 - 简繁体等不同写法按身份键（拼音）归并为同一歌手"""
+    name = models.CharField(max_length=100, verbose_name='名称')
+    identity_key = models.CharField(max_length=255, unique=True, verbose_name='身份键')
+    pinyin = models.CharField(max_length=255, blank=True, db_index=True, verbose_name='拼音')
+    initial = models.CharField(max_length=1, blank=True, db_index=True, verbose_name='首字母')
+    aliases = models.JSONField(default=list, blank=True, verbose_name='其它写法')
+    song_count = models.IntegerField(default=0, verbose_name='歌曲数')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['pinyin', 'name']
+        verbose_name = '歌手'
+        verbose_name_plural = '歌手'
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def for_name(cls, name: str) -> Optional['Artist']:
+        """按名称取歌手（身份键相同视为同一人），不存在时创建；新写法记入 aliases"""
+        from .scanner import artist_identity_key, artist_pinyin_fields
+        
+        name = (name or '').strip()
+        if not name:
+            return None
+        pinyin, initial = artist_pinyin_fields(name)
+        artist, created = cls.objects.get_or_create(
+            identity_key=artist_identity_key(name),
+            defaults={'name': name, 'pinyin': pinyin.lower(), 'initial': initial},
+        )
+        if not created and name != artist.name and name not in artist.aliases:
+            artist.aliases = [*artist.aliases, name]
+            artist.save(update_fields=['aliases', 'updated_at'])
+        return artist
 
 
 class Song(models.Model):
     """歌曲模型 - 实现SongInterface"""
     title = models.CharField(max_length=200, verbose_name='歌曲标题')
+    title_pinyin = models.CharField(max_length=255, blank=True, db_index=True, verbose_name='标题拼音')
+    title_initials = models.CharField(max_length=100, blank=True, db_index=True, verbose_name='标题拼音首字母')
     artist = models.CharField(max_length=100, default='五月天', verbose_name='艺术家')
     artist_pinyin = models.CharField(max_length=255, blank=True, verbose_name='歌手拼音')
     artist_initial = models.CharField(max_length=1, blank=True, verbose_name='歌手首字母')
+    artist_ref = models.ForeignKey(Artist, on_delete=models.SET_NULL, related_name='songs', null=True, blank=True, verbose_name='歌手（归并）')
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='songs', null=True, blank=True, verbose_name='专辑')
     file_path = models.FileField(
         upload_to='songs/',
@@ -87,6 +149,15 @@ class Song(models.Model):
     def __str__(self):
         return f"{self.title} - {self.artist}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的歌手名、关联的歌手和歌词，保存时据此跳过歌手重新关联、更新歌手目录和歌词索引
+        instance._loaded_artist_ref_id = instance.__dict__.get('artist_ref_id')
+        instance._loaded_artist = instance.__dict__.get('artist')
+        instance._loaded_lyrics = instance.__dict__.get('lyrics')
+        return instance
+    
     # 实现SongInterface
     def get_file_path(self) -> str:
         return self.file_path.path if hasattr(self.file_path, 'path') else str(self.file_path)
@@ -104,8 +175,13 @@ class Song(models.Model):
         return self.duration
     
     def save(self, *args, **kwargs):
-        """保存时自动填充/同步歌手拼音字段"""
-        if self.artist:
+        """保存时自动填充/同步歌手拼音字段和标题拼音检索键；指定 update_fields 时只同步其中涉及的字段"""
+        update_fields = kwargs.get('update_fields')
+        sync_title = update_fields is None or 'title' in update_fields
+        sync_artist = bool(self.artist) and (update_fields is None or 'artist' in update_fields)
+        if sync_title:
+            self.title_pinyin, self.title_initials = pinyin_keys(self.title)
+        if sync_artist:
             try:
                 from pypinyin import lazy_pinyin, Style
                 
@@ -120,8 +196,123 @@ class Song(models.Model):
                     self.artist_initial = initial
             except ImportError:
                 pass
+            
+            # 关联归并后的歌手（扫描器会预先赋值，身份键一致时不再查询）
+            if self._artist_ref_stale():
+                self.artist_ref = Artist.for_name(self.artist)
+        if update_fields is not None:
+            # 一并保存由 title / artist 派生的字段
+            derived = {
+                'title': ('title_pinyin', 'title_initials'),
+                'artist': ('artist_pinyin', 'artist_initial', 'artist_ref'),
+            }
+            kwargs['update_fields'] = {*update_fields, *(f for name in update_fields for f in derived.get(name, ()))}
         
         super().save(*args, **kwargs)
+        self._loaded_artist = self.artist
+    
+    def _artist_ref_stale(self) -> bool:
+        """artist_ref 是否需要按当前歌手名重新关联；尽量不为此查询歌手表"""
+        from .scanner import artist_identity_key
+        
+        if self.artist_ref_id is None:
+            return True
+        if Song.artist_ref.is_cached(self):
+            return self.artist_ref.identity_key != artist_identity_key(self.artist)
+        if getattr(self, '_loaded_artist', None) == self.artist:
+            # 从数据库加载后歌手名未改：关联在上次保存时已同步
+            return False
+        identity_key = Artist.objects.filter(pk=self.artist_ref_id).values_list('identity_key', flat=True).first()
+        return identity_key != artist_identity_key(self.artist)
+
+
+class SongSeekIndex(models.Model):
+    """歌曲时间→字节偏移索引（扫描时生成，供 play_song ?t= 按帧边界定位）"""
+    song = models.OneToOneField(Song, on_delete=models.CASCADE, related_name='seek_index', verbose_name='歌曲')
+    interval = models.FloatField(verbose_name='索引间隔（秒）')
+    offsets = models.BinaryField(verbose_name='偏移表')
+    file_size = models.BigIntegerField(verbose_name='文件大小')
+    file_mtime_ns = models.BigIntegerField(verbose_name='文件修改时间')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '歌曲定位索引'
+        verbose_name_plural = '歌曲定位索引'
+    
+    def __str__(self):
+        return f"{self.song.title} ({self.interval}s)"
+    
+    def offset_at(self, seconds: float):
+        """返回 (帧起始偏移, 对应时间)"""
+        from .seek_index import lookup_offset
+        return lookup_offset(self.offsets, self.interval, seconds)
+
+
+class SongLyricsSource(models.Model):
+    """歌词导入记录（load_lyrics.py 生成）：来源文件、识别出的编码和文件指纹，指纹不变时不再重新导入"""
+    song = models.OneToOneField(Song, on_delete=models.CASCADE, related_name='lyrics_source', verbose_name='歌曲')
+    source_path = models.CharField(max_length=500, verbose_name='歌词文件')
+    encoding = models.CharField(max_length=20, verbose_name='文件编码')
+    file_size = models.BigIntegerField(verbose_name='文件大小')
+    file_mtime_ns = models.BigIntegerField(verbose_name='文件修改时间')
+    content_sha1 = models.CharField(max_length=40, verbose_name='内容摘要')
+    imported_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '歌词导入记录'
+        verbose_name_plural = '歌词导入记录'
+    
+    def __str__(self):
+        return f"{self.song.title} ← {self.source_path} ({self.encoding})"
+
+
+class ArtistDirectory(models.Model):
+    """按首字母分组的歌手目录（物化为单行，歌手出现 / 消失或改名时增量更新，version 用作 ETag）"""
+    version = models.PositiveIntegerField(default=0, verbose_name='版本')
+    entries = models.JSONField(default=dict, verbose_name='条目')  # {歌手 id: [首字母, 名称]}
+    payload = models.JSONField(default=dict, verbose_name='接口数据')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '歌手目录'
+        verbose_name_plural = '歌手目录'
+    
+    def __str__(self):
+        return f"歌手目录 v{self.version}"
+
+
+class CatalogChange(models.Model):
+    """曲库变更记录（Song / Album 写入时追加）；自增 id 即曲库版本号，各进程的搜索建议索引据此增量同步"""
+    KIND_CHOICES = [
+        ('song', '歌曲'),
+        ('album', '专辑'),
+        ('all', '全部'),  # 批量修改后要求全量重建
+    ]
+    
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES, verbose_name='类型')
+    object_id = models.BigIntegerField(default=0, verbose_name='对象ID')
+    deleted = models.BooleanField(default=False, verbose_name='已删除')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = '曲库变更'
+        verbose_name_plural = '曲库变更'
+    
+    def __str__(self):
+        return f"#{self.pk} {self.kind}:{self.object_id}{' (删除)' if self.deleted else ''}"
+
+
+class ContentVersion(models.Model):
+    """内容版本号（单行）：言论、巡回演出、场地、图片写入时递增，内容搜索的结果快照按此区分"""
+    version = models.PositiveBigIntegerField(default=0, verbose_name='版本')
+    
+    class Meta:
+        verbose_name = '内容版本'
+        verbose_name_plural = '内容版本'
+    
+    def __str__(self):
+        return f"内容 v{self.version}"
 
 
 class Tour(models.Model):
@@ -361,6 +552,70 @@ class MembershipProfile(models.Model):
         return None if self.is_active_member else self.FREE_PLAYLIST_LIMIT
 
 
+class PlayEvent(models.Model):
+    """播放记录（由 play_events 缓冲区批量写入）"""
+    SOURCE_CHOICES = [
+        ('play', '直接播放'),
+        ('hls', '分段播放'),
+    ]
+    # 遥测库中的模型：外键跨库，不建约束、不级联删除（见 db_router.py）
+    song = models.ForeignKey(Song, on_delete=models.DO_NOTHING, db_constraint=False,
+                             related_name='play_events', verbose_name='歌曲')
+    user = models.ForeignKey('auth.User', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                             related_name='play_events', verbose_name='用户')
+    source = models.CharField(max_length=8, choices=SOURCE_CHOICES, default='play', verbose_name='来源')
+    played_at = models.DateTimeField(verbose_name='播放时间')
+    
+    class Meta:
+        verbose_name = '播放记录'
+        verbose_name_plural = '播放记录'
+        ordering = ['-played_at']
+        indexes = [
+            models.Index(fields=['user', 'played_at']),
+            models.Index(fields=['song', 'played_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.song_id} @ {self.played_at}"
+
+
+class SongPlayStat(models.Model):
+    """歌曲每日播放次数（批量写入播放记录时累加）"""
+    song = models.ForeignKey(Song, on_delete=models.DO_NOTHING, db_constraint=False,
+                             related_name='play_stats', verbose_name='歌曲')
+    day = models.DateField(verbose_name='日期')
+    play_count = models.IntegerField(default=0, verbose_name='播放次数')
+    
+    class Meta:
+        verbose_name = '每日播放次数'
+        verbose_name_plural = '每日播放次数'
+        ordering = ['-day', '-play_count']
+        unique_together = [['song', 'day']]
+    
+    def __str__(self):
+        return f"{self.song_id} · {self.day} · {self.play_count}"
+
+
+class StreamUsage(models.Model):
+    """播放流量按日聚合（匿名用户按 IP 计）"""
+    user = models.ForeignKey('auth.User', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                             related_name='stream_usage', verbose_name='用户')
+    client_ip = models.CharField(max_length=45, blank=True, default='', verbose_name='IP')
+    day = models.DateField(verbose_name='日期')
+    bytes_served = models.BigIntegerField(default=0, verbose_name='流量（字节）')
+    stream_count = models.IntegerField(default=0, verbose_name='请求数')
+    
+    class Meta:
+        verbose_name = '播放流量'
+        verbose_name_plural = '播放流量'
+        ordering = ['-day', '-bytes_served']
+        indexes = [models.Index(fields=['day', 'user', 'client_ip'])]
+    
+    def __str__(self):
+        who = self.user.username if self.user_id else self.client_ip
+        return f"{who} · {self.day} · {self.bytes_served}"
+
+
 class Favorite(models.Model):
     """用户收藏的歌曲"""
     user = models.ForeignKey(
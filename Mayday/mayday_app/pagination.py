@@ -2,6 +2,10 @@
 DRF 分页配置模块
 演示不同的分页实现方式
 """
+import base64
+import json
+from typing import List, Optional, Tuple
+
 from rest_framework.pagination import (
     PageNumberPagination,
     LimitOffsetPagination,
@@ -148,3 +152,51 @@ class CursorPaginationExample(CursorPagination):
     ordering = '-created_at'  # 必须指定排序字段
     cursor_query_param = 'cursor'  # 游标参数名
 
+
+
+# ========== 方式4: 快照游标（搜索结果） ==========
+# 首页把完整排序结果存为快照（搜索缓存中），游标是 (快照编号, 位置) 编码后的字符串，下一页从快照的该位置继续：
+# 相关度分数会随写入变化，按分数做键集分页会在翻页期间重复或遗漏；快照过期后游标失效，需重新搜索
+
+def encode_cursor(key) -> str:
+    """排序键 → URL 安全的游标字符串"""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, length: int) -> Optional[tuple]:
+    """游标字符串 → 排序键；空游标返回 None，格式不对时抛出 ValueError"""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError('无效的游标')
+    if (not isinstance(key, list) or len(key) != length
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in key)):
+        raise ValueError('无效的游标')
+    return tuple(key)
+
+
+def decode_snapshot_cursor(cursor: str) -> Optional[Tuple[int, int]]:
+    """快照游标 → (快照编号, 位置)；空游标返回 None，格式不对时抛出 ValueError"""
+    key = decode_cursor(cursor, 2)
+    if key is not None and not all(isinstance(v, int) and v >= 0 for v in key):
+        raise ValueError('无效的游标')
+    return key
+
+
+def cursor_page_size(request, default: int = 50, maximum: int = 100) -> int:
+    """?page_size= 参数，非法值使用默认值"""
+    try:
+        page_size = int(request.query_params.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return min(page_size, maximum) if page_size > 0 else default
+
+
+def snapshot_page(items: List, snapshot: int, position: int, page_size: int) -> Tuple[List, Optional[str]]:
+    """取快照中 position 起的一页，返回 (本页条目, 下一页游标)"""
+    page = items[position:position + page_size]
+    has_more = position + page_size < len(items)
+    return page, encode_cursor((snapshot, position + page_size)) if has_more else None
@@ -0,0 +1,150 @@
+"""
+播放事件采集 - 进程内缓冲，批量写库
+play_song 只把事件追加到内存缓冲区（不访问数据库），后台线程按条数或时间批量写入
+PlayEvent 和按歌曲 / 日期聚合的 SongPlayStat；启用 Kafka 时改为整批发送到消息队列。
+缓冲区有上限，写库失败或积压时丢弃最旧的事件，不影响播放。
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+PLAY_EVENTS_TOPIC = 'play_events'
+
+
+class PlayEventBuffer:
+    """播放事件缓冲区：record() 只做内存追加，flush 在后台线程中进行"""
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_events: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._events: deque = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.flushed = 0
+
+    def record(self, song_id: int, user_id: Optional[int], source: str = 'play') -> None:
+        try:
+            with self._lock:
+                if len(self._events) == self._events.maxlen:
+                    self.dropped += 1
+                self._events.append({
+                    'song_id': song_id,
+                    'user_id': user_id,
+                    'source': source,
+                    'played_at': timezone.now().isoformat(),
+                })
+                full = len(self._events) >= self.batch_size
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='play-events', daemon=True)
+                    self._worker.start()
+            if full:
+                self._wakeup.set()
+        except Exception as e:
+            # 采集失败不能影响播放
+            print(f"播放事件记录失败: {e}")
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self) -> int:
+        """取出当前缓冲的事件并写出，返回写出的条数"""
+        with self._lock:
+            batch = list(self._events)
+            self._events.clear()
+        if not batch:
+            return 0
+        try:
+            if getattr(settings, 'KAFKA_ENABLED', False):
+                from .messaging import message_queue
+                if not message_queue.send_message(PLAY_EVENTS_TOPIC, {'events': batch}):
+                    raise RuntimeError('消息队列发送失败')
+            else:
+                ingest_play_events(batch)
+        except Exception as e:
+            print(f"播放事件写出失败，稍后重试: {e}")
+            with self._lock:
+                # 放回队首；超出容量时丢弃最旧的事件
+                pending = batch + list(self._events)
+                overflow = len(pending) - self._events.maxlen
+                if overflow > 0:
+                    self.dropped += overflow
+                    pending = pending[overflow:]
+                self._events.clear()
+                self._events.extend(pending)
+            return 0
+        with self._lock:
+            self.flushed += len(batch)
+        return len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'pending': len(self._events), 'flushed': self.flushed, 'dropped': self.dropped}
+
+
+def ingest_play_events(events: List[Dict[str, Any]]) -> None:
+    """
+    批量写入一批播放事件并累加每日计数。
+    也可作为 message_queue.consume_messages(PLAY_EVENTS_TOPIC, ...) 的回调（参数为整条消息时取 events）。
+    """
+    from django.contrib.auth.models import User
+    from .models import PlayEvent, Song, SongPlayStat
+    if isinstance(events, dict):
+        events = events.get('events', [])
+    # 缓冲期间被删除的歌曲 / 用户直接丢弃，避免整批写入失败后反复重试
+    song_ids = set(Song.objects.filter(id__in={e['song_id'] for e in events}).values_list('id', flat=True))
+    user_ids = set(User.objects.filter(id__in={e.get('user_id') for e in events}).values_list('id', flat=True))
+    rows = []
+    counters: Counter = Counter()
+    for event in events:
+        if event['song_id'] not in song_ids:
+            continue
+        if event.get('user_id') not in user_ids:
+            event['user_id'] = None
+        played_at = datetime.fromisoformat(event['played_at'])
+        rows.append(PlayEvent(
+            song_id=event['song_id'], user_id=event.get('user_id'),
+            source=event.get('source', 'play'), played_at=played_at,
+        ))
+        counters[(event['song_id'], timezone.localdate(played_at))] += 1
+    with transaction.atomic(using=router.db_for_write(PlayEvent)):
+        PlayEvent.objects.bulk_create(rows, batch_size=500)
+        missing = []
+        for (song_id, day), count in counters.items():
+            updated = SongPlayStat.objects.filter(song_id=song_id, day=day).update(
+                play_count=F('play_count') + count,
+            )
+            if not updated:
+                missing.append(SongPlayStat(song_id=song_id, day=day, play_count=count))
+        SongPlayStat.objects.bulk_create(missing)
+
+
+def is_new_play(request) -> bool:
+    """同一次播放会有多个 Range 请求，只把从头开始的请求算作一次播放"""
+    if request.GET.get('t'):
+        return False
+    range_header = request.META.get('HTTP_RANGE', '').replace(' ', '')
+    return not range_header or range_header == 'bytes=0-'
+
+
+# 全局播放事件缓冲区；进程退出时的写出由 MaydayAppConfig.ready() 注册
+play_events = PlayEventBuffer(
+    batch_size=int(getattr(settings, 'PLAY_EVENT_BATCH_SIZE', 200)),
+    flush_seconds=float(getattr(settings, 'PLAY_EVENT_FLUSH_SECONDS', 10)),
+    max_events=int(getattr(settings, 'PLAY_EVENT_BUFFER_MAX', 10000)),
+)
@@ -0,0 +1,209 @@
+"""
+电台模式 - 一个读取任务，多个听众共享
+每个频道只有一个 asyncio 任务按实时码率顺序读取歌单中的文件，写入共享环形缓冲区；
+每个听众的 HTTP 连接只从缓冲区读取。磁盘读取次数与听众人数无关。
+读取任务运行在 ASGI 事件循环中（见 mayday_project/asgi.py），WSGI 部署不可用。
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from django.conf import settings
+
+from .seek_index import audio_start_offset
+
+# 可以直接首尾拼接成连续流的格式（同一频道内不混用）
+RADIO_FORMATS = {'.mp3': 'audio/mpeg'}
+
+# 未知时长时按 192kbps 估算码率
+DEFAULT_BYTES_PER_SECOND = 192000 // 8
+
+
+@dataclass
+class RadioTrack:
+    song_id: int
+    title: str
+    path: Path
+    duration: Optional[float]
+
+
+def _open_track(path: Path):
+    """打开文件并定位到音频数据起点，返回 (文件对象, 音频字节数)"""
+    start = audio_start_offset(path)
+    f = open(path, 'rb')
+    f.seek(start)
+    return f, max(os.fstat(f.fileno()).st_size - start, 1)
+
+
+class RadioChannel:
+    """单个频道：读取任务 + 环形缓冲区（按块序号推进）"""
+
+    def __init__(self, channel_id: int, tracks: List[RadioTrack], chunk_seconds: float,
+                 buffer_seconds: float, preroll_seconds: float, idle_seconds: float):
+        self.channel_id = channel_id
+        self.tracks = tracks
+        self.chunk_seconds = chunk_seconds
+        self.preroll_seconds = preroll_seconds
+        self.preroll_chunks = max(int(preroll_seconds / chunk_seconds), 0)
+        self.idle_seconds = idle_seconds
+        # (序号, 数据)；超出容量的旧块自动丢弃
+        self._chunks: deque = deque(maxlen=max(int(buffer_seconds / chunk_seconds), self.preroll_chunks + 1))
+        self._next_seq = 0
+        self._new_chunk = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._idle_since = time.monotonic()
+        self.listeners = 0
+        self.current: Optional[RadioTrack] = None
+        self.track_started_at: Optional[float] = None
+        self.disk_reads = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # 开播时先快速填满 preroll，之后按实时码率推进
+        deadline = loop.time() - self.preroll_seconds
+        try:
+            while self.tracks:
+                reads_before = self.disk_reads
+                for track in list(self.tracks):
+                    deadline = await self._play_track(track, deadline)
+                    if self._idle_expired():
+                        return
+                if self.disk_reads == reads_before:
+                    # 整个歌单都无法读取
+                    return
+        finally:
+            async with self._new_chunk:
+                self._new_chunk.notify_all()
+
+    async def _play_track(self, track: RadioTrack, deadline: float) -> float:
+        """按实时码率读取一首歌；返回下一块的发送时间"""
+        loop = asyncio.get_running_loop()
+        try:
+            f, audio_bytes = await asyncio.to_thread(_open_track, track.path)
+        except OSError as e:
+            print(f"电台读取失败: {track.path} - {e}")
+            return deadline
+        bytes_per_second = audio_bytes / track.duration if track.duration else DEFAULT_BYTES_PER_SECOND
+        chunk_size = max(int(bytes_per_second * self.chunk_seconds), 4096)
+        self.current = track
+        self.track_started_at = time.time()
+        try:
+            while not self._idle_expired():
+                data = await asyncio.to_thread(f.read, chunk_size)
+                if not data:
+                    break
+                self.disk_reads += 1
+                await self._publish(data)
+                # 读取卡顿时最多追赶 preroll 的时长，避免恢复后突发大量数据
+                deadline = max(deadline + len(data) / bytes_per_second, loop.time() - self.preroll_seconds)
+                await asyncio.sleep(max(deadline - loop.time(), 0))
+        finally:
+            f.close()
+        return deadline
+
+    async def _publish(self, data: bytes) -> None:
+        async with self._new_chunk:
+            self._chunks.append((self._next_seq, data))
+            self._next_seq += 1
+            self._new_chunk.notify_all()
+
+    def _idle_expired(self) -> bool:
+        if self.listeners:
+            self._idle_since = time.monotonic()
+            return False
+        return time.monotonic() - self._idle_since > self.idle_seconds
+
+    async def listen(self) -> AsyncIterator[bytes]:
+        """听众读取：先补发 preroll 块以便快速起播，之后跟随直播；落后过多时跳到缓冲区最早的块"""
+        self.listeners += 1
+        try:
+            seq = max(self._next_seq - self.preroll_chunks, 0)
+            while True:
+                async with self._new_chunk:
+                    while seq >= self._next_seq and self.running:
+                        await self._new_chunk.wait()
+                    if seq >= self._next_seq:
+                        return
+                    oldest = self._chunks[0][0] if self._chunks else self._next_seq
+                    seq = max(seq, oldest)
+                    pending = [data for s, data in self._chunks if s >= seq]
+                    seq = self._next_seq
+                for data in pending:
+                    yield data
+        finally:
+            self.listeners -= 1
+            self._idle_since = time.monotonic()
+
+    def status(self) -> Dict[str, object]:
+        return {
+            'channel_id': self.channel_id,
+            'running': self.running,
+            'listeners': self.listeners,
+            'now_playing': {
+                'song_id': self.current.song_id,
+                'title': self.current.title,
+                'started_at': self.track_started_at,
+            } if self.current else None,
+            'tracks': len(self.tracks),
+            'disk_reads': self.disk_reads,
+        }
+
+
+class RadioStation:
+    """频道管理：以歌单 ID 为频道 ID，只在 ASGI 事件循环中使用"""
+
+    def __init__(self):
+        self._channels: Dict[int, RadioChannel] = {}
+
+    def get(self, channel_id: int) -> Optional[RadioChannel]:
+        channel = self._channels.get(channel_id)
+        if channel is not None and not channel.running:
+            del self._channels[channel_id]
+            return None
+        return channel
+
+    def start(self, channel_id: int, tracks: List[RadioTrack]) -> RadioChannel:
+        channel = self.get(channel_id)
+        if channel is not None:
+            # 已在播放：只更新曲目列表，当前歌曲播完后生效
+            channel.tracks = tracks
+            return channel
+        channel = RadioChannel(
+            channel_id, tracks,
+            chunk_seconds=float(getattr(settings, 'RADIO_CHUNK_SECONDS', 0.5)),
+            buffer_seconds=float(getattr(settings, 'RADIO_BUFFER_SECONDS', 30)),
+            preroll_seconds=float(getattr(settings, 'RADIO_PREROLL_SECONDS', 5)),
+            idle_seconds=float(getattr(settings, 'RADIO_IDLE_SECONDS', 120)),
+        )
+        self._channels[channel_id] = channel
+        channel.start()
+        return channel
+
+    def stop(self, channel_id: int) -> bool:
+        channel = self._channels.pop(channel_id, None)
+        if channel is None:
+            return False
+        channel.stop()
+        return True
+
+
+# 全局电台实例
+radio_station = RadioStation()
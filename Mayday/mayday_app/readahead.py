@@ -0,0 +1,91 @@
+"""
+下一首预读 - 根据客户端上报的播放队列提前读取文件开头
+后台线程对接下来的歌曲执行 posix_fadvise(WILLNEED)（不支持的平台改为顺序读取前 N MB），
+并预热文件头缓存与本地缓存层，切歌时无需等待外置硬盘。
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable
+
+from django.conf import settings
+
+from .head_cache import audio_head_cache
+from .track_cache import local_track_cache
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class ReadAheadWorker:
+    """预读工作线程：同一文件在 dedupe_seconds 内只预读一次"""
+
+    def __init__(self, readahead_bytes: int, dedupe_seconds: int = 60, max_pending: int = 32):
+        self.readahead_bytes = readahead_bytes
+        self.dedupe_seconds = dedupe_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._recent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.readahead_bytes > 0
+
+    def schedule(self, source_paths: Iterable[str]) -> int:
+        """加入预读队列，返回实际排队的文件数（队列满时直接丢弃，不阻塞请求）"""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        scheduled = 0
+        with self._lock:
+            self._recent = {
+                path: ts for path, ts in self._recent.items() if now - ts < self.dedupe_seconds
+            }
+            for path in source_paths:
+                if not path or path in self._recent:
+                    continue
+                try:
+                    self._queue.put_nowait(path)
+                except queue.Full:
+                    break
+                self._recent[path] = now
+                scheduled += 1
+            if scheduled and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._run, name='track-readahead', daemon=True)
+                self._worker.start()
+        return scheduled
+
+    def _run(self) -> None:
+        while True:
+            source_path = self._queue.get()
+            try:
+                self.prefetch(source_path)
+            except OSError as e:
+                print(f"预读失败: {source_path} - {e}")
+            finally:
+                self._queue.task_done()
+
+    def prefetch(self, source_path: str) -> None:
+        # 已有本地副本的歌曲不再唤醒外置硬盘
+        if local_track_cache.is_cached(source_path):
+            return
+        with open(source_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, self.readahead_bytes, os.POSIX_FADV_WILLNEED)
+            else:
+                remaining = self.readahead_bytes
+                while remaining > 0 and f.read(min(READ_BLOCK_SIZE, remaining)):
+                    remaining -= READ_BLOCK_SIZE
+        audio_head_cache.preload(Path(source_path), stat.st_size, stat.st_mtime_ns)
+        local_track_cache.enqueue(source_path)
+
+
+# 全局预读实例
+read_ahead = ReadAheadWorker(
+    readahead_bytes=int(getattr(settings, 'AUDIO_READAHEAD_MB', 4)) * 1024 * 1024,
+)
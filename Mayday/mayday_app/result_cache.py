@@ -0,0 +1,128 @@
+"""
+搜索结果缓存 - 热门查询（五月天、倔强……）只计算一次
+键 = (接口, 规范化查询, 曲库版本号)：歌曲 / 专辑写入会递增版本号（见 catalog_sync），旧结果自然失效；
+歌手改名等不记版本号的修改靠过期时间兜底。存放在 Django 缓存的 search 别名中（条目数有上限）。
+同一个键的并发请求只计算一次：进程内其余线程等待计算结果，跨进程用 cache.add 抢占计算锁。
+cache_if 返回 False 的结果（如依赖的索引尚未就绪时的回退结果）照常返回但不写入缓存。
+翻页游标记录首页的版本号，用 get(version=) 读取该版本的排序快照，不会因中途写入而错位。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .catalog_sync import catalog_version
+
+# 未抢到计算锁时轮询结果的间隔（秒）
+POLL_SECONDS = 0.05
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join((query or '').lower().split())
+
+
+class QueryResultCache:
+    """get_or_compute() 命中直接返回，未命中时单飞计算并写入缓存"""
+
+    def __init__(self, alias: str, wait_seconds: float):
+        self.alias = alias
+        self.wait_seconds = wait_seconds
+        self._flights: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # 等到了其它请求的计算结果
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, endpoint: str, query: str, version: Optional[int] = None) -> str:
+        """version 为空时使用当前曲库版本号"""
+        digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+        return f'search:{endpoint}:{catalog_version() if version is None else version}:{digest}'
+
+    def get(self, endpoint: str, query: str, version: Optional[int] = None):
+        """只读缓存，不计算；未命中返回 None"""
+        value = self.cache.get(self.make_key(endpoint, query, version))
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def get_or_compute(self, endpoint: str, query: str, compute: Callable[[], object],
+                       cache_if: Optional[Callable[[object], bool]] = None, version: Optional[int] = None):
+        key = self.make_key(endpoint, query, version)
+        value = self.cache.get(key)
+        if value is not None:
+            self._count('hits')
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+        if not leader:
+            flight.wait(self.wait_seconds)
+            value = self.cache.get(key)
+            if value is not None:
+                self._count('coalesced')
+                return value
+            # 计算超时或失败，自行计算
+        try:
+            value = self._compute_shared(key, compute, cache_if)
+        finally:
+            if leader:
+                with self._lock:
+                    self._flights.pop(key, None)
+                flight.set()
+        return value
+
+    def _compute_shared(self, key: str, compute: Callable[[], object],
+                        cache_if: Optional[Callable[[object], bool]] = None):
+        lock_key = key + ':lock'
+        acquired = self.cache.add(lock_key, 1, self.wait_seconds)
+        if not acquired:
+            # 其它进程正在计算同一个查询
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                value = self.cache.get(key)
+                if value is not None:
+                    self._count('coalesced')
+                    return value
+            # 等待超时，自行计算；计算锁仍属于其它进程，不删除
+        try:
+            value = compute()
+            if cache_if is None or cache_if(value):
+                self.cache.set(key, value)
+        finally:
+            if acquired:
+                self.cache.delete(lock_key)
+        self._count('misses')
+        return value
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+                'hit_ratio': round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+            }
+
+
+# 全局搜索结果缓存实例
+search_result_cache = QueryResultCache(
+    alias='search',
+    wait_seconds=float(getattr(settings, 'SEARCH_CACHE_WAIT_SECONDS', 5)),
+)
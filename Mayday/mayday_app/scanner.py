@@ -9,7 +9,8 @@ from mutagen import File as MutagenFile
 from mutagen.id3 import ID3NoHeaderError
 from django.conf import settings
 from .interfaces import MusicScannerInterface
-from .models import Song, Album
+from .models import Song, Album, Artist, SongSeekIndex
+from .seek_index import SEEK_INDEX_FORMATS, build_seek_index, pack_offsets
 
 def artist_identity_key(artist: str) -> str:
     """用于关联同一歌手的不同写法（如简繁体）"""
@@ -43,6 +44,16 @@ def _generate_pinyin_fields(artist: str) -> tuple[str, str]:
         # 如果pypinyin未安装，返回空字符串
         return '', ''
 
+
+def artist_pinyin_fields(artist: str) -> tuple[str, str]:
+    """歌手拼音与目录首字母（A-Z，其它归为 #）"""
+    pinyin, initial = _generate_pinyin_fields(artist)
+    if not initial and artist:
+        initial = artist[0].upper()
+    if not (initial.isascii() and initial.isalpha()):
+        initial = '#'
+    return pinyin, initial
+
 if TYPE_CHECKING:
     from .interfaces import SongInterface
 
@@ -60,6 +71,7 @@ class MusicScanner(MusicScannerInterface):
         self.directory_path = directory_path or settings.MUSIC_DIRECTORY
         self._scan_root: Optional[str] = None
         self._path_index: Optional[Dict[str, int]] = None
+        self._artist_cache: Optional[Dict[str, Artist]] = None
     
     def _default_artist(self) -> str:
         """方案 A：元信息无艺术家时，使用扫描根目录的文件夹名"""
@@ -86,6 +98,16 @@ class MusicScanner(MusicScannerInterface):
             return folder
         return resolved
     
+    def _artist_for(self, name: str) -> Optional[Artist]:
+        """扫描期间按身份键缓存歌手记录，避免每首歌查询一次"""
+        if self._artist_cache is None:
+            return Artist.for_name(name)
+        key = artist_identity_key(name)
+        artist = self._artist_cache.get(key)
+        if artist is None or (name != artist.name and name not in artist.aliases):
+            artist = self._artist_cache[key] = Artist.for_name(name)
+        return artist
+    
     def _path_variants(self, file_path: Path) -> List[str]:
         """生成用于匹配的路径变体（resolve / absolute）"""
         variants: List[str] = []
@@ -129,6 +151,7 @@ class MusicScanner(MusicScannerInterface):
         
         self._scan_root = directory_path
         self._build_path_index()
+        self._artist_cache = {artist.identity_key: artist for artist in Artist.objects.all()}
         try:
             # 递归扫描所有音频文件
             for file_path in path.rglob('*'):
@@ -141,14 +164,41 @@ class MusicScanner(MusicScannerInterface):
                             song = self._create_or_update_song(file_path, metadata)
                             if song:
                                 songs.append(song)
+                                self._update_seek_index(song, file_path)
                     except Exception as e:
                         print(f"Error processing {file_path}: {e}")
         finally:
             self._scan_root = None
             self._path_index = None
+            self._artist_cache = None
         
         return songs
     
+    def _update_seek_index(self, song: Song, file_path: Path) -> None:
+        """为 MP3 / FLAC 生成定位索引；文件未变化时跳过"""
+        interval = float(getattr(settings, 'SEEK_INDEX_INTERVAL', 1.0))
+        if interval <= 0 or file_path.suffix.lower() not in SEEK_INDEX_FORMATS:
+            return
+        try:
+            stat = file_path.stat()
+            if SongSeekIndex.objects.filter(
+                song=song, interval=interval, file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns,
+            ).exists():
+                return
+            offsets = build_seek_index(file_path, interval)
+        except OSError as e:
+            print(f"定位索引生成失败: {file_path} - {e}")
+            return
+        if offsets is None:
+            SongSeekIndex.objects.filter(song=song).delete()
+            return
+        SongSeekIndex.objects.update_or_create(song=song, defaults={
+            'interval': interval,
+            'offsets': pack_offsets(offsets),
+            'file_size': stat.st_size,
+            'file_mtime_ns': stat.st_mtime_ns,
+        })
+    
     def extract_metadata(self, file_path: str) -> Dict[str, Any]:
         """提取音频文件元数据 - 委托给mutagen库"""
         try:
@@ -265,6 +315,7 @@ class MusicScanner(MusicScannerInterface):
             artist = metadata.get('artist') or self._canonical_artist(None)
             # 生成拼音字段
             artist_pinyin, artist_initial = _generate_pinyin_fields(artist)
+            artist_ref = self._artist_for(artist)
             
             if song:
                 # 更新现有记录
@@ -272,6 +323,7 @@ class MusicScanner(MusicScannerInterface):
                 song.artist = artist
                 song.artist_pinyin = artist_pinyin
                 song.artist_initial = artist_initial
+                song.artist_ref = artist_ref
                 song.album = album
                 song.duration = metadata.get('duration')
                 song.track_number = metadata.get('track_number')
@@ -288,6 +340,7 @@ class MusicScanner(MusicScannerInterface):
                     artist=artist,
                     artist_pinyin=artist_pinyin,
                     artist_initial=artist_initial,
+                    artist_ref=artist_ref,
                     album=album,
                     duration=metadata.get('duration'),
                     track_number=metadata.get('track_number'),
@@ -0,0 +1,203 @@
+"""
+歌曲全文索引 - SQLite FTS5
+虚拟表按歌曲 id 存放标题、歌手、专辑名和拼音形式，搜索用 MATCH + bm25 排序，
+代替 title / artist 上的 LIKE '%q%' 全表扫描。中文按单字切分（每个汉字一个词），
+查询时整串作为短语匹配；最后一个词按前缀匹配，边输入边搜索也能命中。
+标题 / 专辑名的全拼和首字母另有带索引的列（pinyin_prefix_song_scores 按前缀范围查询）。
+Song / Album 保存、删除时由信号同步索引；非 SQLite 数据库或索引表不存在时
+search_song_scores 返回 None，由调用方回退到 icontains 查询。
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Album, Song
+
+FTS_TABLE = 'mayday_app_song_fts'
+FTS_COLUMNS = ('title', 'artist', 'album', 'pinyin')
+# bm25 列权重：标题 > 歌手 > 专辑 > 拼音
+BM25_WEIGHTS = (10.0, 6.0, 4.0, 2.0)
+
+CREATE_FTS_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+
+_CJK_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿぀-ヿ가-힯])')
+
+# 已确认建好索引表的数据库（表由迁移 0013 创建；尚未建表时每次重新检查）
+_table_ready: Dict[str, bool] = {}
+
+
+def segment(text: str) -> str:
+    """每个中日韩字符前后加空格，使 FTS5 分词后一个字一个词"""
+    return ' '.join(_CJK_RE.sub(r' \1 ', text or '').split())
+
+
+def pinyin_forms(*texts: str) -> str:
+    """拼音检索文本：逐字拼音、连写全拼、首字母（如 倔强 → jue jiang juejiang jj）"""
+    try:
+        from pypinyin import lazy_pinyin, Style
+    except ImportError:
+        return ''
+    forms = []
+    for text in texts:
+        if not text or not _CJK_RE.search(text):
+            continue
+        # 只取汉字的拼音，英文、数字已在原文列中
+        syllables = lazy_pinyin(text, style=Style.NORMAL, errors='ignore')
+        forms.extend([' '.join(syllables), ''.join(syllables), ''.join(s[0] for s in syllables)])
+    return ' '.join(f for f in forms if f).lower()
+
+
+def song_document(title: str, artist: str, album_name: Optional[str], artist_pinyin: str = '') -> Tuple[str, str, str, str]:
+    """一首歌在索引中的各列内容（顺序同 FTS_COLUMNS）"""
+    pinyin = ' '.join(p for p in (pinyin_forms(title, album_name or ''), (artist_pinyin or '').lower()) if p)
+    return segment(title), segment(artist), segment(album_name or ''), pinyin
+
+
+def build_match_query(query: str, split: Callable[[str], str] = segment) -> str:
+    """用户输入 → FTS5 MATCH 表达式：每个空白分隔的词按 split 切分后作为短语，最后一个词前缀匹配"""
+    terms = [split(term) for term in (query or '').split()]
+    terms = [t.replace('"', '""') for t in terms if t]
+    if not terms:
+        return ''
+    phrases = [f'"{t}"' for t in terms]
+    phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+def search_table_ready(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    if not _table_ready.get(connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _table_ready[connection.alias] = cursor.fetchone() is not None
+    return _table_ready[connection.alias]
+
+
+def index_rows(cursor, rows: Iterable[Sequence]) -> int:
+    """写入 / 覆盖索引行；rows 为 (song_id, title, artist, album_name, artist_pinyin)"""
+    count = 0
+    for song_id, title, artist, album_name, artist_pinyin in rows:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [song_id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [song_id, *song_document(title, artist, album_name, artist_pinyin)],
+        )
+        count += 1
+    return count
+
+
+def _song_rows(queryset) -> Iterable[Sequence]:
+    return queryset.values_list('id', 'title', 'artist', 'album__name', 'artist_pinyin').iterator(chunk_size=2000)
+
+
+def reindex_songs(queryset, using: str = 'default') -> int:
+    connection = connections[using]
+    if not search_table_ready(connection):
+        return 0
+    with connection.cursor() as cursor:
+        return index_rows(cursor, _song_rows(queryset.using(using)))
+
+
+def remove_songs(song_ids: Iterable[int], using: str = 'default') -> None:
+    connection = connections[using]
+    if not search_table_ready(connection):
+        return
+    with connection.cursor() as cursor:
+        for song_id in song_ids:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [song_id])
+
+
+def rebuild_search_index(using: str = 'default') -> int:
+    """清空后全量重建（批量导入、直接改库之后执行）"""
+    connection = connections[using]
+    if not search_table_ready(connection):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        return index_rows(cursor, _song_rows(Song.objects.using(using)))
+
+
+def search_song_scores(query: str, limit: int = 50, using: str = 'default') -> Optional[List[Tuple[int, float]]]:
+    """按相关度返回 [(歌曲 id, bm25)]（bm25 越小越相关）；索引不可用时返回 None"""
+    connection = connections[using]
+    match = build_match_query(query)
+    try:
+        if not search_table_ready(connection):
+            return None
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS score "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY score, rowid LIMIT %s",
+                [match, limit],
+            )
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+    except DatabaseError as e:
+        print(f"全文检索失败，回退到普通查询: {e}")
+        return None
+
+
+def prefix_range(field: str, prefix: str) -> Dict[str, str]:
+    """前缀 → 范围条件（field >= prefix AND field < 后继串），任何数据库都能走 B-tree 索引"""
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+
+def pinyin_prefix_song_scores(query: str, limit: int = 50) -> List[Tuple[int, int]]:
+    """按标题 / 专辑名的全拼或首字母前缀查歌曲（如 ydh、yidianhao），只处理不含汉字的输入。
+    返回按 (得分, id) 排序的 [(歌曲 id, 得分)]，得分越小越相关：
+    标题首字母 < 标题全拼 < 专辑首字母 < 专辑全拼，标题类中多出的字母越少越靠前"""
+    if _CJK_RE.search(query or ''):
+        return []
+    prefix = ''.join(re.findall(r'[0-9a-z]+', (query or '').lower()))
+    if not prefix:
+        return []
+    albums_by_initials = Album.objects.filter(**prefix_range('name_initials', prefix))
+    albums_by_pinyin = Album.objects.filter(**prefix_range('name_pinyin', prefix))
+    lookups = [
+        Song.objects.filter(**prefix_range('title_initials', prefix)).order_by('title_initials')
+        .values_list('id', 'title_initials'),
+        Song.objects.filter(**prefix_range('title_pinyin', prefix)).order_by('title_pinyin')
+        .values_list('id', 'title_pinyin'),
+        Song.objects.filter(album__in=albums_by_initials).order_by('album_id', 'track_number')
+        .values_list('id', 'album_id'),
+        Song.objects.filter(album__in=albums_by_pinyin).order_by('album_id', 'track_number')
+        .values_list('id', 'album_id'),
+    ]
+    scores: Dict[int, int] = {}
+    for tier, queryset in enumerate(lookups):
+        for song_id, key in queryset[:limit]:
+            extra = len(key) - len(prefix) if tier < 2 else 0
+            scores.setdefault(song_id, tier * 1000 + min(extra, 999))
+        if len(scores) >= limit:
+            break
+    return sorted(scores.items(), key=lambda item: (item[1], item[0]))[:limit]
+
+
+@receiver(post_save, sender=Song)
+def index_saved_song(sender, instance: Song, using: str = 'default', raw: bool = False, **kwargs):
+    if raw:
+        return
+    reindex_songs(Song.objects.filter(pk=instance.pk), using=using)
+
+
+@receiver(post_delete, sender=Song)
+def unindex_deleted_song(sender, instance: Song, using: str = 'default', **kwargs):
+    remove_songs([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Album)
+def reindex_album_songs(sender, instance: Album, using: str = 'default', created: bool = False, raw: bool = False, **kwargs):
+    # 专辑改名后更新其歌曲的专辑列
+    if raw or created:
+        return
+    reindex_songs(Song.objects.filter(album=instance), using=using)
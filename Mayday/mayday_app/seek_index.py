@@ -0,0 +1,332 @@
+"""
+时间→字节偏移索引 - 按帧边界解析 MP3 / AAC(ADTS) / FLAC
+扫描时逐帧遍历文件（不解码），每隔 interval 秒记录包含该时刻的帧的起始偏移及其真实起始时间，
+以紧凑的 array 二进制存库；play_song?t= 据此从正确的帧边界开始输出，X-Seek-Time 为该帧的起始时间。
+VBR MP3 没有 Xing TOC 也能精确定位。
+"""
+from __future__ import annotations
+
+import mmap
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+SEEK_INDEX_FORMATS = {'.mp3', '.aac', '.flac'}
+
+# 每个索引项为 (帧起始偏移, 帧起始时间（微秒）)，交错存为 8 字节无符号整数（支持超过 4GB 的文件）
+_TYPECODE = 'Q'
+
+# ---------- MP3 ----------
+
+_MP3_BITRATES = {
+    # (MPEG1?, layer) -> kbps，索引 1..14
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG1
+    2: (22050, 24000, 16000),  # MPEG2
+    0: (11025, 12000, 8000),   # MPEG2.5
+}
+
+
+def parse_mp3_header(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """解析 4 字节 MPEG 音频帧头，返回 (帧长度, 每帧采样数, 采样率)；无效时返回 None"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding, 576, sample_rate
+    return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+
+def _id3v2_size(data) -> int:
+    """文件开头 ID3v2 标签的总长度（无标签时为 0）"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def audio_start_offset(file_path: Union[str, Path]) -> int:
+    """跳过文件开头 ID3v2 标签后的音频数据起点"""
+    with open(file_path, 'rb') as f:
+        return _id3v2_size(f.read(10))
+
+
+def iter_mp3_frames(data, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+    """
+    遍历 MP3 帧，产出 (帧起始偏移, 该帧之前的累计采样数, 采样率)。
+    遇到损坏数据时向后查找下一个连续两帧都有效的同步字。
+    """
+    pos = start + _id3v2_size(data[start:start + 10])
+    end = len(data)
+    samples = 0
+    first = True
+    while pos + 4 <= end:
+        parsed = parse_mp3_header(data[pos:pos + 4])
+        if parsed is None or (first and not _next_mp3_header_valid(data, pos, parsed[0])):
+            pos = _resync_mp3(data, pos + 1)
+            if pos < 0:
+                return
+            continue
+        frame_length, frame_samples, sample_rate = parsed
+        if first:
+            first = False
+            # Xing / Info / VBRI 帧只携带元信息，不含音频
+            if _is_vbr_info_frame(data[pos:pos + min(frame_length, 64)]):
+                pos += frame_length
+                continue
+        if pos + frame_length > end:
+            return
+        yield pos, samples, sample_rate
+        samples += frame_samples
+        pos += frame_length
+
+
+def _next_mp3_header_valid(data, pos: int, frame_length: int) -> bool:
+    nxt = pos + frame_length
+    if nxt + 4 > len(data):
+        return True
+    return parse_mp3_header(data[nxt:nxt + 4]) is not None
+
+
+def _resync_mp3(data, pos: int) -> int:
+    while True:
+        pos = data.find(b'\xff', pos)
+        if pos < 0 or pos + 4 > len(data):
+            return -1
+        parsed = parse_mp3_header(data[pos:pos + 4])
+        if parsed is not None and _next_mp3_header_valid(data, pos, parsed[0]):
+            return pos
+        pos += 1
+
+
+def _is_vbr_info_frame(frame: bytes) -> bool:
+    return b'Xing' in frame or b'Info' in frame or frame[36:40] == b'VBRI'
+
+
+# ---------- AAC (ADTS) ----------
+
+_ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+
+def parse_adts_header(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """解析 7 字节 ADTS 帧头，返回 (帧长度, 每帧采样数, 采样率)；无效时返回 None"""
+    if len(header) < 7 or header[0] != 0xFF or (header[1] & 0xF6) != 0xF0:
+        return None
+    sample_rate_index = (header[2] >> 2) & 0x0F
+    if sample_rate_index >= len(_ADTS_SAMPLE_RATES):
+        return None
+    frame_length = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+    if frame_length < 7:
+        return None
+    blocks = (header[6] & 0x03) + 1
+    return frame_length, blocks * 1024, _ADTS_SAMPLE_RATES[sample_rate_index]
+
+
+def iter_adts_frames(data) -> Iterator[Tuple[int, int, int]]:
+    """遍历 ADTS 帧，产出 (帧起始偏移, 该帧之前的累计采样数, 采样率)"""
+    pos = _id3v2_size(data[:10])
+    end = len(data)
+    samples = 0
+    while pos + 7 <= end:
+        parsed = parse_adts_header(data[pos:pos + 7])
+        if parsed is None:
+            pos = data.find(b'\xff', pos + 1)
+            if pos < 0:
+                return
+            continue
+        frame_length, frame_samples, sample_rate = parsed
+        if pos + frame_length > end:
+            return
+        yield pos, samples, sample_rate
+        samples += frame_samples
+        pos += frame_length
+
+
+# ---------- FLAC ----------
+
+def _crc8(data) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def parse_flac_streaminfo(data) -> Optional[Tuple[int, int, int]]:
+    """
+    解析 FLAC 元数据块，返回 (首个音频帧偏移, 采样率, 固定块大小)。
+    文件开头可带 ID3v2 标签。
+    """
+    pos = _id3v2_size(data[:10])
+    if data[pos:pos + 4] != b'fLaC':
+        return None
+    pos += 4
+    sample_rate = block_size = 0
+    while pos + 4 <= len(data):
+        header = data[pos]
+        length = int.from_bytes(data[pos + 1:pos + 4], 'big')
+        if header & 0x7F == 0:
+            info = data[pos + 4:pos + 4 + 34]
+            block_size = int.from_bytes(info[2:4], 'big')
+            sample_rate = int.from_bytes(info[10:13], 'big') >> 4
+        pos += 4 + length
+        if header & 0x80:
+            break
+    if not sample_rate:
+        return None
+    return pos, sample_rate, block_size
+
+
+def read_flac_stream_header(file_path: Union[str, Path]) -> bytes:
+    """
+    构造只含 STREAMINFO 的 FLAC 流头，用于从中间帧开始的输出：
+    总采样数与 MD5 置零（未知），并标记为最后一个元数据块。
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(_id3v2_size(f.read(10)))
+        data = f.read(4 + 4 + 34)
+    if len(data) < 42 or data[:4] != b'fLaC' or data[4] & 0x7F != 0:
+        return b''
+    info = bytearray(data[8:42])
+    info[13] &= 0xF0
+    info[14:18] = b'\x00' * 4
+    info[18:34] = b'\x00' * 16
+    return b'fLaC' + bytes([0x80]) + (34).to_bytes(3, 'big') + bytes(info)
+
+
+def _parse_flac_frame_header(data, pos: int, block_size: int) -> Optional[int]:
+    """校验 FLAC 帧头（含 CRC-8），返回该帧的起始采样号"""
+    if pos + 6 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if (b1 & 0xFE) != 0xF8 or (b2 >> 4) == 0 or (b2 & 0x0F) == 0x0F:
+        return None
+    if (b3 >> 4) >= 11 or ((b3 >> 1) & 0x07) == 3 or (b3 & 0x01):
+        return None
+    # UTF-8 风格编码的帧号 / 采样号
+    first = data[pos + 4]
+    if first < 0x80:
+        number, extra = first, 0
+    elif first >= 0xC0 and first != 0xFF:
+        extra = 1
+        while extra < 7 and first & (0x80 >> (extra + 1)):
+            extra += 1
+        number = first & (0x3F >> extra)
+        for i in range(extra):
+            byte = data[pos + 5 + i] if pos + 5 + i < len(data) else 0
+            if byte & 0xC0 != 0x80:
+                return None
+            number = (number << 6) | (byte & 0x3F)
+    else:
+        return None
+    cursor = pos + 5 + extra
+    cursor += {6: 1, 7: 2}.get(b2 >> 4, 0)
+    cursor += {12: 1, 13: 2, 14: 2}.get(b2 & 0x0F, 0)
+    if cursor >= len(data) or _crc8(data[pos:cursor]) != data[cursor]:
+        return None
+    variable = b1 & 0x01
+    return number if variable else number * block_size
+
+
+def iter_flac_frames(data) -> Iterator[Tuple[int, int, int]]:
+    """遍历 FLAC 帧，产出 (帧起始偏移, 起始采样号, 采样率)"""
+    info = parse_flac_streaminfo(data)
+    if info is None:
+        return
+    pos, sample_rate, block_size = info
+    last_sample = -1
+    while True:
+        pos = data.find(b'\xff', pos)
+        if pos < 0:
+            return
+        sample = _parse_flac_frame_header(data, pos, block_size)
+        if sample is not None and sample > last_sample:
+            last_sample = sample
+            yield pos, sample, sample_rate
+        pos += 1
+
+
+# ---------- 索引 ----------
+
+def build_seek_index(file_path: Union[str, Path], interval: float) -> Optional[array]:
+    """
+    生成时间→偏移表：第 i 项是包含 i * interval 秒的帧（起始时间不晚于该时刻的最后一帧），
+    存为相邻两个数：帧起始偏移、帧起始时间（微秒）。格式不支持或无法解析时返回 None。
+    """
+    suffix = Path(file_path).suffix.lower()
+    if suffix not in SEEK_INDEX_FORMATS:
+        return None
+    with open(file_path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件
+            return None
+        try:
+            if suffix == '.flac':
+                frames = iter_flac_frames(data)
+            elif suffix == '.aac':
+                frames = iter_adts_frames(data)
+            else:
+                frames = iter_mp3_frames(data)
+            offsets = array(_TYPECODE)
+            next_mark = 0
+            previous = None
+            for offset, sample, sample_rate in frames:
+                micros = sample * 1000000 // sample_rate
+                # 早于本帧起点的时刻属于上一帧
+                while previous is not None and next_mark * interval * 1000000 < micros:
+                    offsets.extend(previous)
+                    next_mark += 1
+                previous = (offset, micros)
+            while previous is not None and next_mark * interval * 1000000 <= previous[1]:
+                offsets.extend(previous)
+                next_mark += 1
+        finally:
+            data.close()
+    return offsets or None
+
+
+def pack_offsets(offsets: array) -> bytes:
+    """按小端字节序打包，跨平台可读"""
+    if sys.byteorder == 'big':
+        offsets = array(offsets.typecode, offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def unpack_seek_table(blob: bytes) -> Tuple[array, array]:
+    """返回 (各索引项的帧起始偏移, 帧起始时间（微秒）)"""
+    table = array(_TYPECODE)
+    table.frombytes(bytes(blob))
+    if sys.byteorder == 'big':
+        table.byteswap()
+    return table[0::2], table[1::2]
+
+
+def lookup_offset(blob: bytes, interval: float, seconds: float) -> Tuple[int, float]:
+    """返回 (帧起始偏移, 该帧的起始时间（秒，不晚于 seconds）)；超出时长时取最后一项"""
+    offsets, times = unpack_seek_table(blob)
+    index = min(max(int(seconds // interval), 0), len(offsets) - 1)
+    return offsets[index], times[index] / 1000000
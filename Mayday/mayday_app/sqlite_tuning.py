@@ -0,0 +1,50 @@
+"""
+SQLite 连接配置 - 每个新连接按配置执行一组 PRAGMA
+默认配置（settings.SQLITE_PRAGMAS）：WAL 日志、synchronous=NORMAL、内存映射读取、
+较大的页缓存、busy_timeout 以及临时表放内存。WAL 下扫描写入不再阻塞读取，
+并发写入时等待锁而不是立即报 "database is locked"。
+各数据库可在 settings.SQLITE_PRAGMA_OVERRIDES 中覆盖个别项。
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+# 先设置 busy_timeout，后面切换 journal_mode 时遇到锁也会等待
+_PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+
+
+def pragma_profile(alias: Optional[str] = None) -> Dict[str, object]:
+    profile = dict(getattr(settings, 'SQLITE_PRAGMAS', {}))
+    if alias is not None:
+        profile.update(getattr(settings, 'SQLITE_PRAGMA_OVERRIDES', {}).get(alias, {}))
+    return profile
+
+
+def pragma_statements(profile: Dict[str, object]) -> List[str]:
+    """把配置转换成 PRAGMA 语句（值为 None 的项跳过）"""
+    names = sorted(profile, key=lambda name: _PRAGMA_ORDER.index(name) if name in _PRAGMA_ORDER else len(_PRAGMA_ORDER))
+    return [f'PRAGMA {name}={profile[name]}' for name in names if profile[name] is not None]
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created 信号处理：新建 SQLite 连接时执行 PRAGMA"""
+    if connection.vendor != 'sqlite':
+        return
+    statements = pragma_statements(pragma_profile(connection.alias))
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def run_maintenance(connection, truncate: bool = True) -> Dict[str, object]:
+    """WAL 检查点 + PRAGMA optimize；返回检查点结果 (busy, wal 页数, 已写回页数)"""
+    mode = 'TRUNCATE' if truncate else 'PASSIVE'
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        busy, log_pages, checkpointed = cursor.fetchone()
+        cursor.execute('PRAGMA optimize')
+    return {'busy': busy, 'wal_pages': log_pages, 'checkpointed': checkpointed}
@@ -0,0 +1,311 @@
+"""
+播放并发限制与流量计量
+登记每个用户 / IP 正在进行的播放流，超过套餐上限时拒绝新的流；
+每个播放响应结束时按实际交给服务器的字节数累加流量（中途切歌只计已发送部分），由后台线程定期批量写入 StreamUsage。
+登记表默认在进程内，多进程部署可改用共享的 SQLite 文件（STREAM_REGISTRY_BACKEND=sqlite）。
+"""
+from __future__ import annotations
+
+import functools
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+# 同一用户在同一 IP 播放同一首歌的多个请求（Range 分段、HLS 片段）算作一个流
+LeaseKey = Tuple[str, str, int]
+
+
+def _lease_token(key: LeaseKey) -> str:
+    return '|'.join(str(part) for part in key)
+
+
+class StreamRegistryInterface:
+    """播放流登记接口"""
+
+    def acquire(self, key: LeaseKey, user_limit: Optional[int], ip_limit: Optional[int]) -> bool:
+        """登记一个流；超过上限时返回 False"""
+        pass
+
+    def release(self, key: LeaseKey) -> None:
+        """流结束"""
+        pass
+
+    def snapshot(self) -> Dict[str, int]:
+        """当前活跃流统计"""
+        pass
+
+
+class LocalStreamRegistry(StreamRegistryInterface):
+    """进程内登记表（单进程部署或开发环境）"""
+
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+        # token -> [引用数, user_key, ip, 开始时间]
+        self._leases: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: LeaseKey, user_limit: Optional[int], ip_limit: Optional[int]) -> bool:
+        token = _lease_token(key)
+        user_key, ip, _ = key
+        now = time.time()
+        with self._lock:
+            # 异常退出未释放的流按租期过期
+            self._leases = {
+                t: lease for t, lease in self._leases.items() if now - lease[3] < self.lease_seconds
+            }
+            lease = self._leases.get(token)
+            if lease is not None:
+                lease[0] += 1
+                return True
+            if user_limit is not None and sum(1 for l in self._leases.values() if l[1] == user_key) >= user_limit:
+                return False
+            if ip_limit is not None and sum(1 for l in self._leases.values() if l[2] == ip) >= ip_limit:
+                return False
+            self._leases[token] = [1, user_key, ip, now]
+            return True
+
+    def release(self, key: LeaseKey) -> None:
+        token = _lease_token(key)
+        with self._lock:
+            lease = self._leases.get(token)
+            if lease is None:
+                return
+            lease[0] -= 1
+            if lease[0] <= 0:
+                del self._leases[token]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'streams': len(self._leases),
+                'users': len({l[1] for l in self._leases.values()}),
+                'ips': len({l[2] for l in self._leases.values()}),
+            }
+
+
+class SqliteStreamRegistry(StreamRegistryInterface):
+    """共享 SQLite 登记表：多个工作进程共用同一个文件，登记在 IMMEDIATE 事务中完成"""
+
+    def __init__(self, db_path: str, lease_seconds: int):
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS stream_leases ('
+                'token TEXT PRIMARY KEY, user_key TEXT NOT NULL, ip TEXT NOT NULL, '
+                'refs INTEGER NOT NULL, started REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: LeaseKey, user_limit: Optional[int], ip_limit: Optional[int]) -> bool:
+        token = _lease_token(key)
+        user_key, ip, _ = key
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM stream_leases WHERE started < ?', (now - self.lease_seconds,))
+            updated = conn.execute('UPDATE stream_leases SET refs = refs + 1 WHERE token = ?', (token,)).rowcount
+            if not updated:
+                if user_limit is not None:
+                    (count,) = conn.execute('SELECT COUNT(*) FROM stream_leases WHERE user_key = ?', (user_key,)).fetchone()
+                    if count >= user_limit:
+                        conn.execute('ROLLBACK')
+                        return False
+                if ip_limit is not None:
+                    (count,) = conn.execute('SELECT COUNT(*) FROM stream_leases WHERE ip = ?', (ip,)).fetchone()
+                    if count >= ip_limit:
+                        conn.execute('ROLLBACK')
+                        return False
+                conn.execute(
+                    'INSERT INTO stream_leases (token, user_key, ip, refs, started) VALUES (?, ?, ?, 1, ?)',
+                    (token, user_key, ip, now),
+                )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def release(self, key: LeaseKey) -> None:
+        token = _lease_token(key)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('UPDATE stream_leases SET refs = refs - 1 WHERE token = ?', (token,))
+            conn.execute('DELETE FROM stream_leases WHERE token = ? AND refs <= 0', (token,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def snapshot(self) -> Dict[str, int]:
+        streams, users, ips = self._connect().execute(
+            'SELECT COUNT(*), COUNT(DISTINCT user_key), COUNT(DISTINCT ip) FROM stream_leases WHERE started >= ?',
+            (time.time() - self.lease_seconds,),
+        ).fetchone()
+        return {'streams': streams, 'users': users, 'ips': ips}
+
+
+class BandwidthMeter:
+    """流量计量：内存中按 (用户, IP, 日期) 聚合，由后台线程定期批量写入数据库（不占用响应关闭的时间）"""
+
+    def __init__(self, flush_seconds: int, max_pending: int = 500):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        # (user_id, ip, day) -> [字节数, 流数]
+        self._pending: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def record(self, user_id: Optional[int], ip: str, nbytes: int, streams: int = 1) -> None:
+        key = (user_id, '' if user_id else ip, timezone.localdate())
+        with self._lock:
+            counters = self._pending.setdefault(key, [0, 0])
+            counters[0] += nbytes
+            counters[1] += streams
+            full = len(self._pending) >= self.max_pending
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='bandwidth-meter', daemon=True)
+                self._worker.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self) -> int:
+        """写入数据库，返回写入的聚合条数；没有待写入的记录时直接返回"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        from .models import StreamUsage
+        try:
+            with transaction.atomic(using=router.db_for_write(StreamUsage)):
+                for (user_id, ip, day), (nbytes, streams) in pending.items():
+                    updated = StreamUsage.objects.filter(user_id=user_id, client_ip=ip, day=day).update(
+                        bytes_served=F('bytes_served') + nbytes,
+                        stream_count=F('stream_count') + streams,
+                    )
+                    if not updated:
+                        StreamUsage.objects.create(
+                            user_id=user_id, client_ip=ip, day=day,
+                            bytes_served=nbytes, stream_count=streams,
+                        )
+        except Exception as e:
+            print(f"流量计量写入失败: {e}")
+            # 写入失败时放回内存，下次再试
+            with self._lock:
+                for key, (nbytes, streams) in pending.items():
+                    counters = self._pending.setdefault(key, [0, 0])
+                    counters[0] += nbytes
+                    counters[1] += streams
+            return 0
+        return len(pending)
+
+
+def _create_registry() -> StreamRegistryInterface:
+    lease_seconds = int(getattr(settings, 'STREAM_LEASE_SECONDS', 6 * 3600))
+    if getattr(settings, 'STREAM_REGISTRY_BACKEND', 'memory') == 'sqlite':
+        return SqliteStreamRegistry(settings.STREAM_REGISTRY_SQLITE_PATH, lease_seconds)
+    return LocalStreamRegistry(lease_seconds)
+
+
+def client_ip(request) -> str:
+    return request.META.get('REMOTE_ADDR') or ''
+
+
+def stream_limit_for(user) -> Optional[int]:
+    """按套餐取同时播放的流数上限（None 表示不限）"""
+    limits = getattr(settings, 'STREAM_LIMITS', {})
+    if not user.is_authenticated:
+        return limits.get('anonymous')
+    from .membership import get_or_create_membership
+    return limits.get(get_or_create_membership(user).effective_plan())
+
+
+def open_stream(request, song_id: int) -> Optional[LeaseKey]:
+    """登记播放流；超过上限时返回 None"""
+    user_key = f'u{request.user.pk}' if request.user.is_authenticated else f'ip:{client_ip(request)}'
+    key = (user_key, client_ip(request), song_id)
+    ip_limit = getattr(settings, 'STREAM_LIMIT_PER_IP', None) or None
+    if not stream_registry.acquire(key, stream_limit_for(request.user), ip_limit):
+        return None
+    return key
+
+
+def streamed_bytes(response) -> int:
+    """响应实际发送的字节数；不支持计数的响应按 Content-Length 计"""
+    bytes_sent = getattr(response, 'bytes_sent', None)
+    if bytes_sent is not None:
+        return bytes_sent()
+    return int(response.get('Content-Length') or 0)
+
+
+def attach_stream(response, request, key: LeaseKey) -> None:
+    """响应关闭时释放登记并计入流量"""
+    user_id = request.user.pk if request.user.is_authenticated else None
+    closed = []
+
+    def close():
+        # close() 可能被调用多次（迭代器回收时会再次关闭），只释放、计量一次
+        if closed:
+            return
+        closed.append(True)
+        stream_registry.release(key)
+        bandwidth_meter.record(user_id, key[1], streamed_bytes(response))
+
+    response._resource_closers.append(close)
+
+
+def limit_concurrent_streams(view):
+    """播放视图装饰器：登记流、超限返回 429，响应结束时释放并计量"""
+    @functools.wraps(view)
+    def wrapper(request, song_id, *args, **kwargs):
+        key = open_stream(request, song_id)
+        if key is None:
+            response = HttpResponse(
+                "同时播放的歌曲数已达上限，请先停止其它播放", status=429,
+                content_type='text/plain; charset=utf-8',
+            )
+            response['Retry-After'] = '10'
+            return response
+        try:
+            response = view(request, song_id, *args, **kwargs)
+        except BaseException:
+            stream_registry.release(key)
+            raise
+        if response.streaming and response.status_code in (200, 206):
+            attach_stream(response, request, key)
+        else:
+            stream_registry.release(key)
+        return response
+    return wrapper
+
+
+# 全局登记表与流量计量实例
+stream_registry = _create_registry()
+# 进程退出时的写出由 MaydayAppConfig.ready() 注册；没有记录时 flush() 不访问数据库
+bandwidth_meter = BandwidthMeter(flush_seconds=int(getattr(settings, 'STREAM_METER_FLUSH_SECONDS', 30)))
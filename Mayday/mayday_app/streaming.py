@@ -0,0 +1,242 @@
+"""
+音频流式传输 - 大块读取、sendfile 零拷贝与 Range 断点续传
+
+WSGI：保留真实文件描述符交给服务器的 wsgi.file_wrapper
+（gunicorn / uWSGI 会据此走 os.sendfile，内核直接把文件送入 socket）；
+服务器不提供零拷贝时按 AUDIO_STREAM_BLOCK_SIZE 大块读取。
+ASGI：使用异步迭代器在线程池中分块读取，避免 Django 把同步迭代器整段读入内存。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+# 根据文件扩展名设置 content_type
+AUDIO_CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.flac': 'audio/flac',
+    '.wav': 'audio/wav',
+    '.m4a': 'audio/mp4',
+    '.aac': 'audio/aac',
+    '.ogg': 'audio/ogg',
+}
+
+DEFAULT_STREAM_BLOCK_SIZE = 256 * 1024
+
+
+def stream_block_size() -> int:
+    """每次读取的块大小（FileResponse 默认仅 4KB）"""
+    return int(getattr(settings, 'AUDIO_STREAM_BLOCK_SIZE', DEFAULT_STREAM_BLOCK_SIZE))
+
+
+def audio_content_type(file_path: Union[str, Path]) -> str:
+    return AUDIO_CONTENT_TYPES.get(Path(file_path).suffix.lower(), 'audio/mpeg')
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 请求超出文件范围"""
+
+    def __init__(self, size: int):
+        super().__init__(f'Range not satisfiable for {size} bytes')
+        self.size = size
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单段 Range 头，返回 (start, end)，end 为闭区间。
+    无 Range / 多段 Range / 格式无法识别时返回 None（按整文件返回）。
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec or '-' not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split('-', 1))
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N：最后 N 个字节
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(size)
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(size)
+    return start, min(end, size - 1)
+
+
+class BoundedFile:
+    """限定读取长度的文件包装，保留 fileno() 供服务器 sendfile 使用；bytes_read 记录已读出的字节数"""
+
+    def __init__(self, fileobj, length: int):
+        self._file = fileobj
+        self._remaining = length
+        self.name = getattr(fileobj, 'name', '')
+        self.bytes_read = 0
+        # 服务器取了 fileno() 即走 sendfile 零拷贝，不再经过 read()，bytes_read 不反映实际发送量
+        self.zero_copy = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        self.bytes_read += len(data)
+        return data
+
+    def fileno(self) -> int:
+        self.zero_copy = True
+        return self._file.fileno()
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrefixedFile:
+    """先返回内存中的文件头，再从磁盘文件续读（不暴露 fileno，避免服务器跳过前缀）；rest 为空时只有内存部分"""
+
+    zero_copy = False
+
+    def __init__(self, prefix: bytes, rest: Optional[BoundedFile] = None):
+        self._prefix = prefix
+        self._prefix_read = 0
+        self._rest = rest
+        self.name = rest.name if rest is not None else ''
+
+    @property
+    def bytes_read(self) -> int:
+        return self._prefix_read + (self._rest.bytes_read if self._rest is not None else 0)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._prefix:
+            if size is None or size < 0:
+                size = len(self._prefix)
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            self._prefix_read += len(data)
+            return data
+        return self._rest.read(size) if self._rest is not None else b''
+
+    def close(self) -> None:
+        if self._rest is not None:
+            self._rest.close()
+
+
+class AudioFileResponse(FileResponse):
+    """
+    音频文件响应：支持 Range（206 / 416），大块读取，
+    WSGI 下交给 wsgi.file_wrapper 零拷贝，ASGI 下异步分块读取。
+    传入 head（文件开头若干字节）时，落在文件头内的部分直接由内存返回。
+    offset / end / prefix 用于按帧边界输出片段：响应体为 prefix + 文件[offset:end]，Range 按此计算。
+    """
+
+    def __init__(self, file_path: Union[str, Path], request=None,
+                 content_type: Optional[str] = None, head: Optional[bytes] = None,
+                 size: Optional[int] = None, offset: int = 0, prefix: bytes = b'',
+                 end: Optional[int] = None, **kwargs):
+        self.block_size = stream_block_size()
+        file_path = Path(file_path)
+        if size is None:
+            size = file_path.stat().st_size
+        if end is not None:
+            size = min(size, end)
+        total = len(prefix) + max(size - offset, 0)
+
+        byte_range = None
+        if request is not None:
+            byte_range = parse_range_header(request.META.get('HTTP_RANGE'), total)
+        start, end = byte_range or (0, total - 1)
+        length = max(end - start + 1, 0)
+
+        # 先取内存中的部分（流头前缀、文件头缓存），剩余部分再读磁盘
+        memory = prefix[start:start + length]
+        file_start = offset + max(start - len(prefix), 0)
+        remaining = length - len(memory)
+        head = head or b''
+        if remaining and file_start < len(head):
+            cached = head[file_start:file_start + remaining]
+            memory += cached
+            file_start += len(cached)
+            remaining -= len(cached)
+
+        if not remaining:
+            # 整段都在内存中，无需访问磁盘
+            reader = PrefixedFile(memory)
+        else:
+            fileobj = open(file_path, 'rb')
+            if file_start:
+                fileobj.seek(file_start)
+            reader = BoundedFile(fileobj, remaining)
+            if memory:
+                reader = PrefixedFile(memory, reader)
+
+        streaming_content = reader
+        if is_async_request(request):
+            streaming_content = self._aiter_blocks(reader)
+
+        super().__init__(
+            streaming_content,
+            content_type=content_type or audio_content_type(file_path),
+            status=206 if byte_range else 200,
+            filename=kwargs.pop('filename', file_path.name),
+            **kwargs,
+        )
+        if self.file_to_stream is None:
+            self._resource_closers.append(reader.close)
+        self._reader = reader
+
+        self['Content-Length'] = str(length)
+        self['Accept-Ranges'] = 'bytes'
+        if byte_range:
+            self['Content-Range'] = f'bytes {start}-{end}/{total}'
+
+    def bytes_sent(self) -> int:
+        """已交给服务器发送的字节数（中途断开时小于 Content-Length）；sendfile 零拷贝时无法得知，按 Content-Length 计"""
+        if self._reader.zero_copy:
+            return int(self['Content-Length'])
+        return self._reader.bytes_read
+
+    async def _aiter_blocks(self, reader):
+        read_block = sync_to_async(reader.read, thread_sensitive=False)
+        while True:
+            chunk = await read_block(self.block_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def iterate_in_thread(iterator):
+    """在线程池中推进同步迭代器，ASGI 下不阻塞事件循环"""
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    iterator = iter(iterator)
+    while True:
+        chunk = await next_chunk(iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def range_not_satisfiable_response(exc: RangeNotSatisfiable) -> HttpResponse:
+    response = HttpResponse(status=416)
+    response['Content-Range'] = f'bytes */{exc.size}'
+    return response
+
+
+def is_async_request(request) -> bool:
+    if request is None:
+        return False
+    from django.core.handlers.asgi import ASGIRequest
+    return isinstance(request, ASGIRequest)
@@ -0,0 +1,279 @@
+"""
+搜索建议 - 进程内紧凑前缀索引
+歌曲标题、歌手、专辑名及其全拼 / 首字母展开成检索键，按字典序存放在并行数组中
+（相当于压缩 trie 的叶子按序排列），前缀查询用二分定位区间，再按热度（近 N 天播放次数）取前 K 个；
+命中范围大的前缀（如单个字母）把排序结果缓存起来，只在相关条目变化时失效。
+按曲库版本号增量同步（见 catalog_sync），定期全量重建以刷新热度。
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .catalog_sync import CatalogSyncedIndex
+from .models import Album, Song, SongPlayStat, pinyin_keys
+
+# 每个前缀排序取前 MAX_SUGGESTIONS 个；命中键数不少于 RANK_CACHE_MIN_SPAN 的前缀缓存排序结果
+MAX_SUGGESTIONS = 20
+RANK_CACHE_MIN_SPAN = 64
+RANK_CACHE_MAX_PREFIXES = 20000
+
+Ref = Tuple[str, object]  # (类型, id)；歌手以名称为 id
+
+
+def _normalize(text: str) -> str:
+    return ' '.join((text or '').lower().split())
+
+
+def _entry_keys(text: str, pinyin: str = '', initials: str = '') -> Tuple[str, ...]:
+    """检索键：原文、全拼、首字母；多词标题的每个词开头也能命中（hello world → world）"""
+    base = _normalize(text)
+    words = base.split(' ')
+    keys = {base, pinyin, initials, *(' '.join(words[i:]) for i in range(1, len(words)))}
+    keys.discard('')
+    return tuple(keys)
+
+
+def _search_keys(text: str, pinyin: str = '', initials: str = '') -> Tuple[str, str]:
+    # 拼音检索键尚未回填时现算
+    if not pinyin and text:
+        pinyin, initials = pinyin_keys(text)
+    return pinyin, initials
+
+
+class SuggestIndex:
+    """前缀索引：_keys 有序，_refs[i] 为 _keys[i] 所属条目"""
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._refs: List[Ref] = []
+        self._entries: Dict[Ref, Dict[str, object]] = {}
+        self._entry_keys: Dict[Ref, Tuple[str, ...]] = {}
+        self._weights: Dict[Ref, float] = {}
+        self._top: Dict[str, List[Ref]] = {}
+        # 歌手 / 专辑条目的热度由所属歌曲累加
+        self._song_info: Dict[int, Tuple[str, Optional[int], float]] = {}  # id → (歌手, 专辑 id, 播放次数)
+        self._artist_songs: Dict[str, int] = defaultdict(int)
+        self._artist_plays: Dict[str, float] = defaultdict(float)
+        self._album_plays: Dict[int, float] = defaultdict(float)
+        self._lock = threading.RLock()
+        # 全量构建时先追加、最后统一排序，避免逐条插入有序数组
+        self._bulk = False
+
+    # ---- 查询 ----
+
+    def lookup(self, query: str, limit: int = 8) -> List[Dict[str, object]]:
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            refs = self._top.get(prefix)
+            if refs is None:
+                lo = bisect_left(self._keys, prefix)
+                hi = bisect_left(self._keys, prefix + '\U0010ffff', lo)
+                # 热度相同时短的优先（更接近用户输入）
+                refs = heapq.nlargest(
+                    MAX_SUGGESTIONS, set(self._refs[lo:hi]),
+                    key=lambda ref: (self._weights[ref], -len(self._entries[ref]['text'])),
+                )
+                if hi - lo >= RANK_CACHE_MIN_SPAN:
+                    if len(self._top) >= RANK_CACHE_MAX_PREFIXES:
+                        self._top.clear()
+                    self._top[prefix] = refs
+            return [self._entries[ref] for ref in refs[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---- 修改 ----
+
+    def begin_bulk(self) -> None:
+        self._bulk = True
+
+    def finish_bulk(self) -> None:
+        pairs = sorted(zip(self._keys, self._refs), key=lambda pair: pair[0])
+        self._keys = [key for key, _ in pairs]
+        self._refs = [ref for _, ref in pairs]
+        self._top.clear()
+        self._bulk = False
+
+    def _touch(self, keys: Iterable[str]) -> None:
+        if self._bulk:
+            return
+        if not self._top:
+            return
+        for key in keys:
+            for n in range(1, len(key) + 1):
+                self._top.pop(key[:n], None)
+
+    def _put(self, ref: Ref, entry: Dict[str, object], keys: Tuple[str, ...], weight: float) -> None:
+        self._remove(ref)
+        self._entries[ref] = entry
+        self._entry_keys[ref] = keys
+        self._weights[ref] = weight
+        if self._bulk:
+            self._keys.extend(keys)
+            self._refs.extend([ref] * len(keys))
+            return
+        for key in keys:
+            i = bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._refs.insert(i, ref)
+        self._touch(keys)
+
+    def _remove(self, ref: Ref) -> None:
+        keys = self._entry_keys.pop(ref, None)
+        if keys is None:
+            return
+        if self._bulk:
+            pairs = [(k, r) for k, r in zip(self._keys, self._refs) if r != ref]
+            self._keys = [k for k, _ in pairs]
+            self._refs = [r for _, r in pairs]
+            keys = ()
+        for key in keys:
+            i = bisect_left(self._keys, key)
+            while self._refs[i] != ref:
+                i += 1
+            del self._keys[i]
+            del self._refs[i]
+        del self._entries[ref]
+        del self._weights[ref]
+        self._touch(keys)
+
+    def _set_weight(self, ref: Ref, weight: float) -> None:
+        if ref in self._weights and self._weights[ref] != weight:
+            self._weights[ref] = weight
+            self._touch(self._entry_keys[ref])
+
+    def put_song(self, song_id: int, title: str, artist: str, album_id: Optional[int],
+                 pinyin: str = '', initials: str = '', plays: Optional[float] = None) -> None:
+        with self._lock:
+            if plays is None:
+                plays = self._song_info.get(song_id, ('', None, 0.0))[2]
+            self.remove_song(song_id)
+            self._song_info[song_id] = (artist, album_id, plays)
+            keys = _entry_keys(title, *_search_keys(title, pinyin, initials))
+            self._put(('song', song_id), {'type': 'song', 'id': song_id, 'text': title, 'detail': artist}, keys, plays)
+            if artist:
+                self._artist_songs[artist] += 1
+                self._artist_plays[artist] += plays
+                self._refresh_artist(artist)
+            if album_id is not None:
+                self._album_plays[album_id] += plays
+                self._set_weight(('album', album_id), self._album_plays[album_id])
+
+    def remove_song(self, song_id: int) -> None:
+        with self._lock:
+            info = self._song_info.pop(song_id, None)
+            self._remove(('song', song_id))
+            if info is None:
+                return
+            artist, album_id, plays = info
+            if artist:
+                self._artist_songs[artist] -= 1
+                self._artist_plays[artist] -= plays
+                self._refresh_artist(artist)
+            if album_id is not None:
+                self._album_plays[album_id] -= plays
+                self._set_weight(('album', album_id), self._album_plays[album_id])
+
+    def _refresh_artist(self, artist: str) -> None:
+        ref = ('artist', artist)
+        count = self._artist_songs[artist]
+        if count <= 0:
+            self._artist_songs.pop(artist, None)
+            self._artist_plays.pop(artist, None)
+            self._remove(ref)
+            return
+        # 歌曲多的歌手排在前面，播放次数相同时也能区分
+        weight = self._artist_plays[artist] + count
+        if ref in self._entries:
+            self._entries[ref]['detail'] = f'{count} 首'
+            self._set_weight(ref, weight)
+        else:
+            keys = _entry_keys(artist, *pinyin_keys(artist))
+            self._put(ref, {'type': 'artist', 'id': artist, 'text': artist, 'detail': f'{count} 首'}, keys, weight)
+
+    def put_album(self, album_id: int, name: str, year: str = '', pinyin: str = '', initials: str = '') -> None:
+        with self._lock:
+            keys = _entry_keys(name, *_search_keys(name, pinyin, initials))
+            entry = {'type': 'album', 'id': album_id, 'text': name, 'detail': year}
+            self._put(('album', album_id), entry, keys, self._album_plays[album_id])
+
+    def remove_album(self, album_id: int) -> None:
+        with self._lock:
+            self._remove(('album', album_id))
+
+
+def _load_song(index: SuggestIndex, row, plays: Optional[float] = None) -> None:
+    song_id, title, artist, album_id, pinyin, initials = row
+    index.put_song(song_id, title, artist, album_id, pinyin, initials, plays=plays)
+
+
+def _load_album(index: SuggestIndex, row) -> None:
+    album_id, name, release_date, pinyin, initials = row
+    index.put_album(album_id, name, str(release_date.year) if release_date else '', pinyin, initials)
+
+
+_SONG_FIELDS = ('id', 'title', 'artist', 'album_id', 'title_pinyin', 'title_initials')
+_ALBUM_FIELDS = ('id', 'name', 'release_date', 'name_pinyin', 'name_initials')
+
+
+def build_suggest_index() -> SuggestIndex:
+    """从数据库全量构建"""
+    since = timezone.localdate() - timedelta(days=getattr(settings, 'SUGGEST_POPULARITY_DAYS', 30))
+    plays = dict(
+        SongPlayStat.objects.filter(day__gte=since).order_by()
+        .values_list('song_id').annotate(total=Sum('play_count'))
+    )
+    index = SuggestIndex()
+    index.begin_bulk()
+    for row in Album.objects.order_by().values_list(*_ALBUM_FIELDS):
+        _load_album(index, row)
+    for row in Song.objects.order_by().values_list(*_SONG_FIELDS).iterator(chunk_size=2000):
+        _load_song(index, row, plays=float(plays.get(row[0], 0)))
+    index.finish_bulk()
+    return index
+
+
+class CatalogSuggester(CatalogSyncedIndex):
+    """持有当前建议索引，按曲库版本号增量同步或后台全量重建"""
+
+    name = 'suggest'
+
+    def build(self) -> SuggestIndex:
+        return build_suggest_index()
+
+    def apply(self, index: SuggestIndex, song_ids, album_ids) -> None:
+        songs = {row[0]: row for row in Song.objects.filter(id__in=song_ids).order_by().values_list(*_SONG_FIELDS)}
+        albums = {row[0]: row for row in Album.objects.filter(id__in=album_ids).order_by().values_list(*_ALBUM_FIELDS)}
+        for song_id in song_ids:
+            if song_id in songs:
+                _load_song(index, songs[song_id])
+            else:
+                index.remove_song(song_id)
+        for album_id in album_ids:
+            if album_id in albums:
+                _load_album(index, albums[album_id])
+            else:
+                index.remove_album(album_id)
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict[str, object]]:
+        index = self.current()
+        # 索引首次构建完成前不给建议
+        return index.lookup(query, limit) if index is not None else []
+
+
+catalog_suggester = CatalogSuggester(
+    check_seconds=getattr(settings, 'SUGGEST_CHECK_SECONDS', 2),
+    rebuild_seconds=getattr(settings, 'SUGGEST_REBUILD_SECONDS', 3600),
+    incremental_limit=getattr(settings, 'SUGGEST_INCREMENTAL_LIMIT', 2000),
+)
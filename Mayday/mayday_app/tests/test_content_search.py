@@ -0,0 +1,69 @@
+"""
+内容搜索测试 - 游标指向首页所在内容版本的结果快照，翻页期间新增内容不会造成重复或遗漏；
+同一版本的首页只计算一次，内容写入后重新计算；
+高亮片段取自包含查询词的字段。
+"""
+from datetime import date
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from mayday_app.content_index import content_version, search_content
+from mayday_app.models import Quote, Tour, TourVenue
+
+
+class ContentSearchTests(TestCase):
+
+    def setUp(self):
+        caches['search'].clear()
+        self.addCleanup(caches['search'].clear)
+
+    def search(self, query, cursor='', **params):
+        params['q'] = query
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get('/api/search/content/', params)
+
+    def test_pages_stay_on_snapshot_while_content_is_inserted(self):
+        quotes = [Quote.objects.create(text=f'梦想 {i}', author='阿信', date=date(2020, 1, 1)) for i in range(12)]
+        seen = []
+        response = self.search('梦想', page_size=5)
+        self.assertEqual(response.json()['total'], 12)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if not cursor:
+                break
+            Quote.objects.create(text='梦想 梦想 梦想', author='阿信', date=date(2020, 1, 1))
+            response = self.search('梦想', cursor, page_size=5)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {quote.pk for quote in quotes})
+
+    def test_expired_snapshot_is_rejected(self):
+        for i in range(3):
+            Quote.objects.create(text=f'梦想 {i}', date=date(2020, 1, 1))
+        cursor = self.search('梦想', page_size=1).json()['next_cursor']
+        Quote.objects.create(text='梦想 3', date=date(2020, 1, 1))
+        caches['search'].clear()
+        self.assertEqual(self.search('梦想', cursor, page_size=1).status_code, 400)
+
+    def test_snippet_comes_from_matching_field(self):
+        tour = Tour.objects.create(name='诺亚方舟', start_date=date(2011, 1, 1))
+        TourVenue.objects.create(tour=tour, name='鸟巢', city='北京', date=date(2012, 5, 1))
+        results = self.search('鸟巢', type='venue').json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertIn('<mark>鸟巢</mark>', results[0]['snippet'])
+
+    def test_first_pages_share_snapshot_until_content_changes(self):
+        Quote.objects.create(text='梦想', date=date(2020, 1, 1))
+        with mock.patch('mayday_app.views.search_content', wraps=search_content) as searched:
+            self.search('梦想')
+            self.search('梦想')
+            self.assertEqual(searched.call_count, 1)
+            version = content_version()
+            Quote.objects.create(text='梦想 2', date=date(2020, 1, 1))
+            self.assertGreater(content_version(), version)
+            self.assertEqual(self.search('梦想').json()['total'], 2)
+            self.assertEqual(searched.call_count, 2)
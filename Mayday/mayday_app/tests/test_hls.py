@@ -0,0 +1,44 @@
+"""
+HLS 分段测试 - 播放列表的 EXTINF 按片段首帧的真实时间计算，与片段 ID3 时间戳一致。
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from mayday_app.hls import SegmentPlan, build_playlist
+from mayday_app.seek_index import build_seek_index, pack_offsets
+from mayday_app.tests.test_seek_index import mp3_file
+
+
+class SegmentPlanTests(SimpleTestCase):
+    interval = 0.25
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        data, self.frames = mp3_file([128] * 200)
+        path = Path(tmp) / 'track.mp3'
+        path.write_bytes(data)
+        self.duration = 200 * 1152 / 44100
+        self.plan = SegmentPlan(pack_offsets(build_seek_index(path, self.interval)), self.interval,
+                                len(data), segment_seconds=1, duration=self.duration)
+
+    def test_durations_follow_segment_start_times(self):
+        durations = self.plan.durations()
+        self.assertEqual(len(durations), len(self.plan))
+        for n, seconds in enumerate(durations[:-1]):
+            self.assertAlmostEqual(seconds, self.plan.start_time(n + 1) - self.plan.start_time(n))
+        # 每段首帧按帧边界取整，时长不是整 1 秒
+        self.assertNotAlmostEqual(durations[0], 1.0, places=3)
+        # 片段时间轴首尾相接，总长等于歌曲时长
+        self.assertAlmostEqual(self.plan.start_time(len(self.plan) - 1) + durations[-1], self.duration)
+        self.assertAlmostEqual(sum(durations), self.duration - self.plan.start_time(0))
+
+    def test_playlist_lists_each_segment(self):
+        playlist = build_playlist(self.plan, 'hls/{n}.mp3')
+        extinf = [line for line in playlist.splitlines() if line.startswith('#EXTINF:')]
+        self.assertEqual(len(extinf), len(self.plan))
+        self.assertEqual(extinf[0], f'#EXTINF:{self.plan.durations()[0]:.3f},')
+        self.assertTrue(playlist.rstrip().endswith('#EXT-X-ENDLIST'))
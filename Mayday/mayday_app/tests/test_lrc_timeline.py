@@ -0,0 +1,73 @@
+"""
+LRC 时间轴测试 - 多时间标签展开、[offset:]、逐字时间标签、LRC 中的无时间行、纯文本排布，
+以及按 (歌曲, 歌词 SHA-1) 缓存解析结果。
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from mayday_app import lrc_timeline
+from mayday_app.lrc_timeline import PLAIN_LINE_MS, lyrics_digest, lyrics_timeline, parse_lrc
+
+
+class ParseLrcTests(SimpleTestCase):
+
+    def test_timestamps_are_parsed_and_sorted(self):
+        timeline = parse_lrc('[00:12.34]第二行\n[00:01.5]第一行\n[01:02.345]第三行')
+        self.assertTrue(timeline['synced'])
+        self.assertEqual(timeline['times'], [1500, 12340, 62345])
+        self.assertEqual(timeline['lines'], ['第一行', '第二行', '第三行'])
+
+    def test_multiple_timestamps_expand_to_repeated_lines(self):
+        timeline = parse_lrc('[00:10.00][00:30.00]副歌\n[00:20.00]主歌')
+        self.assertEqual(timeline['times'], [10000, 20000, 30000])
+        self.assertEqual(timeline['lines'], ['副歌', '主歌', '副歌'])
+
+    def test_offset_tag_shifts_lines_earlier(self):
+        timeline = parse_lrc('[ar:五月天]\n[offset:+500]\n[00:00.20]开头\n[00:10.00]倔强')
+        self.assertEqual(timeline['times'], [0, 9500])
+        self.assertEqual(timeline['lines'], ['开头', '倔强'])
+
+    def test_negative_offset_delays_lines(self):
+        timeline = parse_lrc('[offset:-250]\n[00:10.00]倔强')
+        self.assertEqual(timeline['times'], [10250])
+
+    def test_word_time_tags_are_removed(self):
+        timeline = parse_lrc('[00:05.00]<00:05.00>我<00:05.40>和<00:05.80>我')
+        self.assertEqual(timeline['lines'], ['我和我'])
+
+    def test_untimed_lines_inside_lrc_follow_previous_line(self):
+        timeline = parse_lrc('标题\n[00:05.00]第一句\n接着唱\n[00:09.00]第二句')
+        self.assertEqual(timeline['times'], [0, 5000, 5000, 9000])
+        self.assertEqual(timeline['lines'], ['标题', '第一句', '接着唱', '第二句'])
+
+    def test_plain_text_is_spaced_evenly(self):
+        timeline = parse_lrc('第一行\n\n第二行\n  第三行  ')
+        self.assertFalse(timeline['synced'])
+        self.assertEqual(timeline['times'], [0, PLAIN_LINE_MS, 2 * PLAIN_LINE_MS])
+        self.assertEqual(timeline['lines'], ['第一行', '第二行', '第三行'])
+
+    def test_empty_lyrics(self):
+        self.assertEqual(parse_lrc(''), {'synced': False, 'times': [], 'lines': []})
+        self.assertEqual(parse_lrc(None), {'synced': False, 'times': [], 'lines': []})
+
+
+class LyricsTimelineCacheTests(SimpleTestCase):
+    lyrics = '[00:01.00]倔强'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_parsed_once_per_song_and_digest(self):
+        with mock.patch.object(lrc_timeline, 'parse_lrc', wraps=parse_lrc) as parsed:
+            first = lyrics_timeline(1, self.lyrics)
+            self.assertEqual(lyrics_timeline(1, self.lyrics, lyrics_digest(self.lyrics)), first)
+            self.assertEqual(parsed.call_count, 1)
+            # 另一首歌、或歌词变化后重新解析
+            lyrics_timeline(2, self.lyrics)
+            self.assertEqual(parsed.call_count, 2)
+            changed = lyrics_timeline(1, '[00:02.00]倔强')
+            self.assertEqual(parsed.call_count, 3)
+        self.assertEqual(changed['times'], [2000])
@@ -0,0 +1,231 @@
+"""
+歌词文件测试 - 在临时目录上校验文件名三级匹配、目录 mtime 变化时重建、按歌曲的 LRU 缓存；
+编码识别（BOM、GB18030、Big5、上次的编码）与按文件指纹导入（未变、只改 mtime、重新导入）。
+"""
+import codecs
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, TestCase
+
+from mayday_app.lyrics_files import LyricsFileIndex, detect_encoding, import_lyrics
+from mayday_app.models import Song, SongLyricsSource
+
+SIMPLIFIED = '我不愿让你一个人 一个人在人海浮沉 我不愿你独自走过风雨的时分'
+TRADITIONAL = '我不願讓你一個人 一個人在人海浮沉 我不願你獨自走過風雨的時分'
+JAPANESE = '東京の夜空に星が光る 私は君を待っている 五月天の歌'
+
+
+class LyricsDirectoryMixin:
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, data):
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data.encode('utf-8') if isinstance(data, str) else data)
+        return path
+
+    def touch_directory(self, directory=None):
+        # 保证目录 mtime 变化（部分文件系统时间精度较粗）
+        directory = directory or self.directory
+        stat = os.stat(directory)
+        os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class LyricsFileMatchTests(LyricsDirectoryMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('倔强.lrc', '[00:01.00]倔强')
+        self.write('倔强 (Live).lrc', '[00:01.00]倔强 Live')
+        self.write('突然好想你 (Live 版).txt', '突然好想你')
+        self.write('专辑/温柔.lyric', '温柔')
+        self.write('温柔.jpg', 'not lyrics')
+        self.index = LyricsFileIndex(str(self.directory), check_seconds=0, max_entries=10)
+        self.index.refresh(force=True)
+
+    def test_exact_name_wins(self):
+        self.assertEqual(self.index.match('倔强').name, '倔强.lrc')
+        # 规范化：忽略空格、标点和大小写
+        self.assertEqual(self.index.match(' 倔强 (LIVE) ').name, '倔强 (Live).lrc')
+
+    def test_file_name_containing_title(self):
+        self.assertEqual(self.index.match('突然好想你').name, '突然好想你 (Live 版).txt')
+
+    def test_title_containing_file_name(self):
+        path = self.index.match('温柔 (2020 版)')
+        self.assertEqual(path.name, '温柔.lyric')
+        self.assertEqual(path.parent.name, '专辑')
+
+    def test_no_match(self):
+        self.assertIsNone(self.index.match('知足'))
+        self.assertIsNone(self.index.match('!!!'))
+
+
+class LyricsFileCacheTests(LyricsDirectoryMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for title in ('倔强', '温柔', '知足'):
+            self.write(f'{title}.lrc', title)
+        self.index = LyricsFileIndex(str(self.directory), check_seconds=0, max_entries=2)
+
+    def test_lookup_returns_content_and_path(self):
+        content, path = self.index.lookup(1, '倔强')
+        self.assertEqual(content, '倔强')
+        self.assertEqual(path, str(self.directory / '倔强.lrc'))
+        self.assertEqual(self.index.lookup(2, '恋爱ing'), (None, None))
+
+    def test_repeat_lookup_is_cached(self):
+        self.index.lookup(1, '倔强')
+        self.index.lookup(1, '倔强')
+        stats = self.index.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['builds']), (1, 1, 1))
+
+    def test_least_recently_used_song_is_evicted(self):
+        self.index.lookup(1, '倔强')
+        self.index.lookup(2, '温柔')
+        self.index.lookup(1, '倔强')  # 1 变为最近使用
+        self.index.lookup(3, '知足')  # 超出 2 条，淘汰 2
+        self.assertEqual(self.index.stats()['cached_songs'], 2)
+        misses = self.index.stats()['misses']
+        self.index.lookup(1, '倔强')
+        self.assertEqual(self.index.stats()['misses'], misses)
+        self.index.lookup(2, '温柔')
+        self.assertEqual(self.index.stats()['misses'], misses + 1)
+
+    def test_title_change_rematches(self):
+        self.assertEqual(self.index.lookup(1, '倔强')[0], '倔强')
+        self.assertEqual(self.index.lookup(1, '温柔')[0], '温柔')
+
+    def test_directory_change_rebuilds_and_clears_cache(self):
+        self.assertEqual(self.index.lookup(1, '突然好想你'), (None, None))
+        self.write('突然好想你.lrc', '突然好想你')
+        self.touch_directory()
+        self.assertEqual(self.index.lookup(1, '突然好想你')[0], '突然好想你')
+        self.assertEqual(self.index.stats()['builds'], 2)
+
+    def test_subdirectory_change_is_detected(self):
+        self.write('live/占位.txt', '占位')
+        self.index.refresh(force=True)
+        self.assertEqual(self.index.lookup(1, '离开地球表面'), (None, None))
+        self.write('live/离开地球表面.lrc', '离开地球表面')
+        self.touch_directory(self.directory / 'live')
+        self.assertEqual(self.index.lookup(1, '离开地球表面')[0], '离开地球表面')
+
+    def test_unchanged_directory_is_not_rebuilt(self):
+        self.index.lookup(1, '倔强')
+        self.index.lookup(2, '温柔')
+        self.assertEqual(self.index.stats()['builds'], 1)
+
+
+class DetectEncodingTests(SimpleTestCase):
+
+    def test_bom(self):
+        self.assertEqual(detect_encoding(codecs.BOM_UTF8 + SIMPLIFIED.encode('utf-8')), ('utf-8-sig', SIMPLIFIED))
+        self.assertEqual(detect_encoding(SIMPLIFIED.encode('utf-16')), ('utf-16', SIMPLIFIED))
+        self.assertEqual(detect_encoding(codecs.BOM_UTF16_BE + SIMPLIFIED.encode('utf-16-be'), hint='big5'),
+                         ('utf-16', SIMPLIFIED))
+
+    def test_utf8_without_bom(self):
+        self.assertEqual(detect_encoding(SIMPLIFIED.encode('utf-8')), ('utf-8', SIMPLIFIED))
+
+    def test_gb18030(self):
+        self.assertEqual(detect_encoding(SIMPLIFIED.encode('gb18030')), ('gb18030', SIMPLIFIED))
+        self.assertEqual(detect_encoding('倔强'.encode('gbk')), ('gb18030', '倔强'))
+
+    def test_big5(self):
+        self.assertEqual(detect_encoding(TRADITIONAL.encode('big5')), ('big5', TRADITIONAL))
+        self.assertEqual(detect_encoding('倔強'.encode('big5')), ('big5', '倔強'))
+
+    def test_hint_is_used_when_plausible(self):
+        data = JAPANESE.encode('shift_jis')
+        self.assertEqual(detect_encoding(data, hint='shift_jis'), ('shift_jis', JAPANESE))
+        self.assertNotEqual(detect_encoding(data)[0], 'shift_jis')
+
+    def test_implausible_or_unknown_hint_is_ignored(self):
+        self.assertEqual(detect_encoding(SIMPLIFIED.encode('gb18030'), hint='big5')[0], 'gb18030')
+        self.assertEqual(detect_encoding(TRADITIONAL.encode('big5'), hint='gb18030')[0], 'big5')
+        self.assertEqual(detect_encoding(SIMPLIFIED.encode('gb18030'), hint='no-such-codec')[0], 'gb18030')
+
+    def test_latin1_fallback(self):
+        self.assertEqual(detect_encoding(b'\xfe\x81\x7f\x80')[0], 'latin-1')
+
+
+class ImportLyricsTests(LyricsDirectoryMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.song = Song.objects.create(title='倔强', artist='五月天', original_path='/music/jue.mp3')
+        self.path = self.write('倔强.lrc', SIMPLIFIED.encode('gb18030'))
+
+    def run_import(self, **kwargs):
+        statuses = {}
+        import_lyrics(str(self.directory), report=lambda song, status, path: statuses.update({song.pk: status}),
+                      **kwargs)
+        self.song.refresh_from_db()
+        return statuses[self.song.pk]
+
+    def source(self):
+        return SongLyricsSource.objects.get(song=self.song)
+
+    def touch_file(self):
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_import_records_encoding_and_fingerprint(self):
+        self.assertEqual(self.run_import(), 'imported')
+        self.assertEqual(self.song.lyrics, SIMPLIFIED)
+        source = self.source()
+        stat = self.path.stat()
+        self.assertEqual(source.source_path, str(self.path))
+        self.assertEqual(source.encoding, 'gb18030')
+        self.assertEqual((source.file_size, source.file_mtime_ns), (stat.st_size, stat.st_mtime_ns))
+
+    def test_unchanged_file_is_not_read_again(self):
+        self.run_import()
+        self.assertEqual(self.run_import(), 'unchanged')
+
+    def test_mtime_only_change_updates_fingerprint(self):
+        self.run_import()
+        self.touch_file()
+        self.assertEqual(self.run_import(), 'unchanged')
+        self.assertEqual(self.source().file_mtime_ns, self.path.stat().st_mtime_ns)
+        self.assertEqual(self.song.lyrics, SIMPLIFIED)
+
+    def test_changed_file_is_reimported(self):
+        self.run_import()
+        self.path.write_bytes(TRADITIONAL.encode('big5'))
+        self.touch_file()
+        self.assertEqual(self.run_import(), 'imported')
+        self.assertEqual(self.song.lyrics, TRADITIONAL)
+        self.assertEqual(self.source().encoding, 'big5')
+
+    def test_reimport_uses_previous_encoding_as_hint(self):
+        self.run_import()
+        SongLyricsSource.objects.filter(song=self.song).update(encoding='shift_jis')
+        self.path.write_bytes(JAPANESE.encode('shift_jis'))
+        self.touch_file()
+        self.assertEqual(self.run_import(), 'imported')
+        self.assertEqual(self.song.lyrics, JAPANESE)
+
+    def test_manual_lyrics_are_kept_unless_overwrite(self):
+        Song.objects.filter(pk=self.song.pk).update(lyrics='手动录入')
+        self.assertEqual(self.run_import(), 'skipped')
+        self.assertEqual(self.song.lyrics, '手动录入')
+        self.assertEqual(self.run_import(overwrite=True), 'imported')
+        self.assertEqual(self.song.lyrics, SIMPLIFIED)
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(self.run_import(dry_run=True), 'imported')
+        self.assertEqual(self.song.lyrics or '', '')
+        self.assertFalse(SongLyricsSource.objects.exists())
+
+    def test_song_without_file(self):
+        self.path.unlink()
+        self.assertEqual(self.run_import(), 'not_found')
@@ -0,0 +1,82 @@
+"""
+歌词全文索引测试 - 保存歌曲时同步索引，按一句歌词返回命中的行号，每首歌只取一行，高亮时转义 HTML。
+"""
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from mayday_app.lyrics_index import highlight, lyric_line, lyric_lines, search_lyric_lines
+from mayday_app.models import Song
+
+LYRICS = '\n'.join([
+    '[ti:倔强]',
+    '[00:12.00]当我和世界不一样',
+    '',
+    '[00:18.00]那就让我不一样',
+    '[00:24.00]坚持对我来说就是以刚克刚',
+    '[00:30.00]我如果对自己妥协',
+    '[00:36.00]那就让我不一样',
+])
+
+
+class LyricsIndexTests(TestCase):
+
+    def setUp(self):
+        caches['search'].clear()
+        self.addCleanup(caches['search'].clear)
+        self.song = Song.objects.create(title='倔强', artist='五月天', original_path='/music/jue.mp3', lyrics=LYRICS)
+
+    def song_ids(self, query):
+        return [song_id for song_id, _, _ in search_lyric_lines(query)]
+
+    def test_saved_lyrics_are_indexed_with_line_number(self):
+        hits = search_lyric_lines('以刚克刚')
+        self.assertEqual([(song_id, line) for song_id, line, _ in hits], [(self.song.pk, 4)])
+        self.assertEqual(lyric_line(LYRICS, hits[0][1]), '坚持对我来说就是以刚克刚')
+
+    def test_results_are_deduplicated_per_song(self):
+        # 两行都含“不一样”，只返回一行
+        hits = search_lyric_lines('不一样')
+        self.assertEqual(len(hits), 1)
+        self.assertIn(hits[0][1], (1, 3, 6))
+
+    def test_updating_lyrics_reindexes(self):
+        self.song.lyrics = '[00:01.00]突然好想你'
+        self.song.save(update_fields=['lyrics', 'updated_at'])
+        self.assertEqual(self.song_ids('以刚克刚'), [])
+        self.assertEqual(self.song_ids('突然好想你'), [self.song.pk])
+
+    def test_song_created_without_lyrics_can_be_indexed_later(self):
+        song = Song.objects.create(title='温柔', artist='五月天', original_path='/music/wen.mp3')
+        self.assertEqual(self.song_ids('不知道不明了'), [])
+        song.lyrics = '走在风中 今天阳光 不知道不明了'
+        song.save()
+        self.assertEqual(self.song_ids('不知道不明了'), [song.pk])
+
+    def test_deleted_song_is_removed(self):
+        self.song.delete()
+        self.assertEqual(search_lyric_lines('以刚克刚'), [])
+
+    def test_search_view_returns_line_and_snippet(self):
+        data = self.client.get('/api/search/lyrics/', {'q': '以刚克刚'}).json()
+        self.assertEqual(data['count'], 1)
+        result = data['results'][0]
+        self.assertEqual(result['id'], self.song.pk)
+        self.assertEqual(result['line_number'], 4)
+        self.assertEqual(result['snippet'], '坚持对我来说就是<mark>以刚克刚</mark>')
+        self.assertNotIn('lyrics', result)
+
+
+class LyricLineTests(SimpleTestCase):
+
+    def test_tags_and_blank_lines_are_skipped(self):
+        self.assertEqual(lyric_lines(LYRICS)[:2], [(1, '当我和世界不一样'), (3, '那就让我不一样')])
+        self.assertEqual(lyric_line(LYRICS, 0), '')
+        self.assertEqual(lyric_line(LYRICS, 99), '')
+
+    def test_highlight_escapes_html(self):
+        self.assertEqual(highlight('<b>倔强</b> & 温柔', '倔强'), '&lt;b&gt;<mark>倔强</mark>&lt;/b&gt; &amp; 温柔')
+        self.assertEqual(highlight('<script>', '<script>'), '<mark>&lt;script&gt;</mark>')
+        self.assertEqual(highlight('a<b', ''), 'a&lt;b')
+
+    def test_highlight_is_case_insensitive_per_term(self):
+        self.assertEqual(highlight('Mayday 五月天', 'mayday 五月'), '<mark>Mayday</mark> <mark>五月</mark>天')
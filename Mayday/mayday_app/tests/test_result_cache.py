@@ -0,0 +1,27 @@
+"""
+搜索结果缓存测试 - 单飞计算锁只由抢到它的请求释放。
+"""
+from django.core.cache import caches
+from django.test import TestCase
+
+from mayday_app.result_cache import QueryResultCache
+
+
+class QueryResultCacheLockTests(TestCase):
+
+    def setUp(self):
+        caches['search'].clear()
+        self.addCleanup(caches['search'].clear)
+        self.results = QueryResultCache(alias='search', wait_seconds=0.1)
+
+    def test_timed_out_wait_keeps_other_process_lock(self):
+        lock_key = self.results.make_key('songs', '倔强', version=1) + ':lock'
+        self.results.cache.add(lock_key, 1, 60)  # 其它进程正在计算
+        value = self.results.get_or_compute('songs', '倔强', lambda: {'results': []}, version=1)
+        self.assertEqual(value, {'results': []})
+        self.assertEqual(self.results.cache.get(lock_key), 1)
+
+    def test_own_lock_is_released(self):
+        lock_key = self.results.make_key('songs', '倔强', version=1) + ':lock'
+        self.results.get_or_compute('songs', '倔强', lambda: {'results': []}, version=1)
+        self.assertIsNone(self.results.cache.get(lock_key))
@@ -0,0 +1,89 @@
+"""
+搜索翻页测试 - 游标指向首页所在版本的排序快照：翻页期间新增匹配歌曲（bm25 分数随之变化）
+不会造成重复或遗漏，快照过期时返回 400；首页总是按请求时的版本计算。
+"""
+from itertools import count
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from mayday_app.models import Song
+
+
+class SearchPaginationTests(TestCase):
+    page_size = 10
+
+    def setUp(self):
+        caches['search'].clear()
+        self.addCleanup(caches['search'].clear)
+        self.songs = [
+            Song.objects.create(title=f'倔强 {i}', artist='五月天', original_path=f'/music/{i}.mp3')
+            for i in range(25)
+        ]
+
+    def search(self, cursor=''):
+        params = {'q': '倔强', 'page_size': self.page_size}
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get('/api/search/', params)
+
+    def insert_matches(self, count):
+        start = Song.objects.count()
+        for i in range(start, start + count):
+            Song.objects.create(title=f'倔强 倔强 {i}', artist='五月天', original_path=f'/music/{i}.mp3')
+
+    def test_pages_stay_on_snapshot_while_songs_are_inserted(self):
+        seen = []
+        response = self.search()
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [song['id'] for song in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if not cursor:
+                break
+            self.insert_matches(3)
+            response = self.search(cursor)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {song.pk for song in self.songs})
+
+    def test_new_search_sees_inserted_songs(self):
+        first = self.search().json()
+        self.insert_matches(3)
+        total = 0
+        response = self.search().json()
+        while True:
+            total += response['count']
+            if not response['next_cursor']:
+                break
+            response = self.search(response['next_cursor']).json()
+        self.assertEqual(first['count'], self.page_size)
+        self.assertEqual(total, len(self.songs) + 3)
+
+    def test_expired_snapshot_is_rejected(self):
+        cursor = self.search().json()['next_cursor']
+        self.insert_matches(1)
+        caches['search'].clear()
+        response = self.search(cursor)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.search('not-a-cursor').status_code, 400)
+
+    def test_first_page_ignores_writes_during_ranking(self):
+        # 首页请求中每次读取版本号都已前进（如扫描器正在逐首保存）
+        with mock.patch('mayday_app.views.catalog_version', side_effect=count(1000).__next__):
+            response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], self.page_size)
+
+    def test_no_cursor_while_fuzzy_index_is_building(self):
+        with mock.patch('mayday_app.views.fuzzy_searcher.search', return_value=None):
+            response = self.client.get('/api/search/', {'q': '倔强', 'mode': 'fuzzy', 'page_size': self.page_size})
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['indexing'])
+        self.assertEqual(data['mode'], 'exact')
+        self.assertEqual(data['count'], self.page_size)
+        self.assertIsNone(data['next_cursor'])
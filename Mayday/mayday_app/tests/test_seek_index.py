@@ -0,0 +1,157 @@
+"""
+定位索引测试 - 用合成的 VBR MP3（带 / 不带 Xing 帧）、ADTS、FLAC 文件校验：
+索引项落在帧边界上、对应包含该时刻的帧，play_song?t= 返回对应字节区间和 X-Seek-Time。
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from mayday_app.models import Song, SongSeekIndex
+from mayday_app.seek_index import _crc8, build_seek_index, lookup_offset, pack_offsets, unpack_seek_table
+
+MP3_BITRATES = {32: 1, 64: 5, 128: 9, 192: 11, 320: 14}  # kbps -> MPEG1 Layer III 码率索引
+
+
+def mp3_frame(kbps, sample_rate=44100, payload=b''):
+    """MPEG1 Layer III 帧（44.1kHz，无填充），数据区以 payload 开头、其余补零"""
+    length = 144 * kbps * 1000 // sample_rate
+    header = bytes([0xFF, 0xFB, (MP3_BITRATES[kbps] << 4), 0x44])
+    body = payload + b'\x00' * (length - 4 - len(payload))
+    return header + body
+
+
+def mp3_file(bitrates, xing=True):
+    """返回 (文件内容, [(帧偏移, 起始秒数)])；xing=True 时首帧为 Xing 信息帧（不计入音频帧）"""
+    data = b'ID3\x03\x00\x00\x00\x00\x00\x10' + b'\x00' * 16
+    if xing:
+        data += mp3_frame(128, payload=b'\x00' * 32 + b'Xing')
+    frames = []
+    for n, kbps in enumerate(bitrates):
+        frames.append((len(data), n * 1152 / 44100))
+        data += mp3_frame(kbps)
+    return data, frames
+
+
+def adts_file(lengths):
+    frames, data = [], b''
+    for n, length in enumerate(lengths):
+        frames.append((len(data), n * 1024 / 44100))
+        header = bytes([
+            0xFF, 0xF1, (1 << 6) | (4 << 2), (2 << 6) | ((length >> 11) & 0x03),
+            (length >> 3) & 0xFF, ((length & 0x07) << 5) | 0x1F, 0xFC,
+        ])
+        data += header + b'\x00' * (length - 7)
+    return data, frames
+
+
+def flac_file(payload_lengths, block_size=4096):
+    info = block_size.to_bytes(2, 'big') * 2 + b'\x00' * 6
+    info += ((44100 << 44) | (1 << 41) | (15 << 36) | (block_size * len(payload_lengths))).to_bytes(8, 'big')
+    info += b'\x00' * 16
+    data = b'fLaC' + bytes([0x80]) + (34).to_bytes(3, 'big') + info
+    frames = []
+    for n, length in enumerate(payload_lengths):
+        frames.append((len(data), n * block_size / 44100))
+        header = bytes([0xFF, 0xF8, 0xC9, 0x18, n])
+        data += header + bytes([_crc8(header)]) + b'\x00' * length
+    return data, frames
+
+
+class SeekIndexBuildTests(TestCase):
+    interval = 0.25
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def write(self, name, data):
+        path = Path(self.tmp) / name
+        path.write_bytes(data)
+        return path
+
+    def assert_on_frame_boundaries(self, path, frames):
+        blob = pack_offsets(build_seek_index(path, self.interval))
+        offsets, times = unpack_seek_table(blob)
+        starts = [offset for offset, _ in frames]
+        self.assertGreater(len(offsets), 1)
+        for i, (offset, micros) in enumerate(zip(offsets, times)):
+            self.assertIn(offset, starts)
+            n = starts.index(offset)
+            mark = i * self.interval
+            # 该项是包含该时刻的帧：起始时间不晚于该时刻，下一帧晚于该时刻
+            self.assertLessEqual(frames[n][1], mark + 1e-6)
+            if n + 1 < len(frames):
+                self.assertGreater(frames[n + 1][1], mark)
+            self.assertAlmostEqual(micros / 1000000, frames[n][1], places=5)
+        for seconds in (0, 0.1, 0.6, 1.234, 99):
+            offset, start = lookup_offset(blob, self.interval, seconds)
+            self.assertIn(offset, starts)
+            self.assertAlmostEqual(start, frames[starts.index(offset)][1], places=5)
+            self.assertLessEqual(start, seconds)
+
+    def test_vbr_mp3_with_xing_frame(self):
+        data, frames = mp3_file([32, 320, 128, 64, 192] * 12, xing=True)
+        path = self.write('vbr-xing.mp3', data)
+        self.assert_on_frame_boundaries(path, frames)
+        # Xing 信息帧不作为音频帧
+        self.assertEqual(build_seek_index(path, self.interval)[0], frames[0][0])
+
+    def test_vbr_mp3_without_xing_frame(self):
+        data, frames = mp3_file([320, 64, 64, 128, 32, 192] * 10, xing=False)
+        self.assert_on_frame_boundaries(self.write('vbr.mp3', data), frames)
+
+    def test_adts(self):
+        data, frames = adts_file([180, 400, 260, 333, 90] * 14)
+        self.assert_on_frame_boundaries(self.write('track.aac', data), frames)
+
+    def test_flac(self):
+        data, frames = flac_file([500, 1200, 800, 3000] * 6)
+        self.assert_on_frame_boundaries(self.write('track.flac', data), frames)
+
+    def test_unsupported_or_empty(self):
+        self.assertIsNone(build_seek_index(self.write('track.wav', b'RIFF'), self.interval))
+        self.assertIsNone(build_seek_index(self.write('empty.mp3', b''), self.interval))
+
+
+class PlaySongSeekTests(TestCase):
+    databases = '__all__'
+    interval = 0.25
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.data, self.frames = mp3_file([32, 320, 128, 64, 192] * 12, xing=True)
+        self.path = Path(tmp) / 'vbr.mp3'
+        self.path.write_bytes(self.data)
+        self.song = Song.objects.create(title='倔强', original_path=str(self.path))
+        stat = self.path.stat()
+        SongSeekIndex.objects.create(
+            song=self.song, interval=self.interval,
+            offsets=pack_offsets(build_seek_index(self.path, self.interval)),
+            file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns,
+        )
+
+    def play(self, seconds):
+        response = self.client.get(f'/play/{self.song.pk}/', {'t': seconds})
+        body = b''.join(response.streaming_content)
+        return response, body
+
+    def test_seek_returns_frame_range_and_time(self):
+        response, body = self.play(1.0)
+        self.assertEqual(response.status_code, 200)
+        # 包含 1.0 秒的帧
+        offset, start = max((f for f in self.frames if f[1] <= 1.0), key=lambda f: f[1])
+        self.assertEqual(response['X-Seek-Time'], f'{start:.3f}')
+        self.assertEqual(body, self.data[offset:])
+
+    def test_stale_index_is_ignored(self):
+        # 原地改写为相同大小的文件：mtime 变化，旧索引不再使用
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        response, body = self.play(1.0)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Seek-Time', response)
+        self.assertEqual(body, self.data)
@@ -0,0 +1,57 @@
+"""
+流量计量测试 - 播放响应按实际发送的字节数计量，中途断开（切歌）只计已发送部分。
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from mayday_app.models import Song
+from mayday_app.play_events import play_events
+from mayday_app.stream_limits import bandwidth_meter
+
+
+@override_settings(AUDIO_STREAM_BLOCK_SIZE=4096)
+class BandwidthMeteringTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.data = bytes(range(256)) * 256  # 64 KB
+        path = Path(tmp) / 'track.mp3'
+        path.write_bytes(self.data)
+        self.song = Song.objects.create(title='倔强', original_path=str(path))
+        self.addCleanup(self.discard_pending)
+
+    def discard_pending(self):
+        # 测试中的计量和播放事件不写出（进程退出时测试库已删除）
+        with bandwidth_meter._lock:
+            bandwidth_meter._pending.clear()
+        with play_events._lock:
+            play_events._events.clear()
+
+    def metered_bytes(self):
+        with bandwidth_meter._lock:
+            return sum(nbytes for nbytes, _ in bandwidth_meter._pending.values())
+
+    def play(self):
+        before = self.metered_bytes()
+        response = self.client.get(f'/play/{self.song.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response, before
+
+    def test_full_stream_is_metered(self):
+        response, before = self.play()
+        body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(body, self.data)
+        self.assertEqual(self.metered_bytes() - before, len(self.data))
+
+    def test_aborted_stream_counts_sent_bytes_only(self):
+        response, before = self.play()
+        chunk = next(iter(response.streaming_content))
+        response.close()
+        self.assertEqual(self.metered_bytes() - before, len(chunk))
+        self.assertLess(len(chunk), len(self.data))
@@ -0,0 +1,251 @@
+"""
+本地缓存层 - 把外置/可移动存储上的曲目复制到本机高速磁盘
+播放过的歌曲（以及手动预热的整张专辑/歌单）在后台线程中复制到 AUDIO_LOCAL_CACHE_DIR，
+按总字节数做 LRU 淘汰。play_song 命中缓存时直接读本地副本，不再唤醒外置硬盘。
+淘汰时副本可能仍有响应在读：POSIX 上删除已打开的文件是安全的（已打开的句柄继续读到原内容）；
+Windows 上删除正在打开的文件会失败，这类文件记为待删除，之后每次复制 / 淘汰时重试，重启时清理未登记的文件。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from django.conf import settings
+
+INDEX_FILENAME = 'index.json'
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class LocalTrackCache:
+    """
+    本地曲目缓存：以原始文件路径为键。
+    副本按复制时记录的源文件 size/mtime 校验；超过 revalidate_seconds 才重新 stat 源文件，
+    源文件所在设备断开时继续使用副本。
+    """
+
+    def __init__(self, cache_dir: Union[str, Path, None], max_bytes: int, revalidate_seconds: int = 600):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: Dict[str, dict] = {}
+        self._validated_at: Dict[str, float] = {}
+        self._pending = set()
+        self._orphans = set()  # 删除失败（Windows 上仍被打开）的副本文件名，稍后重试
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None and self.max_bytes > 0
+
+    def lookup(self, source_path: str) -> Optional[Path]:
+        """返回有效的本地副本路径；无副本或副本已失效时返回 None"""
+        if not self.enabled or not source_path:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(source_path)
+            if entry is None:
+                self.misses += 1
+                return None
+            cached = self.cache_dir / entry['file']
+        try:
+            cached_size = cached.stat().st_size
+        except OSError:
+            cached_size = None
+        if cached_size != entry['size'] or not self._source_unchanged(source_path, entry):
+            self._drop(source_path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            entry['last_access'] = time.time()
+            self.hits += 1
+        return cached
+
+    def is_cached(self, source_path: str) -> bool:
+        """是否已有本地副本（不校验源文件、不计入命中统计）"""
+        if not self.enabled or not source_path:
+            return False
+        self._ensure_loaded()
+        with self._lock:
+            return source_path in self._entries
+
+    def enqueue(self, source_path: str, source_file: Union[str, Path, None] = None) -> bool:
+        """安排后台复制；已缓存或已在队列中时返回 False"""
+        if not self.enabled or not source_path:
+            return False
+        self._ensure_loaded()
+        with self._lock:
+            if source_path in self._entries or source_path in self._pending:
+                return False
+            self._pending.add(source_path)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run_worker, name='local-track-cache', daemon=True,
+                )
+                self._worker.start()
+        self._queue.put((source_path, str(source_file or source_path)))
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'cache_dir': str(self.cache_dir) if self.cache_dir else None,
+                'entries': len(self._entries),
+                'bytes': sum(e['size'] for e in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'pending': len(self._pending),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _source_unchanged(self, source_path: str, entry: dict) -> bool:
+        now = time.time()
+        with self._lock:
+            validated_at = self._validated_at.get(source_path, 0)
+        if now - validated_at < self.revalidate_seconds:
+            return True
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            # 外置硬盘未连接：继续使用本地副本
+            return True
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return False
+        with self._lock:
+            self._validated_at[source_path] = now
+        return True
+
+    def _run_worker(self) -> None:
+        while True:
+            source_path, source_file = self._queue.get()
+            try:
+                self._copy(source_path, source_file)
+            except OSError as e:
+                print(f"本地缓存复制失败: {source_file} - {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(source_path)
+                self._queue.task_done()
+
+    def _copy(self, source_path: str, source_file: str) -> None:
+        before = os.stat(source_file)
+        if before.st_size > self.max_bytes:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha1(source_path.encode('utf-8')).hexdigest()
+        name = digest + Path(source_file).suffix.lower()
+        with self._lock:
+            self._retry_orphans_locked()
+            if name in self._orphans:
+                # 同名旧副本仍被打开（Windows），下次播放时再复制
+                return
+        target = self.cache_dir / name
+        partial = self.cache_dir / (name + '.part')
+        with open(source_file, 'rb') as src, open(partial, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        after = os.stat(source_file)
+        if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+            # 复制过程中源文件被修改，放弃本次副本
+            partial.unlink(missing_ok=True)
+            return
+        os.replace(partial, target)
+        with self._lock:
+            self._entries[source_path] = {
+                'file': name,
+                'size': before.st_size,
+                'mtime_ns': before.st_mtime_ns,
+                'last_access': time.time(),
+            }
+            self._validated_at[source_path] = time.time()
+            self._evict_locked()
+            self._save_index_locked()
+
+    def _evict_locked(self) -> None:
+        total = sum(e['size'] for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for source_path, entry in sorted(self._entries.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            self._unlink_locked(entry['file'])
+            del self._entries[source_path]
+            self._validated_at.pop(source_path, None)
+            total -= entry['size']
+
+    def _unlink_locked(self, name: str) -> None:
+        try:
+            (self.cache_dir / name).unlink(missing_ok=True)
+        except OSError:
+            # Windows：文件仍被某个响应打开，记下稍后重试
+            self._orphans.add(name)
+
+    def _retry_orphans_locked(self) -> None:
+        for name in list(self._orphans):
+            self._orphans.discard(name)
+            self._unlink_locked(name)
+
+    def _drop(self, source_path: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(source_path, None)
+            self._validated_at.pop(source_path, None)
+            if entry is not None:
+                self._unlink_locked(entry['file'])
+                self._save_index_locked()
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时读取索引文件，丢弃副本已不存在的条目"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            index_path = self.cache_dir / INDEX_FILENAME
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                return
+            self._entries = {
+                source: entry for source, entry in entries.items()
+                if (self.cache_dir / entry.get('file', '')).is_file()
+            }
+            # 上次运行中未能删除的副本（未登记在索引中）
+            known = {entry['file'] for entry in self._entries.values()} | {INDEX_FILENAME}
+            for path in self.cache_dir.iterdir():
+                if path.is_file() and path.name not in known:
+                    self._unlink_locked(path.name)
+
+    def _save_index_locked(self) -> None:
+        index_path = self.cache_dir / INDEX_FILENAME
+        tmp_path = self.cache_dir / (INDEX_FILENAME + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"本地缓存索引写入失败: {e}")
+
+
+# 全局本地缓存实例（未配置 AUDIO_LOCAL_CACHE_DIR 时不启用）
+local_track_cache = LocalTrackCache(
+    cache_dir=getattr(settings, 'AUDIO_LOCAL_CACHE_DIR', '') or None,
+    max_bytes=int(getattr(settings, 'AUDIO_LOCAL_CACHE_MAX_BYTES', 20 * 1024 ** 3)),
+    revalidate_seconds=int(getattr(settings, 'AUDIO_LOCAL_CACHE_REVALIDATE_SECONDS', 600)),
+)
@@ -30,9 +30,19 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/scan/', views.ScanView.as_view(), name='scan'),
     path('api/search/', views.SearchView.as_view(), name='search'),
+    path('api/suggest/', views.suggest_api, name='suggest'),
+    path('api/search/lyrics/', views.LyricsSearchView.as_view(), name='lyrics_search'),
+    path('api/search/content/', views.ContentSearchView.as_view(), name='content_search'),
     path('api/search/artists/', views.ArtistSearchView.as_view(), name='artist_search'),
     path('api/search/artist-songs/', views.ArtistSongsView.as_view(), name='artist_songs'),
+    path('api/search/stats/', views.search_stats_api, name='search_stats_api'),
     path('api/artists/by-initial/', views.ArtistsByInitialView.as_view(), name='artists_by_initial'),
+    path('api/stream/stats/', views.stream_stats_api, name='stream_stats_api'),
+    path('api/stream/prefetch/', views.stream_prefetch_api, name='stream_prefetch_api'),
+    path('api/stream/cache/warm/', views.stream_cache_warm_api, name='stream_cache_warm_api'),
+    path('api/radio/<int:playlist_id>/', views.radio_status_api, name='radio_status_api'),
+    path('api/radio/<int:playlist_id>/start/', views.radio_control_api, {'action': 'start'}, name='radio_start_api'),
+    path('api/radio/<int:playlist_id>/stop/', views.radio_control_api, {'action': 'stop'}, name='radio_stop_api'),
     path('api/membership/status/', views.membership_status_api, name='membership_status_api'),
     path('api/membership/upgrade/', views.membership_upgrade_api, name='membership_upgrade_api'),
     path('api/payments/checkout/', views.payments_checkout_api, name='payments_checkout_api'),
@@ -46,6 +56,7 @@ urlpatterns = [
     # 歌单页面路由
     path('playlists/', views.playlist_list_view, name='playlist_list'),
     path('playlist/<int:playlist_id>/', views.playlist_detail_view, name='playlist_detail'),
+    path('playlist/<int:playlist_id>/download.zip', views.playlist_download, name='playlist_download'),
     path('random-playlist/', views.random_playlist_view, name='random_playlist'),
     path('membership/', views.membership_view, name='membership'),
     path('membership/success/', views.membership_success_view, name='membership_success'),
@@ -54,6 +65,10 @@ urlpatterns = [
     # 页面路由
     path('', views.index, name='index'),
     path('album/<int:album_id>/', views.album_detail, name='album_detail'),
+    path('album/<int:album_id>/download.zip', views.album_download, name='album_download'),
     path('play/<int:song_id>/', views.play_song, name='play_song'),
+    path('radio/<int:playlist_id>/stream/', views.radio_stream, name='radio_stream'),
+    path('play/<int:song_id>/hls.m3u8', views.hls_playlist, name='hls_playlist'),
+    path('play/<int:song_id>/hls/<int:segment>.<str:ext>', views.hls_segment, name='hls_segment'),
 ]
 
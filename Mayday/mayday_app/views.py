@@ -15,13 +15,13 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_protect, csrf_exempt
 from django.db.models import Q
-from django.http import FileResponse, Http404, JsonResponse
+from django.http import Http404, JsonResponse
 import json
 from django.conf import settings
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import os
 from pathlib import Path
-from .models import Album, Song, Tour, Quote, Image, Playlist, PlaylistSong, Favorite
+from .models import Album, Artist, Song, SongSeekIndex, SongLyricsSource, Tour, Quote, Image, Playlist, PlaylistSong, Favorite
 from .serializers import (
     AlbumSerializer, SongSerializer, TourSerializer, 
     QuoteSerializer, ImageSerializer,
@@ -29,7 +29,22 @@ from .serializers import (
 )
 from .scanner import MusicScannerProxy, MusicScanner, artist_identity_key
 from .messaging import message_queue
-from .pagination import AlbumPagination, SongPagination
+from .pagination import (
+    AlbumPagination, SongPagination, cursor_page_size, decode_cursor, decode_snapshot_cursor, encode_cursor,
+    snapshot_page,
+)
+from .stream_limits import limit_concurrent_streams
+from .play_events import play_events, is_new_play
+from .search_index import pinyin_prefix_song_scores, prefix_range, search_song_scores
+from .artist_directory import current_directory
+from .suggest import MAX_SUGGESTIONS, catalog_suggester
+from .fuzzy_index import fuzzy_searcher
+from .catalog_sync import catalog_version
+from .result_cache import search_result_cache
+from .lyrics_index import highlight, lyric_line, search_lyric_lines
+from .content_index import (
+    CONTENT_KINDS, content_document, content_rowid, content_version, document_excerpt, search_content,
+)
 from datetime import datetime, timedelta
 import random
 from django.utils import timezone
@@ -107,64 +122,25 @@ class SongViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response([])
     
+    def _lyrics_from_file(self, song):
+        """返回 (歌词, 文件路径, 错误)；已由 load_lyrics.py 导入的直接取库中歌词，否则按文件名索引查找"""
+        from .lyrics_files import lyrics_file_index
+        
+        source_path = SongLyricsSource.objects.filter(song=song).values_list('source_path', flat=True).first()
+        if source_path and song.lyrics:
+            return song.lyrics, source_path, None
+        if not lyrics_file_index.directory.exists():
+            return None, None, '歌词目录不存在'
+        lyrics_content, matched_file = lyrics_file_index.lookup(song.pk, song.title)
+        if lyrics_content:
+            return lyrics_content, matched_file, None
+        return None, None, '未找到匹配的歌词文件'
+    
     @action(detail=True, methods=['get'])
     def lyrics_file(self, request, pk=None):
-        """从文件夹读取歌词文件"""
-        from django.conf import settings
-        from pathlib import Path
-        import re
-        
+        """从文件夹读取歌词文件（文件名索引 + 按歌曲缓存，见 lyrics_files）；已由 load_lyrics.py 导入的直接返回库中歌词"""
         song = self.get_object()
-        lyrics_dir = Path(getattr(settings, 'LYRICS_DIRECTORY', r'C:\Lyrics'))
-        
-        if not lyrics_dir.exists():
-            return Response({
-                'error': '歌词目录不存在',
-                'lyrics': None
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # 支持的歌词文件格式
-        lyric_extensions = ['.txt', '.lrc', '.lyric', '.lyrics']
-        
-        # 规范化歌曲标题用于匹配
-        def normalize_text(text):
-            # 去除空格、标点符号，转换为小写
-            return re.sub(r'[^\w]', '', text.lower())
-        
-        song_title_normalized = normalize_text(song.title)
-        
-        # 查找匹配的歌词文件
-        lyrics_content = None
-        matched_file = None
-        
-        # 遍历歌词目录中的所有文件
-        for lyric_file in lyrics_dir.rglob('*'):
-            if lyric_file.is_file() and lyric_file.suffix.lower() in lyric_extensions:
-                # 规范化文件名（不含扩展名）
-                filename_normalized = normalize_text(lyric_file.stem)
-                
-                # 尝试匹配
-                if (song_title_normalized == filename_normalized or
-                    song_title_normalized in filename_normalized or
-                    filename_normalized in song_title_normalized):
-                    # 读取文件内容
-                    try:
-                        # 尝试多种编码
-                        encodings = ['utf-8', 'gbk', 'gb2312', 'big5', 'latin-1']
-                        for encoding in encodings:
-                            try:
-                                with open(lyric_file, 'r', encoding=encoding) as f:
-                                    lyrics_content = f.read().strip()
-                                    matched_file = str(lyric_file)
-                                    break
-                            except UnicodeDecodeError:
-                                continue
-                        
-                        if lyrics_content:
-                            break
-                    except Exception as e:
-                        continue
-        
+        lyrics_content, matched_file, error = self._lyrics_from_file(song)
         if lyrics_content:
             return Response({
                 'lyrics': lyrics_content,
@@ -172,9 +148,28 @@ class SongViewSet(viewsets.ModelViewSet):
             })
         else:
             return Response({
-                'error': '未找到匹配的歌词文件',
+                'error': error,
                 'lyrics': None
             }, status=status.HTTP_404_NOT_FOUND)
+    
+    @action(detail=True, methods=['get'])
+    def lyrics_timeline(self, request, pk=None):
+        """解析好的歌词时间轴：times（毫秒）与 lines 两个等长数组，前端二分查找当前行（见 lrc_timeline）；
+        歌词来源同 lyrics_file，找不到文件时用库中歌词。按歌词 SHA-1 做 ETag 协商缓存"""
+        from .lrc_timeline import lyrics_digest, lyrics_timeline
+        
+        song = self.get_object()
+        lyrics_content = self._lyrics_from_file(song)[0] or song.lyrics
+        if not lyrics_content or not lyrics_content.strip():
+            return Response({'error': '暂无歌词'}, status=status.HTTP_404_NOT_FOUND)
+        
+        digest = lyrics_digest(lyrics_content)
+        headers = {'ETag': f'"lrc-{digest}"', 'Cache-Control': 'no-cache'}
+        known = request.headers.get('If-None-Match', '').strip().removeprefix('W/').strip('"')
+        if known == f'lrc-{digest}':
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        timeline = lyrics_timeline(song.pk, lyrics_content, digest)
+        return Response({'song_id': song.pk, 'hash': digest, **timeline}, headers=headers)
 
 
 class TourViewSet(viewsets.ModelViewSet):
@@ -318,106 +313,473 @@ def random_playlist_view(request):
     return render(request, 'mayday_app/random_playlist.html', context)
 
 
-def play_song(request, song_id):
-    """播放歌曲文件视图"""
-    from django.http import HttpResponse, JsonResponse
-    import mimetypes
-    
-    song = get_object_or_404(Song, id=song_id)
-    
-    # 优先使用上传的文件
+def _resolve_song_file(song):
+    """
+    定位歌曲的本地音频文件：优先上传文件，其次原始文件路径。
+    返回 (文件路径, 错误详情)；找到文件时错误详情为 None。
+    """
     if song.file_path and hasattr(song.file_path, 'path'):
-        file_path = song.file_path.path
-        if os.path.exists(file_path):
-            try:
-                # 根据文件扩展名设置content_type
-                ext = Path(file_path).suffix.lower()
-                content_types = {
-                    '.mp3': 'audio/mpeg',
-                    '.flac': 'audio/flac',
-                    '.wav': 'audio/wav',
-                    '.m4a': 'audio/mp4',
-                    '.aac': 'audio/aac',
-                    '.ogg': 'audio/ogg',
-                }
-                content_type = content_types.get(ext, 'audio/mpeg')
-                
-                response = FileResponse(open(file_path, 'rb'), content_type=content_type)
-                response['Content-Length'] = os.path.getsize(file_path)
-                return response
-            except Exception as e:
-                print(f"读取文件失败: {e}")
-                return HttpResponse(f"文件读取失败: {str(e)}", status=500)
+        file_path = Path(song.file_path.path)
+        if file_path.exists():
+            return file_path, None
     
-    # 使用原始文件路径
+    last_error = None
     if song.original_path:
         # 尝试多种路径格式
-        possible_paths = [
-            song.original_path,
-            Path(song.original_path),
-            Path(song.original_path).resolve(),
-        ]
-        
-        last_error = None
-        for path_obj in possible_paths:
+        for resolve in (False, True):
             try:
-                if isinstance(path_obj, str):
-                    file_path = Path(path_obj)
-                else:
-                    file_path = path_obj
+                file_path = Path(song.original_path)
+                if resolve:
+                    file_path = file_path.resolve()
                 
                 # 检查路径是否存在
                 if file_path.exists() and file_path.is_file():
-                    # 根据文件扩展名设置content_type
-                    ext = file_path.suffix.lower()
-                    content_types = {
-                        '.mp3': 'audio/mpeg',
-                        '.flac': 'audio/flac',
-                        '.wav': 'audio/wav',
-                        '.m4a': 'audio/mp4',
-                        '.aac': 'audio/aac',
-                        '.ogg': 'audio/ogg',
-                    }
-                    content_type = content_types.get(ext, 'audio/mpeg')
-                    
-                    # 使用流式响应，支持大文件
-                    file_handle = open(file_path, 'rb')
-                    response = FileResponse(file_handle, content_type=content_type)
-                    response['Content-Length'] = file_path.stat().st_size
-                    # 添加缓存控制头
-                    response['Cache-Control'] = 'public, max-age=3600'
-                    # 添加Accept-Ranges支持，允许断点续传
-                    response['Accept-Ranges'] = 'bytes'
-                    return response
-                else:
-                    # 检查是否是驱动器不存在（外部硬盘断开）
-                    drive = file_path.parts[0] if file_path.parts else ''
-                    if drive and not os.path.exists(drive):
-                        last_error = f"外部存储设备未连接: {drive}"
-                    elif not file_path.exists():
-                        last_error = f"文件不存在: {file_path}"
+                    return file_path, None
+                
+                # 检查是否是驱动器不存在（外部硬盘断开）
+                drive = file_path.parts[0] if file_path.parts else ''
+                if drive and not os.path.exists(drive):
+                    last_error = f"外部存储设备未连接: {drive}"
+                elif not file_path.exists():
+                    last_error = f"文件不存在: {file_path}"
             except OSError as e:
                 # 操作系统错误，可能是驱动器不存在
                 last_error = f"无法访问文件路径: {str(e)}"
-                print(f"尝试路径 {path_obj} 失败: {e}")
-                continue
-            except Exception as e:
-                last_error = f"读取文件时出错: {str(e)}"
-                print(f"尝试路径 {path_obj} 失败: {e}")
-                continue
-        
-        # 如果所有路径都失败，返回详细的错误信息
-        if last_error:
-            error_msg = f"歌曲文件无法访问\n\n可能的原因：\n1. 外部硬盘未连接\n2. 文件路径已更改\n3. 文件已被删除\n\n错误详情: {last_error}"
-            return HttpResponse(error_msg, status=404, content_type='text/plain; charset=utf-8')
-    
-    # 如果都失败了，返回404
+                print(f"尝试路径 {song.original_path} 失败: {e}")
+    return None, last_error
+
+
+def _locate_playable_file(song):
+    """外置硬盘上的曲目优先读取本地缓存副本，未命中时解析原路径并在后台复制"""
+    from .track_cache import local_track_cache
+    use_local_cache = bool(song.original_path) and not song.file_path
+    if use_local_cache:
+        cached = local_track_cache.lookup(song.original_path)
+        if cached is not None:
+            return cached, None
+    file_path, last_error = _resolve_song_file(song)
+    if file_path is not None and use_local_cache:
+        local_track_cache.enqueue(song.original_path, file_path)
+    return file_path, last_error
+
+
+def _song_file_missing_response(last_error):
+    from django.http import HttpResponse
+    # 如果所有路径都失败，返回详细的错误信息
+    if last_error:
+        error_msg = f"歌曲文件无法访问\n\n可能的原因：\n1. 外部硬盘未连接\n2. 文件路径已更改\n3. 文件已被删除\n\n错误详情: {last_error}"
+        return HttpResponse(error_msg, status=404, content_type='text/plain; charset=utf-8')
     return HttpResponse("歌曲文件不存在，请检查外部硬盘是否已连接", status=404, content_type='text/plain; charset=utf-8')
 
 
+@limit_concurrent_streams
+def play_song(request, song_id):
+    """播放歌曲文件视图（支持 Range 断点续传，见 streaming.py）"""
+    from django.http import HttpResponse
+    from .streaming import (
+        AudioFileResponse, RangeNotSatisfiable, parse_range_header, range_not_satisfiable_response,
+    )
+    from .head_cache import audio_head_cache
+    from .seek_index import read_flac_stream_header
+    
+    song = get_object_or_404(Song, id=song_id)
+    
+    file_path, last_error = _locate_playable_file(song)
+    if file_path is None:
+        return _song_file_missing_response(last_error)
+    use_local_cache = bool(song.original_path) and not song.file_path
+    
+    try:
+        stat = file_path.stat()
+        # ?t=秒：按定位索引从最近的帧边界开始输出（无索引时忽略）
+        offset, prefix, seek_time = 0, b'', None
+        seconds = _parse_seek_seconds(request.GET.get('t'))
+        if seconds is not None:
+            seek_index = SongSeekIndex.objects.filter(
+                song=song, file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns,
+            ).first()
+            if seek_index is not None:
+                offset, seek_time = seek_index.offset_at(seconds)
+                if file_path.suffix.lower() == '.flac':
+                    prefix = read_flac_stream_header(file_path)
+        # 请求从文件头开始时，文件头由内存缓存返回，避免等待休眠硬盘的冷读取
+        head = None
+        if not offset:
+            byte_range = parse_range_header(request.META.get('HTTP_RANGE'), stat.st_size)
+            if audio_head_cache.enabled and (byte_range is None or byte_range[0] < audio_head_cache.head_bytes):
+                head = audio_head_cache.lookup(file_path, stat.st_size, stat.st_mtime_ns)
+        response = AudioFileResponse(
+            file_path, request=request, head=head, size=stat.st_size, offset=offset, prefix=prefix,
+            filename=Path(song.original_path).name if use_local_cache else file_path.name,
+        )
+    except RangeNotSatisfiable as exc:
+        return range_not_satisfiable_response(exc)
+    except OSError as e:
+        print(f"读取文件失败: {e}")
+        return HttpResponse(f"文件读取失败: {str(e)}", status=500)
+    
+    if is_new_play(request):
+        play_events.record(song.id, request.user.pk if request.user.is_authenticated else None)
+    
+    # 添加缓存控制头
+    response['Cache-Control'] = 'public, max-age=3600'
+    if seek_time is not None:
+        response['X-Seek-Time'] = f'{seek_time:.3f}'
+    return response
+
+
+def _parse_seek_seconds(value):
+    """解析 ?t= 参数（秒，非负），无效时返回 None"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if seconds != seconds or seconds < 0 or seconds == float('inf'):
+        return None
+    return seconds
+
+
+def _hls_source(song):
+    """定位可切片的文件及其定位索引；不支持时返回 (None, None, 错误响应)"""
+    from django.http import HttpResponse
+    from .hls import HLS_FORMATS
+    file_path, last_error = _locate_playable_file(song)
+    if file_path is None:
+        return None, None, _song_file_missing_response(last_error)
+    if file_path.suffix.lower() not in HLS_FORMATS:
+        return None, None, HttpResponse("该格式不支持分段播放", status=404, content_type='text/plain; charset=utf-8')
+    stat = file_path.stat()
+    seek_index = SongSeekIndex.objects.filter(song=song, file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns).first()
+    if seek_index is None:
+        return None, None, HttpResponse("歌曲尚未生成定位索引，请重新扫描", status=404, content_type='text/plain; charset=utf-8')
+    return file_path, seek_index, None
+
+
+def hls_playlist(request, song_id):
+    """GET /play/<id>/hls.m3u8 — 按帧边界切分的 HLS 播放列表（MP3 / AAC，不转码）"""
+    from django.http import HttpResponse
+    from .hls import SegmentPlan, build_playlist, hls_segment_seconds
+    
+    song = get_object_or_404(Song, id=song_id)
+    try:
+        file_path, seek_index, error = _hls_source(song)
+    except OSError as e:
+        return HttpResponse(f"文件读取失败: {str(e)}", status=500)
+    if error:
+        return error
+    
+    plan = SegmentPlan(seek_index.offsets, seek_index.interval, seek_index.file_size,
+                       hls_segment_seconds(), song.duration)
+    # 片段使用相对 URL（相对于播放列表），带文件版本号，文件变化后旧片段缓存自然失效
+    segment_url = 'hls/{n}' + f'{file_path.suffix.lower()}?v={seek_index.file_mtime_ns}'
+    response = HttpResponse(build_playlist(plan, segment_url), content_type='application/vnd.apple.mpegurl')
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+@limit_concurrent_streams
+def hls_segment(request, song_id, segment, ext):
+    """GET /play/<id>/hls/<n>.<ext> — 单个片段：原文件字节区间 + 时间戳 ID3，支持 Range"""
+    from django.http import HttpResponse
+    from .streaming import AudioFileResponse, RangeNotSatisfiable, range_not_satisfiable_response
+    from .head_cache import audio_head_cache
+    from .hls import SegmentPlan, hls_segment_seconds, timestamp_id3
+    
+    song = get_object_or_404(Song, id=song_id)
+    try:
+        file_path, seek_index, error = _hls_source(song)
+        if error:
+            return error
+        plan = SegmentPlan(seek_index.offsets, seek_index.interval, seek_index.file_size,
+                           hls_segment_seconds(), song.duration)
+        if segment >= len(plan) or f'.{ext}'.lower() != file_path.suffix.lower():
+            raise Http404("片段不存在")
+        start, end = plan.bounds(segment)
+        head = None
+        if audio_head_cache.enabled and start < audio_head_cache.head_bytes:
+            head = audio_head_cache.lookup(file_path, seek_index.file_size, file_path.stat().st_mtime_ns)
+        response = AudioFileResponse(
+            file_path, request=request, head=head, size=seek_index.file_size,
+            offset=start, end=end, prefix=timestamp_id3(plan.start_time(segment)),
+            filename=f'{song.id}-{segment}{file_path.suffix.lower()}',
+        )
+    except RangeNotSatisfiable as exc:
+        return range_not_satisfiable_response(exc)
+    except OSError as e:
+        print(f"读取文件失败: {e}")
+        return HttpResponse(f"文件读取失败: {str(e)}", status=500)
+    
+    if segment == 0 and is_new_play(request):
+        play_events.record(song.id, request.user.pk if request.user.is_authenticated else None, source='hls')
+    
+    # 片段内容由文件版本号唯一确定，可长期缓存
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+def stream_stats_api(request):
+    """GET /api/stream/stats/ — 播放缓存命中率、活跃流等统计（仅管理员）"""
+    denied = _json_login_required(request)
+    if denied:
+        return denied
+    if not request.user.is_staff:
+        return JsonResponse({'error': '没有权限访问此资源'}, status=403)
+    if request.method != 'GET':
+        return JsonResponse({'error': '只支持GET请求'}, status=405)
+    from .head_cache import audio_head_cache
+    from .track_cache import local_track_cache
+    from .stream_limits import stream_registry
+    return JsonResponse({
+        'head_cache': audio_head_cache.stats(),
+        'local_cache': local_track_cache.stats(),
+        'active_streams': stream_registry.snapshot(),
+        'play_events': play_events.stats(),
+    })
+
+
+def search_stats_api(request):
+    """GET /api/search/stats/ — 搜索结果缓存命中率、搜索建议 / 模糊索引、歌词文件索引状态（仅管理员）"""
+    denied = _json_login_required(request)
+    if denied:
+        return denied
+    if not request.user.is_staff:
+        return JsonResponse({'error': '没有权限访问此资源'}, status=403)
+    if request.method != 'GET':
+        return JsonResponse({'error': '只支持GET请求'}, status=405)
+    from .lyrics_files import lyrics_file_index
+    return JsonResponse({
+        'result_cache': search_result_cache.stats(),
+        'lyrics_files': lyrics_file_index.stats(),
+        'suggest': catalog_suggester.stats(),
+        'fuzzy': fuzzy_searcher.stats(),
+    })
+
+
+def stream_prefetch_api(request):
+    """POST /api/stream/prefetch/ body: {song_ids: [...]} — 播放器上报接下来的歌曲，服务器后台预读"""
+    if request.method != 'POST':
+        return JsonResponse({'error': '只支持POST请求'}, status=405)
+    from .readahead import read_ahead
+    try:
+        data = json.loads(request.body.decode('utf-8') or '{}')
+        song_ids = [int(song_id) for song_id in data.get('song_ids', [])]
+    except (ValueError, TypeError, AttributeError, json.JSONDecodeError):
+        return JsonResponse({'error': '无效的请求数据'}, status=400)
+    
+    song_ids = song_ids[:int(getattr(settings, 'AUDIO_READAHEAD_MAX_TRACKS', 3))]
+    paths = dict(
+        Song.objects.filter(Q(file_path='') | Q(file_path__isnull=True), id__in=song_ids)
+        .exclude(original_path='')
+        .values_list('id', 'original_path')
+    )
+    scheduled = read_ahead.schedule(paths[song_id] for song_id in song_ids if song_id in paths)
+    return JsonResponse({'scheduled': scheduled})
+
+
+def stream_cache_warm_api(request):
+    """POST /api/stream/cache/warm/ body: {album_id} 或 {playlist_id} — 预先复制到本地缓存"""
+    denied = _json_login_required(request)
+    if denied:
+        return denied
+    if request.method != 'POST':
+        return JsonResponse({'error': '只支持POST请求'}, status=405)
+    from .track_cache import local_track_cache
+    if not local_track_cache.enabled:
+        return JsonResponse({'error': '未配置本地缓存目录 AUDIO_LOCAL_CACHE_DIR'}, status=400)
+    try:
+        if request.content_type and 'application/json' in request.content_type:
+            data = json.loads(request.body.decode('utf-8') or '{}')
+        else:
+            data = request.POST
+        album_id = data.get('album_id')
+        playlist_id = data.get('playlist_id')
+        if album_id is not None:
+            songs = Song.objects.filter(album_id=int(album_id))
+        elif playlist_id is not None:
+            playlist = _owned_playlist_or_404(request.user, int(playlist_id))
+            songs = Song.objects.filter(playlists__playlist=playlist)
+        else:
+            return JsonResponse({'error': '缺少 album_id 或 playlist_id'}, status=400)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        return JsonResponse({'error': '无效的请求数据'}, status=400)
+    
+    queued = 0
+    for original_path in songs.exclude(original_path='').values_list('original_path', flat=True):
+        if local_track_cache.enqueue(original_path):
+            queued += 1
+    return JsonResponse({'queued': queued})
+
+
+def _zip_download_response(request, numbered_songs, folder):
+    """把 (序号, 歌曲) 依次打包为流式 ZIP 响应；没有可用文件时返回 404"""
+    from django.http import HttpResponse, StreamingHttpResponse
+    from django.utils.http import content_disposition_header
+    from .streaming import is_async_request, iterate_in_thread
+    from .stream_limits import bandwidth_meter, client_ip
+    from .zipstream import ZipStream, safe_arcname
+    
+    folder = safe_arcname(folder)
+    files, used = [], set()
+    for number, song in numbered_songs:
+        file_path, _ = _locate_playable_file(song)
+        if file_path is None:
+            continue
+        stem = f"{folder}/{number:02d} - {safe_arcname(song.title)}"
+        if (stem + file_path.suffix).lower() in used:
+            stem += f" ({song.id})"
+        arcname = stem + file_path.suffix.lower()
+        used.add(arcname.lower())
+        files.append((arcname, file_path))
+    if not files:
+        return HttpResponse("没有可下载的歌曲文件，请检查外部硬盘是否已连接", status=404, content_type='text/plain; charset=utf-8')
+    
+    try:
+        archive = ZipStream(files)
+    except OSError as e:
+        return HttpResponse(f"文件读取失败: {str(e)}", status=500)
+    length = len(archive)
+    sent = [0]
+    
+    def counted():
+        # 按实际产出的字节计量，下载中途取消时只计已发送部分
+        for chunk in archive:
+            sent[0] += len(chunk)
+            yield chunk
+    
+    content = iterate_in_thread(counted()) if is_async_request(request) else counted()
+    response = StreamingHttpResponse(content, content_type='application/zip')
+    response['Content-Length'] = str(length)
+    response['Content-Disposition'] = content_disposition_header(True, f'{folder}.zip')
+    user_id = request.user.pk if request.user.is_authenticated else None
+    response._resource_closers.append(lambda: bandwidth_meter.record(user_id, client_ip(request), sent[0]))
+    return response
+
+
+@login_required(login_url='/login/')
+def album_download(request, album_id):
+    """GET /album/<id>/download.zip — 整张专辑打包下载（流式、不压缩）"""
+    album = get_object_or_404(Album, id=album_id)
+    songs = album.songs.order_by('track_number', 'title')
+    return _zip_download_response(
+        request, [(song.track_number or index, song) for index, song in enumerate(songs, 1)], album.name,
+    )
+
+
+@login_required(login_url='/login/')
+def playlist_download(request, playlist_id):
+    """GET /playlist/<id>/download.zip — 歌单打包下载（仅所有者）"""
+    playlist = _owned_playlist_or_404(request.user, playlist_id)
+    # 歌单内按加入顺序编号，不使用专辑曲目号
+    entries = playlist.songs.select_related('song').order_by('added_at')
+    return _zip_download_response(
+        request, [(index, entry.song) for index, entry in enumerate(entries, 1)], playlist.name,
+    )
+
+
+def _radio_playlist(request, playlist_id, owner_only):
+    """电台接口的同步部分：登录校验与歌单权限；返回 (歌单, 错误响应)"""
+    denied = _json_login_required(request)
+    if denied:
+        return None, denied
+    if owner_only:
+        return _owned_playlist_or_404(request.user, playlist_id), None
+    return get_object_or_404(Playlist, id=playlist_id), None
+
+
+def _radio_tracks(playlist):
+    """按加入顺序收集歌单中可拼接播放的曲目"""
+    from .radio import RADIO_FORMATS, RadioTrack
+    tracks = []
+    entries = PlaylistSong.objects.filter(playlist=playlist).select_related('song').order_by('added_at')
+    for entry in entries:
+        file_path, _ = _locate_playable_file(entry.song)
+        if file_path is not None and file_path.suffix.lower() in RADIO_FORMATS:
+            tracks.append(RadioTrack(entry.song.id, entry.song.title, file_path, entry.song.duration))
+    return tracks
+
+
+async def radio_control_api(request, playlist_id, action):
+    """POST /api/radio/<playlist_id>/start|stop/ — 歌单所有者开播 / 停播（需 ASGI 部署）"""
+    from asgiref.sync import sync_to_async
+    from .radio import radio_station
+    from .streaming import is_async_request
+    if request.method != 'POST':
+        return JsonResponse({'error': '只支持POST请求'}, status=405)
+    playlist, error = await sync_to_async(_radio_playlist)(request, playlist_id, True)
+    if error:
+        return error
+    if not is_async_request(request):
+        return JsonResponse({'error': '电台模式需要以 ASGI 方式部署'}, status=503)
+    if action == 'stop':
+        return JsonResponse({'stopped': radio_station.stop(playlist.id)})
+    tracks = await sync_to_async(_radio_tracks)(playlist)
+    if not tracks:
+        return JsonResponse({'error': '歌单中没有可用于电台播放的 MP3 歌曲'}, status=400)
+    channel = radio_station.start(playlist.id, tracks)
+    return JsonResponse(channel.status())
+
+
+async def radio_status_api(request, playlist_id):
+    """GET /api/radio/<playlist_id>/ — 频道状态（正在播放、听众数）"""
+    from asgiref.sync import sync_to_async
+    from .radio import radio_station
+    if request.method != 'GET':
+        return JsonResponse({'error': '只支持GET请求'}, status=405)
+    playlist, error = await sync_to_async(_radio_playlist)(request, playlist_id, False)
+    if error:
+        return error
+    channel = radio_station.get(playlist.id)
+    if channel is None:
+        return JsonResponse({'channel_id': playlist.id, 'running': False})
+    return JsonResponse(channel.status())
+
+
+async def radio_stream(request, playlist_id):
+    """GET /radio/<playlist_id>/stream/ — 收听频道：所有听众共享同一个读取任务"""
+    from asgiref.sync import sync_to_async
+    from django.http import HttpResponse, StreamingHttpResponse
+    from .radio import RADIO_FORMATS, radio_station
+    playlist, error = await sync_to_async(_radio_playlist)(request, playlist_id, False)
+    if error:
+        return error
+    channel = radio_station.get(playlist.id)
+    if channel is None:
+        return HttpResponse("电台未开播", status=404, content_type='text/plain; charset=utf-8')
+    response = StreamingHttpResponse(channel.listen(), content_type=RADIO_FORMATS['.mp3'])
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def suggest_api(request):
+    """GET /api/suggest/?q= — 搜索框输入提示（歌曲、歌手、专辑），由进程内前缀索引返回"""
+    if request.method != 'GET':
+        return JsonResponse({'error': '只支持GET请求'}, status=405)
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), MAX_SUGGESTIONS)
+    except ValueError:
+        limit = 8
+    if not query:
+        return JsonResponse({'suggestions': []})
+    return JsonResponse({'suggestions': catalog_suggester.suggest(query, limit)})
+
+
+SNAPSHOT_EXPIRED = '游标已过期，请重新搜索'
+
+
+def _cacheable(payload) -> bool:
+    """快照已过期（None）或模糊索引构建期间的回退结果不写入搜索缓存"""
+    return payload is not None and not payload.get('indexing')
+
+
 class SearchView(APIView):
-    """搜索视图 - 支持歌曲标题和作者模糊搜索"""
+    """搜索视图 - 歌曲标题、作者、专辑名和拼音全文检索；mode=fuzzy 或无结果时按 n-gram 相似度容错匹配。
+    结果按排序键 (层级, 相关度, id) 升序排列，?cursor= 传上一页返回的 next_cursor 继续加载；
+    游标是 (曲库版本号, 位置)，翻页读取首页所在版本的排序快照，快照过期时返回 400"""
     permission_classes = [AllowAny]
+    max_results = 500  # 每个查询最多参与排序的结果数
     
     def get(self, request):
         """搜索歌曲"""
@@ -425,20 +787,224 @@ class SearchView(APIView):
         if not query:
             return Response({'results': []})
         
-        # 模糊搜索歌曲标题和作者
-        songs = Song.objects.filter(
-            Q(title__icontains=query) | Q(artist__icontains=query)
-        ).select_related('album')[:50]  # 限制返回50条
+        mode = 'fuzzy' if request.query_params.get('mode') == 'fuzzy' else 'exact'
+        cursor = request.query_params.get('cursor', '')
+        try:
+            snapshot = decode_snapshot_cursor(cursor)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # 首页固定使用此处读到的版本号，即使计算期间曲库有写入
+        version, position = snapshot or (catalog_version(), 0)
+        page_size = cursor_page_size(request)
+        payload = search_result_cache.get_or_compute(
+            f'songs:{page_size}:{position}', f'{mode}:{query}',
+            lambda: self._page(query, mode, version, position, page_size, from_cursor=snapshot is not None),
+            cache_if=_cacheable, version=version,
+        )
+        if payload is None:
+            return Response({'error': SNAPSHOT_EXPIRED}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(payload)
+    
+    def _page(self, query, mode, version, position, page_size, from_cursor=False):
+        if from_cursor and version != catalog_version():
+            # 翻页期间曲库有写入：只读取首页所在版本的排序快照
+            ranking = search_result_cache.get('song-ranking', f'{mode}:{query}', version=version)
+            if ranking is None:
+                return None
+        else:
+            ranking = search_result_cache.get_or_compute(
+                'song-ranking', f'{mode}:{query}', lambda: self._rank(query, mode),
+                cache_if=_cacheable, version=version,
+            )
+        keys, next_cursor = snapshot_page(ranking['keys'], version, position, page_size)
+        if ranking.get('indexing'):
+            # 模糊索引构建期间的回退排序不缓存，没有可供翻页的快照
+            next_cursor = None
+        songs_by_id = Song.objects.select_related('album').in_bulk([key[2] for key in keys])
+        songs = [songs_by_id[key[2]] for key in keys if key[2] in songs_by_id]
+        
+        data = SongSerializer(songs, many=True).data
+        return {
+            'results': list(data),
+            'count': len(data),
+            'mode': ranking['mode'],
+            'next_cursor': next_cursor,
+            **({'indexing': True} if ranking.get('indexing') else {}),
+        }
+    
+    def _rank(self, query, mode):
+        """排序键 (层级, 相关度, id)：0 拼音 / 首字母前缀，1 全文检索（bm25），2 模糊匹配（相似度取负）"""
+        keys = self._exact_keys(query) if mode == 'exact' else []
+        ranking = {}
+        if not keys:
+            # 错字、简繁体混用等精确检索查不到的输入按相似度排序
+            matched = fuzzy_searcher.search(query, limit=self.max_results)
+            if matched is not None:
+                mode = 'fuzzy'
+                keys = [(2, -score, song_id) for song_id, score in matched]
+            else:
+                # 模糊索引仍在后台构建：回退到精确检索，结果不缓存
+                ranking['indexing'] = True
+                if mode == 'fuzzy':
+                    mode = 'exact'
+                    keys = self._exact_keys(query)
+        ranking.update(mode=mode, keys=sorted(keys))
+        return ranking
+    
+    def _exact_keys(self, query):
+        keys = [(0, score, song_id) for song_id, score in pinyin_prefix_song_scores(query, limit=self.max_results)]
+        matched = search_song_scores(query, limit=self.max_results)
+        if matched is None:
+            # 全文索引不可用时（非 SQLite）回退到子串匹配
+            matched = [(song_id, 0) for song_id in Song.objects.filter(
+                Q(title__icontains=query) | Q(artist__icontains=query) | Q(album__name__icontains=query)
+            ).order_by('id').values_list('id', flat=True)[:self.max_results]]
+        seen = {key[2] for key in keys}
+        return keys + [(1, score, song_id) for song_id, score in matched if song_id not in seen]
+
+
+class LyricsSearchView(APIView):
+    """歌词搜索视图 - 按一句歌词找歌，返回命中的那一行及高亮片段"""
+    permission_classes = [AllowAny]
+    max_results = 50
+    
+    def get(self, request):
+        """搜索歌词"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'results': []})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_results)
+        except ValueError:
+            limit = 20
+        return Response(search_result_cache.get_or_compute(
+            f'lyrics:{limit}', query, lambda: self._search(query, limit)
+        ))
+    
+    def _search(self, query, limit):
+        hits = search_lyric_lines(query, limit=limit)
+        if hits is None:
+            # 全文索引不可用时（非 SQLite）回退到子串匹配
+            hits = [
+                (song_id, None, 0) for song_id in
+                Song.objects.filter(lyrics__icontains=query).order_by('id').values_list('id', flat=True)[:limit]
+            ]
+        songs_by_id = Song.objects.select_related('album').in_bulk([hit[0] for hit in hits])
+        results = []
+        for song_id, line_number, _ in hits:
+            song = songs_by_id.get(song_id)
+            if song is None:
+                continue
+            if line_number is None:
+                line_number = next(
+                    (i for i, text in enumerate(song.lyrics.splitlines()) if query.lower() in text.lower()), 0
+                )
+            line = lyric_line(song.lyrics, line_number)
+            item = SongSerializer(song).data
+            # 列表里只需要命中的一行，不返回整首歌词
+            item.pop('lyrics', None)
+            item.update({'line': line, 'line_number': line_number, 'snippet': highlight(line, query)})
+            results.append(item)
+        return {
+            'results': results,
+            'count': len(results),
+        }
+
+
+class ContentSearchView(APIView):
+    """内容搜索视图 - 言论、巡回演出、演出场地、图片说明共用一个全文索引，返回各类型命中数。
+    首页把排序结果和类型计数按内容版本号存为快照，游标是 (版本号, 位置)，快照过期时返回 400"""
+    permission_classes = [AllowAny]
+    max_results = 500  # 每个查询最多参与排序的结果数
+    
+    def get(self, request):
+        """搜索内容；?type= 只看某一类，?cursor= 传上一页返回的 next_cursor"""
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type', '')
+        if kind and kind not in CONTENT_KINDS:
+            return Response({'error': f'type 只能是 {"、".join(CONTENT_KINDS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if not query:
+            return Response({'results': [], 'facets': {}})
+        try:
+            cursor = decode_snapshot_cursor(request.query_params.get('cursor', ''))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = cursor_page_size(request, default=20)
         
-        serializer = SongSerializer(songs, many=True)
+        # 内容写入不记曲库版本号，快照按内容版本号区分；首页固定使用此处读到的版本号
+        version, position = cursor or (content_version(), 0)
+        if cursor is not None and version != content_version():
+            # 翻页期间内容有写入：只读取首页所在版本的快照
+            found = search_result_cache.get('content', f'{kind}:{query}', version=version)
+            if found is None:
+                return Response({'error': SNAPSHOT_EXPIRED}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            found = search_result_cache.get_or_compute(
+                'content', f'{kind}:{query}', lambda: self._snapshot(query, kind), version=version
+            )
+        hits, next_cursor = snapshot_page(found['hits'], version, position, page_size)
+        facets = found['facets']
         return Response({
-            'results': serializer.data,
-            'count': len(serializer.data)
+            'results': self._serialize(hits, query),
+            'count': len(hits),
+            'facets': {name: facets.get(name, 0) for name in CONTENT_KINDS},
+            'total': sum(facets.values()),
+            'next_cursor': next_cursor,
         })
+    
+    def _snapshot(self, query, kind):
+        found = search_content(query, kind, limit=self.max_results)
+        hits, facets = found if found is not None else self._fallback(query, kind, self.max_results)
+        return {'hits': [(name, object_id) for name, object_id, _ in hits], 'facets': facets}
+    
+    def _serialize(self, hits, query):
+        objects = {}
+        for name, (_, model) in CONTENT_KINDS.items():
+            ids = [object_id for hit_kind, object_id in hits if hit_kind == name]
+            if ids:
+                queryset = model.objects.select_related('tour') if name == 'venue' else model.objects
+                objects[name] = queryset.in_bulk(ids)
+        results = []
+        for name, object_id in hits:
+            obj = objects.get(name, {}).get(object_id)
+            if obj is None:
+                continue
+            title, body = content_document(name, obj)
+            item = {
+                'type': name,
+                'id': object_id,
+                'title': str(obj) if name == 'venue' else obj.get_title(),
+                'snippet': document_excerpt(title, body, query),
+                'date': obj.date if name == 'venue' else obj.get_date().date(),
+            }
+            if name == 'venue':
+                item['tour_id'] = obj.tour_id
+            elif name == 'image':
+                item['image_url'] = obj.image.url if obj.image else None
+            results.append(item)
+        return results
+    
+    def _fallback(self, query, kind, limit):
+        """全文索引不可用时（非 SQLite）逐表子串匹配，按类型、id 排序"""
+        lookups = {
+            'quote': Q(text__icontains=query) | Q(author__icontains=query) | Q(source__icontains=query),
+            'tour': Q(name__icontains=query) | Q(description__icontains=query),
+            'venue': Q(name__icontains=query) | Q(city__icontains=query),
+            'image': Q(title__icontains=query) | Q(caption__icontains=query),
+        }
+        facets, hits = {}, []
+        for name, (_, model) in CONTENT_KINDS.items():
+            queryset = model.objects.filter(lookups[name])
+            facets[name] = queryset.count()
+            if kind and name != kind:
+                continue
+            hits += [(name, object_id, 0) for object_id in queryset.order_by('id').values_list('id', flat=True)[:limit]]
+        hits.sort(key=lambda hit: content_rowid(hit[0], hit[1]))
+        return hits[:limit], facets
 
 
 class ArtistSearchView(APIView):
-    """歌手搜索视图 - 支持歌手名称模糊查询和首字母搜索"""
+    """歌手搜索视图 - 支持歌手名称模糊查询、拼音和首字母搜索"""
     permission_classes = [AllowAny]
     
     def get(self, request):
@@ -447,41 +1013,28 @@ class ArtistSearchView(APIView):
         if not query:
             return Response({'artists': []})
         
+        return Response(search_result_cache.get_or_compute('artists', query, lambda: self._search(query)))
+    
+    def _search(self, query):
+        # 单条查询：首字母、身份键（简繁体归并）走索引，拼音前缀按范围查询，名称子串只扫描歌手表
+        condition = Q(name__icontains=query)
         query_key = artist_identity_key(query)
-        artists = Song.objects.values_list('artist', flat=True).distinct()
-        
-        # 过滤：支持名称模糊查询；同一拼音归并为同一歌手
-        matching_artists = []
-        seen_keys = set()
-        query_lower = query.lower()
-        
-        for artist in artists:
-            if not artist:
-                continue
-            key = artist_identity_key(artist)
-            if key in seen_keys:
-                continue
-            name_match = query_lower in artist.lower()
-            key_match = query_key and query_key == key
-            initial_match = (
-                len(query) == 1
-                and Song.objects.filter(artist=artist, artist_initial__iexact=query).exists()
-            )
-            if name_match or key_match or initial_match:
-                matching_artists.append(artist)
-                seen_keys.add(key)
-        
-        # 去重并排序
-        matching_artists = sorted(list(set(matching_artists)))
+        if query_key:
+            condition |= Q(identity_key=query_key) | Q(**prefix_range('pinyin', query_key))
+        if len(query) == 1:
+            condition |= Q(initial=query.upper())
+        matching_artists = sorted(
+            Artist.objects.filter(condition, songs__isnull=False).distinct().values_list('name', flat=True)
+        )
         
-        return Response({
+        return {
             'artists': matching_artists,
             'count': len(matching_artists)
-        })
+        }
 
 
 class ArtistSongsView(APIView):
-    """根据歌手获取歌曲列表 - 返回该歌手全部歌曲"""
+    """根据歌手获取歌曲列表 - 按 id 游标分页，?cursor= 传上一页返回的 next_cursor"""
     permission_classes = [AllowAny]
     
     def get(self, request):
@@ -490,84 +1043,51 @@ class ArtistSongsView(APIView):
         if not artist:
             return Response({'results': [], 'error': '缺少artist参数'}, status=status.HTTP_400_BAD_REQUEST)
         
-        identity = artist_identity_key(artist)
-        songs = Song.objects.filter(
-            Q(artist__iexact=artist) | Q(artist_pinyin__iexact=identity)
-        ).select_related('album') if identity else Song.objects.filter(
-            artist__iexact=artist
-        ).select_related('album')
-        
-        serializer = SongSerializer(songs, many=True)
-        return Response({
-            'results': serializer.data,
-            'count': len(serializer.data),
-            'artist': artist
-        })
+        cursor = request.query_params.get('cursor', '')
+        try:
+            after = decode_cursor(cursor, 1)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = cursor_page_size(request)
+        # 按身份键（唯一索引）定位歌手，简繁体写法返回同一组歌曲，也共用同一份缓存
+        identity_key = artist_identity_key(artist)
+        payload = search_result_cache.get_or_compute(
+            f'artist-songs:{page_size}:{cursor}', identity_key, lambda: self._page(identity_key, after, page_size)
+        )
+        return Response({**payload, 'artist': artist})
+    
+    def _page(self, identity_key, after, page_size):
+        # 按 id 游标分页：(artist_ref_id, id) 走外键索引，不用 OFFSET
+        artist = Artist.objects.filter(identity_key=identity_key).values_list('id', 'song_count').first()
+        if artist is None:
+            return {'results': [], 'count': 0, 'total': 0, 'next_cursor': None}
+        songs = list(
+            Song.objects.filter(artist_ref_id=artist[0], id__gt=after[0] if after else 0)
+            .select_related('album').order_by('id')[:page_size + 1]
+        )
+        next_cursor = encode_cursor((songs[page_size - 1].id,)) if len(songs) > page_size else None
+        data = SongSerializer(songs[:page_size], many=True).data
+        return {
+            'results': list(data),
+            'count': len(data),
+            'total': artist[1],
+            'next_cursor': next_cursor,
+        }
 
 
 class ArtistsByInitialView(APIView):
-    """获取按拼音首字母分组的歌手列表"""
+    """获取按拼音首字母分组的歌手列表（物化目录，按版本号做 ETag 协商缓存）"""
     permission_classes = [AllowAny]
     
     def get(self, request):
         """返回按首字母分组的歌手列表"""
-        # 按歌手去重（同一拼音视为同一歌手，避免简繁体重复条目）
-        artists_by_initial = {}
-        seen_identity = set()
-        for artist in Song.objects.values_list('artist', flat=True).distinct():
-            if not artist:
-                continue
-            identity = artist_identity_key(artist)
-            if identity in seen_identity:
-                continue
-            seen_identity.add(identity)
-            
-            row = Song.objects.filter(artist=artist).values(
-                'artist_pinyin', 'artist_initial'
-            ).first() or {}
-            initial = (row.get('artist_initial') or '').strip()
-            pinyin = (row.get('artist_pinyin') or '').strip()
-            if not initial and pinyin:
-                initial = pinyin[0].upper()
-            if not initial:
-                try:
-                    from pypinyin import lazy_pinyin, Style
-                    pinyin_list = lazy_pinyin(artist, style=Style.NORMAL)
-                    if pinyin_list and pinyin_list[0]:
-                        initial = pinyin_list[0][0].upper()
-                    elif artist and artist[0].isalpha():
-                        initial = artist[0].upper()
-                    else:
-                        initial = '#'
-                except ImportError:
-                    initial = artist[0].upper() if artist and artist[0].isalpha() else '#'
-            
-            if initial and initial.isalpha() and initial.isascii():
-                initial = initial.upper()
-            else:
-                initial = '#'
-            
-            artists_by_initial.setdefault(initial, []).append(artist)
-        
-        # 对每个首字母下的歌手进行排序
-        for initial in artists_by_initial:
-            artists_by_initial[initial].sort()
-        
-        # 按首字母排序（A-Z，#放在最后）
-        sorted_initials = sorted([k for k in artists_by_initial.keys() if k != '#'])
-        if '#' in artists_by_initial:
-            sorted_initials.append('#')
-        
-        # 构建返回数据
-        result = {}
-        for initial in sorted_initials:
-            result[initial] = artists_by_initial[initial]
-        
-        return Response({
-            'artists_by_initial': result,
-            'initials': sorted_initials,
-            'total_artists': sum(len(artists) for artists in artists_by_initial.values())
-        })
+        known = request.headers.get('If-None-Match', '').strip().removeprefix('W/').strip('"')
+        known_version = known.removeprefix('artists-') if known.startswith('artists-') else ''
+        version, payload = current_directory(known_version)
+        headers = {'ETag': f'"artists-{version}"', 'Cache-Control': 'no-cache'}
+        if payload is None:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(payload, headers=headers)
 
 
 class PlaylistViewSet(viewsets.ModelViewSet):
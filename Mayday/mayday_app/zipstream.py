@@ -0,0 +1,157 @@
+"""
+流式 ZIP 打包 - 专辑 / 歌单整包下载
+只存储不压缩（音频本身已压缩），边读文件边输出本地文件头、数据和数据描述符，
+最后输出中央目录；不生成临时文件，内存占用与归档大小无关。
+文件大小在开始前已知，因此可以预先算出整个归档的长度（Content-Length）。
+超过 4GB 的文件 / 偏移量自动使用 Zip64 扩展。
+"""
+from __future__ import annotations
+
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+from .streaming import stream_block_size
+
+_ZIP32_MAX = 0xFFFFFFFF
+_ZIP16_MAX = 0xFFFF
+
+# 通用标志：bit 3 = 数据描述符（CRC 边读边算），bit 11 = 文件名为 UTF-8
+_FLAGS = 0x0808
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+
+
+@dataclass
+class ZipEntry:
+    arcname: str
+    path: Path
+    size: int
+    mtime: float
+
+    @property
+    def zip64(self) -> bool:
+        return self.size >= _ZIP32_MAX
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = min(max(t.tm_year, 1980), 2107)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    return dos_time, dos_date
+
+
+def _local_header(entry: ZipEntry) -> bytes:
+    name = entry.arcname.encode('utf-8')
+    dos_time, dos_date = _dos_datetime(entry.mtime)
+    extra = b''
+    size32 = 0
+    if entry.zip64:
+        extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+        size32 = _ZIP32_MAX
+    return struct.pack(
+        '<4sHHHHHIIIHH', b'PK\x03\x04',
+        _VERSION_ZIP64 if entry.zip64 else _VERSION_DEFAULT, _FLAGS, 0,
+        dos_time, dos_date, 0, size32, size32, len(name), len(extra),
+    ) + name + extra
+
+
+def _data_descriptor(entry: ZipEntry, crc: int) -> bytes:
+    if entry.zip64:
+        return struct.pack('<4sIQQ', b'PK\x07\x08', crc, entry.size, entry.size)
+    return struct.pack('<4sIII', b'PK\x07\x08', crc, entry.size, entry.size)
+
+
+def _central_header(entry: ZipEntry, crc: int, offset: int) -> bytes:
+    name = entry.arcname.encode('utf-8')
+    dos_time, dos_date = _dos_datetime(entry.mtime)
+    # Zip64 扩展字段按 原始大小、压缩后大小、本地头偏移 的顺序只放溢出的字段
+    fields = []
+    size32 = entry.size
+    if entry.zip64:
+        fields += [entry.size, entry.size]
+        size32 = _ZIP32_MAX
+    offset32 = offset
+    if offset >= _ZIP32_MAX:
+        fields.append(offset)
+        offset32 = _ZIP32_MAX
+    extra = struct.pack('<HH', 0x0001, 8 * len(fields)) + struct.pack(f'<{len(fields)}Q', *fields) if fields else b''
+    version = _VERSION_ZIP64 if fields else _VERSION_DEFAULT
+    return struct.pack(
+        '<4sHHHHHHIIIHHHHHII', b'PK\x01\x02',
+        version, version, _FLAGS, 0, dos_time, dos_date,
+        crc, size32, size32, len(name), len(extra), 0, 0, 0, 0, offset32,
+    ) + name + extra
+
+
+def _end_records(count: int, cd_offset: int, cd_size: int) -> bytes:
+    records = b''
+    zip64 = count >= _ZIP16_MAX or cd_offset >= _ZIP32_MAX or cd_size >= _ZIP32_MAX
+    if zip64:
+        zip64_eocd_offset = cd_offset + cd_size
+        records += struct.pack(
+            '<4sQHHIIQQQQ', b'PK\x06\x06', 44, _VERSION_ZIP64, _VERSION_ZIP64,
+            0, 0, count, count, cd_size, cd_offset,
+        )
+        records += struct.pack('<4sIQI', b'PK\x06\x07', 0, zip64_eocd_offset, 1)
+    records += struct.pack(
+        '<4sHHHHIIH', b'PK\x05\x06', 0, 0,
+        min(count, _ZIP16_MAX), min(count, _ZIP16_MAX),
+        min(cd_size, _ZIP32_MAX), min(cd_offset, _ZIP32_MAX), 0,
+    )
+    return records
+
+
+class ZipStream:
+    """可迭代的 ZIP 归档；len() 为归档总字节数"""
+
+    def __init__(self, files: Sequence[Tuple[str, Path]]):
+        self.entries: List[ZipEntry] = []
+        for arcname, path in files:
+            stat = path.stat()
+            self.entries.append(ZipEntry(arcname, path, stat.st_size, stat.st_mtime))
+        self.block_size = stream_block_size()
+
+    def __len__(self) -> int:
+        # 头部长度与 CRC 无关，用 0 代入即可算出总长度
+        offset = 0
+        central = []
+        for entry in self.entries:
+            central.append(_central_header(entry, 0, offset))
+            offset += len(_local_header(entry)) + entry.size + len(_data_descriptor(entry, 0))
+        cd_size = sum(len(h) for h in central)
+        return offset + cd_size + len(_end_records(len(self.entries), offset, cd_size))
+
+    def __iter__(self) -> Iterator[bytes]:
+        offset = 0
+        central = []
+        for entry in self.entries:
+            header = _local_header(entry)
+            yield header
+            crc = 0
+            remaining = entry.size
+            with open(entry.path, 'rb') as f:
+                while remaining > 0:
+                    block = f.read(min(self.block_size, remaining))
+                    if not block:
+                        # 文件在打包过程中被截断，已声明的长度无法兑现，只能中止
+                        raise IOError(f"文件大小已变化: {entry.path}")
+                    crc = zlib.crc32(block, crc)
+                    remaining -= len(block)
+                    yield block
+            yield _data_descriptor(entry, crc)
+            central.append(_central_header(entry, crc, offset))
+            offset += len(header) + entry.size + len(_data_descriptor(entry, crc))
+        cd_size = sum(len(h) for h in central)
+        yield from central
+        yield _end_records(len(self.entries), offset, cd_size)
+
+
+def safe_arcname(name: str) -> str:
+    """去掉 ZIP 内文件名中的路径分隔符和 Windows 不允许的字符"""
+    cleaned = ''.join('_' if ch in '\\/:*?"<>|' or ord(ch) < 32 else ch for ch in name).strip(' .')
+    return cleaned or '_'
@@ -1,5 +1,7 @@
 """
 ASGI config for mayday_project project.
+电台模式（mayday_app/radio.py）的读取任务运行在此应用的事件循环中，
+例如：uvicorn mayday_project.asgi:application
 """
 import os
 
@@ -65,7 +65,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # 遥测库：播放记录、流量计量等高频写入（WAL），与曲库 / 用户数据分开，避免 database is locked
+    # 初始化：python manage.py migrate --database=telemetry
+    'telemetry': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('TELEMETRY_DB_PATH', str(BASE_DIR / 'telemetry.sqlite3')),
+        'OPTIONS': {
+            'timeout': int(os.getenv('TELEMETRY_DB_TIMEOUT', '30')),
+        },
+    },
+}
+DATABASE_ROUTERS = ['mayday_app.db_router.TelemetryRouter']
+# 路由到遥测库的模型
+TELEMETRY_MODELS = [
+    'mayday_app.PlayEvent',
+    'mayday_app.SongPlayStat',
+    'mayday_app.StreamUsage',
+]
+# 每个 SQLite 连接建立时执行的 PRAGMA（见 mayday_app/sqlite_tuning.py；值为 None 表示不设置）
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KB', str(64 * 1024))),  # 负数表示 KB
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'temp_store': 'MEMORY',
+}
+# 按数据库覆盖个别项，例如 {'telemetry': {'cache_size': -8192}}
+SQLITE_PRAGMA_OVERRIDES = {
+    'telemetry': {'busy_timeout': int(os.getenv('TELEMETRY_DB_TIMEOUT', '30')) * 1000},
 }
 
 # Password validation
@@ -112,6 +141,69 @@ MUSIC_DIRECTORY = r'D:\Music\郑秀文'
 
 # Lyrics directory path
 LYRICS_DIRECTORY = r'C:\Lyrics'
+# 歌词文件索引：检查目录 mtime 的间隔（秒）、按歌曲缓存的歌词条数
+LYRICS_INDEX_CHECK_SECONDS = float(os.getenv('LYRICS_INDEX_CHECK_SECONDS', '5'))
+LYRICS_CACHE_ENTRIES = int(os.getenv('LYRICS_CACHE_ENTRIES', '2000'))
+
+# Audio streaming (play_song 每次读取的块大小；WSGI 服务器支持时走 sendfile)
+AUDIO_STREAM_BLOCK_SIZE = int(os.getenv('AUDIO_STREAM_BLOCK_SIZE', str(256 * 1024)))
+# 文件头缓存：缓存每首歌开头 N KB，总量上限按字节计（0 表示关闭）
+AUDIO_HEAD_CACHE_BYTES = int(os.getenv('AUDIO_HEAD_CACHE_BYTES', str(64 * 1024 * 1024)))
+AUDIO_HEAD_CACHE_HEAD_KB = int(os.getenv('AUDIO_HEAD_CACHE_HEAD_KB', '512'))
+# 本地缓存层：把外置硬盘上的曲目复制到本机磁盘（留空表示不启用）
+AUDIO_LOCAL_CACHE_DIR = os.getenv('AUDIO_LOCAL_CACHE_DIR', '')
+AUDIO_LOCAL_CACHE_MAX_BYTES = int(os.getenv('AUDIO_LOCAL_CACHE_MAX_BYTES', str(20 * 1024 ** 3)))
+AUDIO_LOCAL_CACHE_REVALIDATE_SECONDS = int(os.getenv('AUDIO_LOCAL_CACHE_REVALIDATE_SECONDS', '600'))
+# 下一首预读：客户端上报接下来的 K 首，服务器预读每首开头 N MB（0 表示关闭）
+AUDIO_READAHEAD_MB = int(os.getenv('AUDIO_READAHEAD_MB', '4'))
+AUDIO_READAHEAD_MAX_TRACKS = int(os.getenv('AUDIO_READAHEAD_MAX_TRACKS', '3'))
+# 定位索引：扫描 MP3 / FLAC 时每隔 N 秒记录一个帧起始偏移（0 表示不生成）
+SEEK_INDEX_INTERVAL = float(os.getenv('SEEK_INDEX_INTERVAL', '1.0'))
+# HLS 分段播放（MP3 / AAC）：每个片段的目标时长（秒）
+HLS_SEGMENT_SECONDS = int(os.getenv('HLS_SEGMENT_SECONDS', '10'))
+# 同时播放的流数上限（按套餐；同一首歌的多个 Range 请求算一个流），以及每个 IP 的上限（0 表示不限）
+STREAM_LIMITS = {
+    'anonymous': int(os.getenv('STREAM_LIMIT_ANONYMOUS', '2')),
+    'free': int(os.getenv('STREAM_LIMIT_FREE', '2')),
+    'member': int(os.getenv('STREAM_LIMIT_MEMBER', '6')),
+}
+STREAM_LIMIT_PER_IP = int(os.getenv('STREAM_LIMIT_PER_IP', '10'))
+STREAM_LEASE_SECONDS = int(os.getenv('STREAM_LEASE_SECONDS', str(6 * 3600)))
+# 登记表后端：memory（进程内）| sqlite（多进程共享文件）
+STREAM_REGISTRY_BACKEND = os.getenv('STREAM_REGISTRY_BACKEND', 'memory')
+STREAM_REGISTRY_SQLITE_PATH = os.getenv('STREAM_REGISTRY_SQLITE_PATH', str(BASE_DIR / 'stream_registry.sqlite3'))
+# 流量计数批量写库的间隔（秒）
+STREAM_METER_FLUSH_SECONDS = int(os.getenv('STREAM_METER_FLUSH_SECONDS', '30'))
+# 电台模式（ASGI）：每块时长、共享缓冲区时长、新听众补发时长、无人收听多久后停播（秒）
+RADIO_CHUNK_SECONDS = float(os.getenv('RADIO_CHUNK_SECONDS', '0.5'))
+RADIO_BUFFER_SECONDS = float(os.getenv('RADIO_BUFFER_SECONDS', '30'))
+RADIO_PREROLL_SECONDS = float(os.getenv('RADIO_PREROLL_SECONDS', '5'))
+RADIO_IDLE_SECONDS = float(os.getenv('RADIO_IDLE_SECONDS', '120'))
+# 播放事件：攒够 N 条或每隔 N 秒批量写库（启用 Kafka 时发送到 play_events 主题），缓冲区上限
+PLAY_EVENT_BATCH_SIZE = int(os.getenv('PLAY_EVENT_BATCH_SIZE', '200'))
+PLAY_EVENT_FLUSH_SECONDS = float(os.getenv('PLAY_EVENT_FLUSH_SECONDS', '10'))
+PLAY_EVENT_BUFFER_MAX = int(os.getenv('PLAY_EVENT_BUFFER_MAX', '10000'))
+# 搜索建议：检查曲库变更的间隔、全量重建（刷新热度）的间隔（秒）、单次增量同步的最大变更数、热度统计天数
+SUGGEST_CHECK_SECONDS = float(os.getenv('SUGGEST_CHECK_SECONDS', '2'))
+SUGGEST_REBUILD_SECONDS = int(os.getenv('SUGGEST_REBUILD_SECONDS', '3600'))
+SUGGEST_INCREMENTAL_LIMIT = int(os.getenv('SUGGEST_INCREMENTAL_LIMIT', '2000'))
+SUGGEST_POPULARITY_DAYS = int(os.getenv('SUGGEST_POPULARITY_DAYS', '30'))
+# 搜索结果缓存（search 别名）：默认进程内 LRU，多进程部署可换成 Redis / Memcached 等共享后端；
+# 过期时间兜底不记版本号的修改，并发的相同查询最多等待 N 秒
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': os.getenv('SEARCH_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('SEARCH_CACHE_LOCATION', 'search-results'),
+        'TIMEOUT': int(os.getenv('SEARCH_CACHE_TIMEOUT', '600')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '5000'))},
+    },
+}
+SEARCH_CACHE_WAIT_SECONDS = float(os.getenv('SEARCH_CACHE_WAIT_SECONDS', '5'))
+# 歌词全文索引的中文切分函数（留空为逐字切分；如 mayday_app.lyrics_index.bigram_segment），修改后需重建歌词索引
+LYRICS_SEGMENTER = os.getenv('LYRICS_SEGMENTER', '')
 
 # Kafka settings
 KAFKA_BOOTSTRAP_SERVERS = ['localhost:9092']
@@ -1,7 +1,11 @@
 """
-填充所有歌曲的拼音字段
-运行方式: python populate_pinyin.py
+填充所有歌曲的拼音字段（歌手拼音 / 首字母，歌曲标题与专辑名的全拼 / 首字母检索键）
+运行方式:
+  python populate_pinyin.py                   # 只补全检索键为空的记录
+  python populate_pinyin.py --all             # 全部重新计算
+  python populate_pinyin.py --batch-size 2000
 """
+import argparse
 import os
 import django
 
@@ -9,7 +13,9 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mayday_project.settings')
 django.setup()
 
-from mayday_app.models import Song
+from mayday_app.models import Album, Song, pinyin_keys
+from mayday_app.search_index import rebuild_search_index
+from mayday_app.catalog_sync import record_catalog_change
 
 def populate_pinyin_fields():
     """填充所有歌曲的拼音字段"""
@@ -63,6 +69,43 @@ def populate_pinyin_fields():
         import traceback
         traceback.print_exc()
 
+def populate_search_keys(model, source_field, pinyin_field, initials_field, batch_size, only_missing):
+    """按主键分批计算拼音检索键并 bulk_update，每批一个事务，中断后可重新执行"""
+    queryset = model.objects.order_by('pk')
+    if only_missing:
+        queryset = queryset.filter(**{pinyin_field: ''}).exclude(**{source_field: ''})
+    last_pk = 0
+    total = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).only('pk', source_field)[:batch_size])
+        if not batch:
+            break
+        for obj in batch:
+            pinyin, initials = pinyin_keys(getattr(obj, source_field))
+            setattr(obj, pinyin_field, pinyin)
+            setattr(obj, initials_field, initials)
+        model.objects.bulk_update(batch, [pinyin_field, initials_field])
+        last_pk = batch[-1].pk
+        total += len(batch)
+        print(f"  {model._meta.verbose_name}: 已更新 {total} 条")
+    return total
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='填充歌手、歌曲标题和专辑名的拼音字段')
+    parser.add_argument('--all', action='store_true', help='全部重新计算（默认只补全为空的记录）')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批更新的记录数')
+    args = parser.parse_args()
+    
     populate_pinyin_fields()
+    
+    print("\n填充歌曲标题 / 专辑名拼音检索键...")
+    songs = populate_search_keys(Song, 'title', 'title_pinyin', 'title_initials', args.batch_size, not args.all)
+    albums = populate_search_keys(Album, 'name', 'name_pinyin', 'name_initials', args.batch_size, not args.all)
+    print(f"完成！歌曲 {songs} 首，专辑 {albums} 张")
+    
+    # update() / bulk_update() 不触发信号，重建全文索引中的拼音列，并通知各进程重建搜索建议索引
+    indexed = rebuild_search_index()
+    record_catalog_change('all')
+    print(f"全文索引已重建：{indexed} 首歌曲")
 
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 定期维护：WAL 检查点（把 -wal 文件写回主库并截断）+ PRAGMA optimize
+对 settings.DATABASES 中所有 SQLite 数据库执行。
+
+运行方式:
+  python sqlite_maintenance.py                 # 执行一次
+  python sqlite_maintenance.py --interval 600  # 每 10 分钟执行一次（配合守护进程 / 计划任务）
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except Exception:
+        pass
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mayday_project.settings')
+django.setup()
+
+from django.db import connections
+
+from mayday_app.sqlite_tuning import run_maintenance
+
+
+def maintain_all(truncate=True):
+    for alias in connections:
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        try:
+            result = run_maintenance(connection, truncate=truncate)
+        except Exception as e:
+            print(f"✗ {alias}: 维护失败 - {e}")
+            continue
+        finally:
+            connection.close()
+        if result['busy']:
+            print(f"… {alias}: 有未结束的读写事务，检查点未完成，稍后重试")
+        elif truncate:
+            print(f"✓ {alias}: WAL 已写回并截断，optimize 完成")
+        else:
+            print(f"✓ {alias}: 检查点完成（WAL {result['wal_pages']} 页，已写回 {result['checkpointed']} 页），optimize 完成")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLite WAL 检查点与 optimize')
+    parser.add_argument('--interval', type=int, default=0, help='循环执行的间隔秒数（默认只执行一次）')
+    parser.add_argument('--passive', action='store_true', help='使用 PASSIVE 检查点（不等待读者、不截断 WAL 文件）')
+    args = parser.parse_args()
+    while True:
+        maintain_all(truncate=not args.passive)
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)